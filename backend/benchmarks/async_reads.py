@@ -0,0 +1,195 @@
+"""Compare slow-query throughput of the Flask and asyncio read paths.
+
+Seeds a temporary SQLite database, makes every SQL statement take
+``--latency-ms`` longer inside the database driver (standing in for a slow
+or remote database), then sends ``--requests`` requests with
+``--concurrency`` in flight to each of:
+
+- sync:  the Flask app on ``--threads`` threads, like one gthread worker
+- async: the ASGI app from ``src.async_api`` on one event loop, with up
+  to ``--pool-size`` database connections
+
+Requests are made in-process on both sides, so HTTP parsing is left out.
+``stats`` and ``list`` run the same query helpers on both sides, so they
+show the effect of the event loop alone. ``detail`` loads the task's
+users lazily on the Flask side, two statements more than the async
+side's joins. Needs ``aiosqlite``. Run from ``backend/``::
+
+    python benchmarks/async_reads.py --endpoint stats --concurrency 64 --latency-ms 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from src.async_api import create_async_api
+from src.config import TestingConfig
+from src.models.task import Task, TaskPriority, TaskStatus
+from src.models.user import User, db
+
+ENDPOINTS = {
+    'list': '/tasks/',
+    'stats': '/tasks/stats',
+    'detail': '/tasks/1',
+}
+
+def add_latency(engine, seconds):
+    """Delay every statement on ``engine`` by ``seconds`` in the driver's own thread.
+
+    A SQLite progress handler sleeps once per statement, so a sync driver
+    blocks its calling thread and aiosqlite blocks its worker thread, the way
+    both would wait on a network round trip.
+    """
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        state = connection_record.info['latency'] = {'armed': False}
+
+        def handler():
+            if state['armed']:
+                state['armed'] = False
+                time.sleep(seconds)
+            return 0
+
+        if hasattr(dbapi_connection, 'run_async'):
+            dbapi_connection.run_async(lambda connection: connection.set_progress_handler(handler, 10))
+        else:
+            dbapi_connection.set_progress_handler(handler, 10)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def arm(conn, cursor, statement, parameters, context, executemany):
+        state = conn.info.get('latency')
+        if state is not None:
+            state['armed'] = True
+
+def seed(flask_app, tasks):
+    """One user owning ``tasks`` tasks; returns their auth headers"""
+    from flask_jwt_extended import create_access_token
+
+    with flask_app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('benchpass123')
+        db.session.add(user)
+        db.session.flush()
+        statuses, priorities = list(TaskStatus), list(TaskPriority)
+        db.session.add_all(
+            Task(
+                title=f'Task {i}',
+                status=statuses[i % len(statuses)],
+                priority=priorities[i % len(priorities)],
+                created_by=user.id,
+                assigned_to=user.id if i % 2 else None
+            )
+            for i in range(tasks)
+        )
+        db.session.commit()
+        token = create_access_token(identity=user.id)
+        db.session.remove()
+        # Reconnect later, so every connection gets the latency handler
+        db.engine.dispose()
+        return {'Authorization': f'Bearer {token}'}
+
+def summarize(name, durations, elapsed):
+    durations = sorted(durations)
+    p95 = durations[int(len(durations) * 0.95) - 1]
+    print(
+        f'{name:6} {len(durations) / elapsed:8.1f} req/s   '
+        f'p50 {statistics.median(durations) * 1000:7.1f} ms   p95 {p95 * 1000:7.1f} ms'
+    )
+
+def run_sync(flask_app, path, headers, args):
+    client = flask_app.test_client()
+
+    def request(submitted):
+        response = client.get(f'/api{path}', headers=headers)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        return time.perf_counter() - submitted
+
+    # Requests beyond the thread count wait in the executor's queue, as they
+    # would in a gthread worker's backlog, and that wait counts in their latency
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        durations = []
+        for offset in range(0, args.requests, args.concurrency):
+            batch = [
+                pool.submit(request, time.perf_counter())
+                for _ in range(min(args.concurrency, args.requests - offset))
+            ]
+            durations.extend(future.result() for future in batch)
+    return durations, time.perf_counter() - start
+
+async def run_async(api, path, headers, args):
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': f'{api.prefix}{path}',
+        'query_string': b'',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def request():
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        start = time.perf_counter()
+        await api(scope, receive, send)
+        assert messages[0]['status'] == 200, messages[1]['body']
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    durations = []
+    for offset in range(0, args.requests, args.concurrency):
+        batch = [request() for _ in range(min(args.concurrency, args.requests - offset))]
+        durations.extend(await asyncio.gather(*batch))
+    elapsed = time.perf_counter() - start
+    await api.engine.dispose()
+    return durations, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='stats')
+    parser.add_argument('--requests', type=int, default=256)
+    parser.add_argument('--concurrency', type=int, default=64, help='Requests in flight')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Added to every SQL statement')
+    parser.add_argument('--threads', type=int, default=8, help='Sync worker threads (GUNICORN_THREADS)')
+    parser.add_argument('--pool-size', type=int, default=64, help='Async connections (ASYNC_DATABASE_POOL_SIZE)')
+    parser.add_argument('--tasks', type=int, default=500, help='Tasks seeded for the benchmark user')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchmarkConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            SQLALCHEMY_ENGINE_OPTIONS = {'pool_size': args.threads}
+            ASYNC_DATABASE_POOL_SIZE = args.pool_size
+
+        api = create_async_api(BenchmarkConfig)
+        flask_app = api.flask_app
+        headers = seed(flask_app, args.tasks)
+        path = ENDPOINTS[args.endpoint]
+
+        with flask_app.app_context():
+            add_latency(db.engine, args.latency_ms / 1000)
+        add_latency(api.engine.sync_engine, args.latency_ms / 1000)
+
+        print(
+            f'{args.endpoint}: {args.requests} requests, {args.concurrency} in flight, '
+            f'+{args.latency_ms:g} ms per statement, {args.threads} threads vs {args.pool_size} connections'
+        )
+        summarize('sync', *run_sync(flask_app, path, headers, args))
+        summarize('async', *asyncio.run(run_async(api, path, headers, args)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Measure worker cold start: import time of ``src.main`` and ``create_app()``.
+
+Each measurement runs in a fresh interpreter, the way a worker or a test
+session starts. Run from ``backend/``::
+
+    python benchmarks/startup.py --runs 5 --budget-ms 1500
+
+Exits non-zero when the median cold start exceeds ``--budget-ms``, so it
+can gate CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+from src.main import create_app
+from src.config import Config, TestingConfig
+imported = time.perf_counter()
+app = create_app(TestingConfig if sys.argv[1] == 'testing' else Config)
+created = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'modules': len(sys.modules),
+}))
+'''
+
+def run_probe(profile):
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, profile],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def slowest_imports(limit):
+    """Return the modules with the largest self import time"""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import src.main'],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stderr
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        entries.append((int(self_us), name.strip()))
+    return sorted(entries, reverse=True)[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--profile', choices=['production', 'testing'], default='production')
+    parser.add_argument('--budget-ms', type=float, default=None)
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    results = [run_probe(args.profile) for _ in range(args.runs)]
+    import_ms = statistics.median(r['import_ms'] for r in results)
+    create_ms = statistics.median(r['create_app_ms'] for r in results)
+    total_ms = import_ms + create_ms
+
+    print(f'profile:        {args.profile} ({args.runs} runs, median)')
+    print(f'import src.main {import_ms:8.1f} ms')
+    print(f'create_app()    {create_ms:8.1f} ms')
+    print(f'cold start      {total_ms:8.1f} ms')
+    print(f'modules loaded  {results[-1]["modules"]}')
+    print('\nslowest imports (self time):')
+    for self_us, name in slowest_imports(args.top):
+        print(f'  {self_us / 1000:8.1f} ms  {name}')
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f'\ncold start {total_ms:.1f} ms exceeds budget of {args.budget_ms:.1f} ms')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
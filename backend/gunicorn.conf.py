@@ -0,0 +1,75 @@
+import os
+
+from dotenv import load_dotenv
+
+# So .env can set the GUNICORN_* and connection limits below too
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Socket.IO keeps per-client state in the worker, so more than one worker
+# needs sticky sessions and a message queue in front of it
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+# Socket.IO clients and SSE streams stay connected. A gevent worker serves
+# each connection in a greenlet, up to worker_connections at once; a gthread
+# worker ties up one of its threads per connection
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+if worker_class == 'gthread':
+    # Thread workers need Socket.IO in threading mode rather than eventlet,
+    # which it would otherwise pick up because it is installed
+    os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'threading')
+    capacity = threads
+elif worker_class == 'gevent':
+    # The app is preloaded below, so the standard library must be patched
+    # before the master imports it rather than when each worker starts
+    from gevent import monkey
+    monkey.patch_all()
+    os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'gevent')
+    capacity = worker_connections
+else:
+    raise RuntimeError(f'GUNICORN_WORKER_CLASS must be gevent or gthread, not {worker_class}')
+
+# Import the code and build the app once in the master, then fork warm workers
+preload_app = True
+
+# A quarter of each worker's connections for SSE streams and a quarter for
+# Socket.IO clients, so realtime clients never hold more than half of them
+os.environ.setdefault('SSE_MAX_STREAMS', str(max(capacity // 4, 1)))
+os.environ.setdefault('SOCKETIO_MAX_CLIENTS', str(max(capacity // 4, 1)))
+realtime = [int(os.environ['SSE_MAX_STREAMS']), int(os.environ['SOCKETIO_MAX_CLIENTS'])]
+if 0 in realtime or sum(realtime) >= capacity:
+    raise RuntimeError(
+        f'SSE_MAX_STREAMS + SOCKETIO_MAX_CLIENTS must be set and below the {capacity} '
+        f'connections a {worker_class} worker serves at once, or API requests would queue '
+        'behind realtime clients'
+    )
+
+# Requests past what a worker can run at once wait in gunicorn's queue and
+# never reach the load shedding check, so shed at what the realtime clients
+# leave, less one thread or greenlet to answer the 503s
+requests = capacity - sum(realtime)
+os.environ.setdefault('MAX_CONCURRENT_REQUESTS', str(max(requests - 1, 1)))
+if not 0 <= int(os.environ['MAX_CONCURRENT_REQUESTS']) < requests:
+    raise RuntimeError(
+        f'MAX_CONCURRENT_REQUESTS must be below the {requests} requests a {worker_class} '
+        'worker runs at once next to its realtime clients, or load is never shed (0 turns it off)'
+    )
+
+def post_fork(server, worker):
+    # Never share database connections opened before the fork with a worker
+    from src.models.user import db
+    from src.wsgi import app
+    
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+def post_worker_init(worker):
+    if worker_class == 'gevent':
+        # psycopg2 blocks the whole worker while waiting on the server unless
+        # it has a wait callback; wait_select uses gevent's patched select()
+        import psycopg2.extensions
+        import psycopg2.extras
+        psycopg2.extensions.set_wait_callback(psycopg2.extras.wait_select)
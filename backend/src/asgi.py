@@ -0,0 +1,4 @@
+"""ASGI entry point for the read-only async API: ``uvicorn src.asgi:app``"""
+from src.async_api import create_async_api
+
+app = create_async_api()
@@ -0,0 +1,264 @@
+"""Read-only task API on SQLAlchemy's asyncio engine.
+
+Served as its own ASGI application (``uvicorn src.asgi:app``) next to the
+Flask workers, normally behind the same proxy under ``ASYNC_API_PREFIX``.
+A slow list or stats query only parks a coroutine here instead of holding
+a worker thread, so one process can wait on many queries at once, up to
+``ASYNC_DATABASE_POOL_SIZE`` connections.
+
+It uses the same models, query helpers and JWT settings as the Flask app,
+so an access token works on both. It never writes.
+"""
+import json
+import re
+from datetime import datetime
+from functools import partial
+from urllib.parse import parse_qsl
+
+from flask_jwt_extended import decode_token
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload
+
+from src.models.task import Task, db
+from src.models.task_archive import TaskArchive
+from src.routes.dashboard import archive_counts_query, fold_task_stats, task_stats_query
+from src.routes.tasks import task_list_statement
+from src.services.labels import group_labels, label_counts, task_labels_query, with_labels
+from src.services.normalize import normalized_tasks, referenced_user_ids, user_map, users_query, wants_normalized
+
+# asyncio driver for each sync backend, used when ASYNC_DATABASE_URL is unset
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+def async_database_url(url):
+    """The asyncio-driver equivalent of a sync database URL"""
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f'No asyncio driver known for {url.drivername!r}; set ASYNC_DATABASE_URL')
+    return url.set(drivername=driver)
+
+def _flag(args, name, default='false'):
+    return args.get(name, default).lower() == 'true'
+
+def _with_users(model):
+    return (joinedload(model.assignee), joinedload(model.creator))
+
+async def _task_labels(session, task_ids):
+    return group_labels(await session.execute(task_labels_query(task_ids)))
+
+async def _task_list_body(session, tasks, args, labels):
+    """Tasks with their labels and nested users, or with a ``users`` map for ``?normalize=true``"""
+    if not wants_normalized(args):
+        body = {'tasks': [task.to_dict() for task in tasks]}
+    else:
+        users = {}
+        user_ids = referenced_user_ids(tasks)
+        if user_ids:
+            users = user_map((await session.execute(users_query(user_ids))).scalars())
+        body = normalized_tasks(tasks, users)
+    with_labels(body['tasks'], labels)
+    return body
+
+async def list_tasks(session, user_id, args):
+    """Same filters and ordering as ``GET /api/tasks/``"""
+    models = [Task, TaskArchive] if _flag(args, 'include_archived') else [Task]
+    normalize = wants_normalized(args)
+    tasks = []
+    labels = {}
+    for model in models:
+        try:
+            query = task_list_statement(model, user_id, args, with_users=not normalize)
+            labels_query = task_list_statement(model, user_id, args, labels=True)
+        except ValueError as e:
+            return 400, {'error': str(e)}, []
+        
+        tasks.extend((await session.execute(query)).scalars())
+        labels.update(group_labels(await session.execute(labels_query)))
+    
+    if len(models) > 1:
+        tasks.sort(key=lambda task: task.created_at, reverse=True)
+    
+    body = await _task_list_body(session, tasks, args, labels)
+    return 200, {**body, 'label_counts': label_counts(labels), 'count': len(tasks)}, []
+
+async def get_task(session, user_id, args, task_id):
+    """Same access rules as ``GET /api/tasks/<id>``, with the version as ETag"""
+    task = await session.get(Task, int(task_id), options=_with_users(Task))
+    if not task and _flag(args, 'include_archived'):
+        task = await session.get(TaskArchive, int(task_id), options=_with_users(TaskArchive))
+    if not task:
+        return 404, {'error': 'Task not found'}, []
+    
+    if task.assigned_to != user_id and task.created_by != user_id:
+        return 403, {'error': 'Access denied'}, []
+    
+    task_dict, = with_labels([task.to_dict()], await _task_labels(session, [task.id]))
+    return 200, {'task': task_dict}, [(b'etag', f'"{task.version}"'.encode())]
+
+async def task_stats(session, user_id, args):
+    """Same payload as ``GET /api/tasks/stats``, from one grouped query"""
+    rows = (await session.execute(task_stats_query(user_id, datetime.utcnow()))).all()
+    archive_counts = None
+    if _flag(args, 'include_archived', 'true'):
+        archive_counts = (await session.execute(archive_counts_query(user_id))).scalars()
+    
+    stats, _ = fold_task_stats(rows, archive_counts)
+    return 200, stats, []
+
+async def task_changes(session, user_id, args, page_size):
+    """Live tasks visible to the user changed since a cursor, oldest first.
+    
+    The cursor is ``since`` (ISO timestamp) and ``after_id`` from the
+    previous page's ``next``, so tasks sharing an ``updated_at`` are neither
+    skipped nor repeated. Deleted and archived tasks are not reported.
+    """
+    criteria = [(Task.assigned_to == user_id) | (Task.created_by == user_id)]
+    if args.get('since'):
+        try:
+            since = datetime.fromisoformat(args['since'])
+            after_id = int(args.get('after_id', 0))
+        except ValueError:
+            return 400, {'error': 'since must be an ISO timestamp and after_id an integer'}, []
+        criteria.append(db.or_(
+            Task.updated_at > since,
+            db.and_(Task.updated_at == since, Task.id > after_id)
+        ))
+    
+    result = await session.execute(
+        db.select(Task)
+        .options(*(() if wants_normalized(args) else _with_users(Task)))
+        .where(*criteria)
+        .order_by(Task.updated_at, Task.id)
+        .limit(page_size + 1)
+    )
+    tasks = list(result.scalars())
+    has_more = len(tasks) > page_size
+    tasks = tasks[:page_size]
+    
+    next_cursor = None
+    if tasks:
+        next_cursor = {'since': tasks[-1].updated_at.isoformat(), 'after_id': tasks[-1].id}
+    labels = await _task_labels(session, [task.id for task in tasks])
+    return 200, {
+        **await _task_list_body(session, tasks, args, labels),
+        'count': len(tasks),
+        'has_more': has_more,
+        'next': next_cursor
+    }, []
+
+class AsyncReadAPI:
+    """Minimal ASGI application serving the read-only task endpoints"""
+    
+    def __init__(self, flask_app, engine):
+        self.flask_app = flask_app
+        self.engine = engine
+        self.prefix = flask_app.config['ASYNC_API_PREFIX'].rstrip('/')
+        self.session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        page_size = flask_app.config['ASYNC_CHANGES_PAGE_SIZE']
+        self.routes = [
+            (re.compile(r'/tasks/?'), list_tasks),
+            (re.compile(r'/tasks/stats'), task_stats),
+            (re.compile(r'/tasks/changes'), partial(task_changes, page_size=page_size)),
+            (re.compile(r'/tasks/(?P<task_id>\d+)'), get_task),
+        ]
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        
+        status, payload, headers = await self.dispatch(scope)
+        body = json.dumps(payload).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                *headers
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+    
+    async def dispatch(self, scope):
+        """Route one request; returns ``(status, payload, extra headers)``"""
+        path = scope['path']
+        if not path.startswith(self.prefix):
+            return 404, {'error': 'Not found'}, []
+        for pattern, handler in self.routes:
+            match = pattern.fullmatch(path[len(self.prefix):])
+            if match:
+                break
+        else:
+            return 404, {'error': 'Not found'}, []
+        
+        if scope['method'] != 'GET':
+            return 405, {'error': 'This API is read-only'}, [(b'allow', b'GET')]
+        
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        user_id, error = self.authenticate(headers)
+        if error:
+            return 401, {'msg': error}, []
+        
+        args = dict(parse_qsl(scope.get('query_string', b'').decode()))
+        try:
+            async with self.session_factory() as session:
+                return await handler(session, user_id, args, **match.groupdict())
+        except Exception as e:
+            return 500, {'error': str(e)}, []
+    
+    def authenticate(self, headers):
+        """Validate the access token the way ``@jwt_required()`` does; returns ``(user_id, error)``"""
+        config = self.flask_app.config
+        header_name, header_type = config['JWT_HEADER_NAME'], config['JWT_HEADER_TYPE']
+        header = headers.get(header_name.lower())
+        if not header:
+            return None, f'Missing {header_name} Header'
+        
+        parts = header.split()
+        if header_type and (len(parts) != 2 or parts[0] != header_type):
+            return None, f"Bad {header_name} header. Expected value '{header_type} <JWT>'"
+        
+        try:
+            with self.flask_app.app_context():
+                decoded = decode_token(parts[-1])
+        except Exception as e:
+            return None, str(e)
+        if decoded.get('type') != 'access':
+            return None, 'Only non-refresh tokens are allowed'
+        return decoded[config['JWT_IDENTITY_CLAIM']], None
+    
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+def create_async_api(config=None):
+    """Build the ASGI app; ``config`` is passed to :func:`src.main.create_app`"""
+    # Imported here so the Flask app's modules can import this one
+    from src.main import create_app
+    
+    flask_app = create_app(config)
+    url = flask_app.config['ASYNC_DATABASE_URL']
+    if not url:
+        # Flask-SQLAlchemy has already resolved relative SQLite paths
+        with flask_app.app_context():
+            url = async_database_url(db.engine.url)
+    
+    url = make_url(url)
+    options = {'query_cache_size': flask_app.config['SQL_QUERY_CACHE_SIZE']}
+    if url.get_backend_name() != 'sqlite' or url.database not in (None, '', ':memory:'):
+        options['pool_size'] = flask_app.config['ASYNC_DATABASE_POOL_SIZE']
+    engine = create_async_engine(url, **options)
+    return AsyncReadAPI(flask_app, engine)
@@ -0,0 +1,168 @@
+import os
+from datetime import timedelta
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes')
+
+class Config:
+    """Default configuration, read from the environment"""
+    SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=7)
+    # Identities are integer user ids; PyJWT >= 2.10 rejects non-string subjects by default
+    JWT_VERIFY_SUB = False
+    
+    # Database configuration
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', f"sqlite:///{os.path.join(BASE_DIR, 'database', 'app.db')}")
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Compiled statements kept per engine; /api/metrics/statements shows the hit rate
+    SQL_QUERY_CACHE_SIZE = int(os.getenv('SQL_QUERY_CACHE_SIZE', 500))
+    SQLALCHEMY_ENGINE_OPTIONS = {'query_cache_size': SQL_QUERY_CACHE_SIZE}
+    
+    CORS_ORIGINS = [
+        origin.strip()
+        for origin in os.getenv('CORS_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(',')
+        if origin.strip()
+    ]
+    # Proxies in front of the app whose X-Forwarded-For/-Proto headers are
+    # trusted (1 behind the bundled nginx); 0 uses the socket's peer address
+    PROXY_FIX_HOPS = int(os.getenv('PROXY_FIX_HOPS', 0))
+    
+    # None lets Flask-SocketIO pick eventlet/gevent when installed
+    SOCKETIO_ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE') or None
+    # Socket.IO clients per worker before new connections are refused (0 = unlimited);
+    # gunicorn.conf.py sets it from the worker's connections
+    SOCKETIO_MAX_CLIENTS = int(os.getenv('SOCKETIO_MAX_CLIENTS', 0))
+    
+    # Optional subsystems, only imported and registered when enabled
+    ENABLE_API_DOCS = _env_bool('ENABLE_API_DOCS', True)
+    SERVE_FRONTEND = _env_bool('SERVE_FRONTEND', True)
+    
+    # Health probes: /api/health/ready answers 503 while a check is over its budget,
+    # and reuses its result for HEALTH_CACHE_SECONDS
+    HEALTH_DB_LATENCY_MS = float(os.getenv('HEALTH_DB_LATENCY_MS', 250))
+    HEALTH_MAX_QUEUE_DEPTH = int(os.getenv('HEALTH_MAX_QUEUE_DEPTH', 1000))
+    HEALTH_CACHE_SECONDS = float(os.getenv('HEALTH_CACHE_SECONDS', 2))
+    
+    # Admission control: token buckets keyed by JWT identity or IP
+    RATE_LIMIT_ENABLED = _env_bool('RATE_LIMIT_ENABLED', True)
+    RATE_LIMIT_PER_SECOND = float(os.getenv('RATE_LIMIT_PER_SECOND', 10))
+    RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', 60))
+    RATE_LIMIT_DEFAULT_COST = 1
+    RATE_LIMIT_COSTS = {
+        'tasks.get_tasks': 3,
+        'tasks.get_task_stats': 5,
+        'tasks.export_tasks': 20,
+        'tasks.import_tasks': 20,
+        'user.get_users': 3,
+    }
+    RATE_LIMIT_EXEMPT = {'health_check', 'health.liveness', 'health.readiness'}
+    # e.g. redis://localhost:6379/0 to share buckets between workers
+    RATE_LIMIT_STORAGE_URL = os.getenv('RATE_LIMIT_STORAGE_URL') or None
+    # Requests in flight per worker before new ones are shed with 503 (0 = unlimited).
+    # gunicorn.conf.py sets it below the worker's threads or connections, as
+    # requests beyond those queue in gunicorn and never reach the check
+    MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', 64))
+    
+    # Socket.IO presence; e.g. redis://localhost:6379/0 to share it between workers
+    PRESENCE_STORAGE_URL = os.getenv('PRESENCE_STORAGE_URL') or None
+    # Events kept per offline user until they reconnect (0 = drop them)
+    PRESENCE_QUEUE_LIMIT = int(os.getenv('PRESENCE_QUEUE_LIMIT', 50))
+    PRESENCE_QUEUE_TTL = int(os.getenv('PRESENCE_QUEUE_TTL', 86400))
+    # With Redis, a worker that stops heartbeating for this many seconds is
+    # taken for dead and its users' connections are no longer counted
+    PRESENCE_HEARTBEAT_TTL = int(os.getenv('PRESENCE_HEARTBEAT_TTL', 60))
+    PRESENCE_MAX_IDS = 200
+    
+    # Server-Sent Events (/api/tasks/stream). Each open stream holds one of the
+    # worker's connections (a thread under gthread); gunicorn.conf.py sets
+    # SSE_MAX_STREAMS from the worker's connections
+    SSE_MAX_STREAMS = int(os.getenv('SSE_MAX_STREAMS', 4))
+    SSE_HEARTBEAT_SECONDS = int(os.getenv('SSE_HEARTBEAT_SECONDS', 15))
+    # Streams are closed after this long and the browser reconnects
+    SSE_MAX_STREAM_SECONDS = int(os.getenv('SSE_MAX_STREAM_SECONDS', 300))
+    SSE_RETRY_MS = 3000
+    # Events buffered per stream before a slow consumer is dropped
+    SSE_SUBSCRIBER_BUFFER = 100
+    # Events kept per user for Last-Event-ID resume, for this many users
+    SSE_REPLAY_LIMIT = 100
+    SSE_HISTORY_USERS = 10000
+    
+    # User directory
+    USER_PAGE_SIZE = int(os.getenv('USER_PAGE_SIZE', 50))
+    USER_SEARCH_LIMIT = int(os.getenv('USER_SEARCH_LIMIT', 10))
+    USER_SEARCH_CACHE_TTL = int(os.getenv('USER_SEARCH_CACHE_TTL', 30))
+    
+    # Dashboard
+    DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 30))
+    DASHBOARD_RECENT_LIMIT = 5
+    DASHBOARD_DUE_SOON_DAYS = 7
+    DASHBOARD_DUE_SOON_LIMIT = 5
+    
+    # Read-only asyncio API (src.asgi). The URL defaults to SQLALCHEMY_DATABASE_URI
+    # with its asyncio driver, e.g. sqlite+aiosqlite or postgresql+asyncpg
+    ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL') or None
+    ASYNC_DATABASE_POOL_SIZE = int(os.getenv('ASYNC_DATABASE_POOL_SIZE', 20))
+    ASYNC_API_PREFIX = '/api/async'
+    ASYNC_CHANGES_PAGE_SIZE = 100
+    
+    # Group commit: concurrent task creates/updates arriving within the window
+    # are committed in one transaction. Worth it on SQLite, where every commit
+    # is a synced write and writers take turns on the database lock
+    GROUP_COMMIT_ENABLED = _env_bool('GROUP_COMMIT_ENABLED', False)
+    GROUP_COMMIT_WINDOW_MS = float(os.getenv('GROUP_COMMIT_WINDOW_MS', 2))
+    GROUP_COMMIT_MAX_BATCH = int(os.getenv('GROUP_COMMIT_MAX_BATCH', 64))
+    
+    # Task history (/api/tasks/<id>/history). Events are buffered per worker
+    # and inserted in batches at least every TASK_HISTORY_FLUSH_INTERVAL_MS;
+    # 0 writes each event in the transaction of the change instead
+    TASK_HISTORY_ENABLED = _env_bool('TASK_HISTORY_ENABLED', True)
+    TASK_HISTORY_FLUSH_INTERVAL_MS = float(os.getenv('TASK_HISTORY_FLUSH_INTERVAL_MS', 500))
+    TASK_HISTORY_BATCH_SIZE = int(os.getenv('TASK_HISTORY_BATCH_SIZE', 500))
+    TASK_HISTORY_MAX_PENDING = int(os.getenv('TASK_HISTORY_MAX_PENDING', 10000))
+    TASK_HISTORY_PAGE_SIZE = 50
+    # `flask history compact` merges older runs of updates into one event and
+    # `flask history purge` deletes events past the retention (0 = keep all)
+    TASK_HISTORY_COMPACT_AFTER_DAYS = int(os.getenv('TASK_HISTORY_COMPACT_AFTER_DAYS', 30))
+    TASK_HISTORY_RETENTION_DAYS = int(os.getenv('TASK_HISTORY_RETENTION_DAYS', 365))
+    
+    # Analytics date ranges, in days
+    ANALYTICS_DEFAULT_DAYS = 30
+    ANALYTICS_MAX_DAYS = 366
+    
+    # Archiving of completed/cancelled tasks
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 30))
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 500))
+    
+    # Profiling. Tokens for the X-Profile-Token header and the admin endpoints
+    # come from `flask profiler token`; request_rate and the sampler start at
+    # these values and can be changed at runtime through /api/admin/profiler
+    PROFILER_ENABLED = _env_bool('PROFILER_ENABLED', False)
+    PROFILER_DIR = os.getenv('PROFILER_DIR', os.path.join(BASE_DIR, 'database', 'profiles'))
+    PROFILER_KEEP = int(os.getenv('PROFILER_KEEP', 50))
+    PROFILER_REQUEST_RATE = float(os.getenv('PROFILER_REQUEST_RATE', 0))
+    PROFILER_SAMPLER = _env_bool('PROFILER_SAMPLER', False)
+    PROFILER_SAMPLE_INTERVAL_MS = int(os.getenv('PROFILER_SAMPLE_INTERVAL_MS', 10))
+    PROFILER_TOKEN_MAX_AGE = 3600
+    
+    # Incremental backups
+    BACKUP_DIR = os.getenv('BACKUP_DIR', os.path.join(BASE_DIR, 'database', 'backups'))
+    BACKUP_KEEP_LAST = int(os.getenv('BACKUP_KEEP_LAST', 7))
+    BACKUP_KEEP_DAILY = int(os.getenv('BACKUP_KEEP_DAILY', 30))
+
+class TestingConfig(Config):
+    """Configuration for the test suite: in-memory database, no optional subsystems"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    JWT_SECRET_KEY = 'test-secret-key'
+    RATE_LIMIT_ENABLED = False
+    TASK_HISTORY_ENABLED = False
+    ENABLE_API_DOCS = False
+    SERVE_FRONTEND = False
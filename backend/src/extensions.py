@@ -0,0 +1,25 @@
+from flask_cors import CORS
+from flask_jwt_extended import JWTManager
+from flask_socketio import SocketIO
+from src.services.broadcaster import ChangeBroadcaster
+from src.services.group_commit import GroupCommitter
+from src.services.health import HealthProbe
+from src.services.presence import Presence
+from src.services.profiler import Profiler
+from src.services.rate_limit import RateLimiter
+from src.services.statement_cache import StatementCacheStats
+from src.services.task_history import TaskHistory
+
+# Created unbound here and attached to an app in create_app(), so that
+# modules can import them without building an application
+cors = CORS()
+jwt = JWTManager()
+socketio = SocketIO()
+limiter = RateLimiter()
+presence = Presence()
+broadcaster = ChangeBroadcaster()
+profiler = Profiler()
+group_commit = GroupCommitter()
+task_history = TaskHistory()
+statement_cache = StatementCacheStats()
+health = HealthProbe()
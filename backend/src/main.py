@@ -1,123 +1,156 @@
 import os
 import sys
-from datetime import timedelta
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory
-from flask_cors import CORS
-from flask_jwt_extended import JWTManager
-from flask_socketio import SocketIO
-from flask_swagger_ui import get_swaggerui_blueprint
-from dotenv import load_dotenv
+from werkzeug.middleware.proxy_fix import ProxyFix
 
-from src.models.user import db
+from src.config import Config
+from src.extensions import (
+    broadcaster, cors, group_commit, health, jwt, limiter, presence, profiler, socketio, statement_cache,
+    task_history
+)
+from src.models.base import db
 from src.models.task import Task  # Import to ensure table creation
+from src.models.task_archive import TaskArchive, TaskArchiveCount
+from src.models.task_stats import TaskDailyStats
+from src.models.task_tree import TaskClosure
+from src.models.label import Label, TaskLabel
+from src.models.task_event import TaskEvent
 from src.routes.user import user_bp
 from src.routes.auth import auth_bp
 from src.routes.tasks import tasks_bp
-
-# Load environment variables
-load_dotenv()
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-
-# Configuration
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
-
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}")
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Initialize extensions
-CORS(app, origins=os.getenv('CORS_ORIGINS', "http://localhost:3000,http://127.0.0.1:3000" ).split(','))
-jwt = JWTManager(app)
-socketio = SocketIO(app, cors_allowed_origins=["http://localhost:3000", "http://127.0.0.1:3000"])
-
-# Initialize database
-db.init_app(app)
-
-# Register blueprints
-app.register_blueprint(user_bp, url_prefix='/api/users')
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(tasks_bp, url_prefix='/api/tasks')
-
-# Swagger UI configuration
-SWAGGER_URL = '/api/docs'
-API_URL = '/api/swagger.yaml'
-
-swaggerui_blueprint = get_swaggerui_blueprint(
-    SWAGGER_URL,
-    API_URL,
-    config={
-        'app_name': "Task Management API"
-    }
-)
-app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
-
-# Serve swagger.yaml
-@app.route('/api/swagger.yaml')
-def swagger_yaml():
-    return send_from_directory(os.path.dirname(__file__), 'swagger.yaml')
-
-# Socket.IO events
-from src.routes.socket_events import authenticate_socket_user
-
-@socketio.on('connect')
-def handle_connect(auth):
-    print('Client connected')
+from src.routes.presence import presence_bp
+from src.routes.metrics import metrics_bp
+from src.routes.dashboard import dashboard_bp
+from src.routes.profiler import profiler_bp
+from src.routes.health import health_bp
+from src.routes import socket_events  # Registers the Socket.IO handlers
+from src.services.archive import archive_tasks_command
+from src.services.backup import backup_cli
+from src.services.profiler import profiler_cli
+from src.services.rollups import rollups_cli
+from src.services.seed import seed_command
+from src.services.task_history import history_cli
+from src.services.socket_payloads import MeteredPacket
+from src.services.task_transfer import tasks_cli
+
+def create_app(config=None):
+    """Build an application instance.
     
-    # Authenticate user if token provided
-    if auth and 'token' in auth:
-        user = authenticate_socket_user(auth['token'])
-        if user:
-            print(f'User {user.username} authenticated via socket')
-        else:
-            print('Socket authentication failed')
-
-@socketio.on('disconnect')
-def handle_disconnect():
-    print('Client disconnected')
-
-@socketio.on('join_room')
-def handle_join_room(data):
-    room = data.get('room')
-    if room:
-        from flask_socketio import join_room
-        join_room(room)
-        print(f'Client joined room: {room}')
-
-@socketio.on('leave_room')
-def handle_leave_room(data):
-    room = data.get('room')
-    if room:
-        from flask_socketio import leave_room
-        leave_room(room)
-        print(f'Client left room: {room}')
-
-# Health check endpoint
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    return {'status': 'healthy', 'message': 'Task Manager API is running'}, 200
-
-# Serve frontend
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
+    ``config`` is a config class/object or a dict of overrides applied on top
+    of :class:`src.config.Config`.
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    
+    # Configuration
+    app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
+    
+    # Initialize extensions
+    cors.init_app(app, origins=app.config['CORS_ORIGINS'])
+    jwt.init_app(app)
+    limiter.init_app(app)
+    presence.init_app(app)
+    broadcaster.init_app(app)
+    profiler.init_app(app)
+    group_commit.init_app(app)
+    task_history.init_app(app)
+    statement_cache.init_app(app)
+    health.init_app(app)
+    socketio.init_app(
+        app,
+        async_mode=app.config['SOCKETIO_ASYNC_MODE'],
+        cors_allowed_origins=app.config['CORS_ORIGINS'],
+        serializer=MeteredPacket
+    )
+    # Outermost, so Socket.IO and the rate limiter see the client's address
+    # rather than the proxy's
+    hops = app.config['PROXY_FIX_HOPS']
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+    
+    # Initialize database
+    db.init_app(app)
+    
+    # Register blueprints
+    app.register_blueprint(user_bp, url_prefix='/api/users')
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(tasks_bp, url_prefix='/api/tasks')
+    app.register_blueprint(presence_bp, url_prefix='/api/presence')
+    app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
+    app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+    app.register_blueprint(profiler_bp, url_prefix='/api/admin/profiler')
+    app.register_blueprint(health_bp, url_prefix='/api/health')
+    
+    # CLI commands
+    app.cli.add_command(archive_tasks_command)
+    app.cli.add_command(backup_cli)
+    app.cli.add_command(tasks_cli)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(profiler_cli)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(history_cli)
+    
+    # Health check endpoint
+    @app.route('/api/health', methods=['GET'])
+    def health_check():
+        return {'status': 'healthy', 'message': 'Task Manager API is running'}, 200
+    
+    if app.config['ENABLE_API_DOCS']:
+        register_api_docs(app)
+    
+    if app.config['SERVE_FRONTEND']:
+        register_frontend(app)
+    
+    return app
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
+def register_api_docs(app):
+    """Serve the Swagger UI and the OpenAPI spec"""
+    # Imported here so that apps without docs (tests, workers behind a
+    # separate docs host) don't pay for it at startup
+    from flask_swagger_ui import get_swaggerui_blueprint
+    
+    # Swagger UI configuration
+    SWAGGER_URL = '/api/docs'
+    API_URL = '/api/swagger.yaml'
+    
+    swaggerui_blueprint = get_swaggerui_blueprint(
+        SWAGGER_URL,
+        API_URL,
+        config={
+            'app_name': "Task Management API"
+        }
+    )
+    app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
+    
+    # Serve swagger.yaml
+    @app.route('/api/swagger.yaml')
+    def swagger_yaml():
+        return send_from_directory(os.path.dirname(__file__), 'swagger.yaml')
+
+def register_frontend(app):
+    """Serve the built frontend from the static folder"""
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        static_folder_path = app.static_folder
+        if static_folder_path is None:
+            return "Static folder not configured", 404
+        
+        if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+            return send_from_directory(static_folder_path, path)
         else:
-            return "index.html not found", 404
+            index_path = os.path.join(static_folder_path, 'index.html')
+            if os.path.exists(index_path):
+                return send_from_directory(static_folder_path, 'index.html')
+            else:
+                return "index.html not found", 404
 
 if __name__ == '__main__':
+    app = create_app()
     socketio.run(app, host='0.0.0.0', port=5000, debug=True)
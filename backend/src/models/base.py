@@ -0,0 +1,6 @@
+from flask_sqlalchemy import SQLAlchemy
+
+# The one SQLAlchemy instance of the application: every model shares its
+# metadata, and every route and service its session and connection pool.
+# src.models.user and src.models.task re-export it for existing imports.
+db = SQLAlchemy()
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from src.models.base import db
+
+class Label(db.Model):
+    """A label that can be put on any number of tasks"""
+    __tablename__ = 'labels'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name
+        }
+    
+    def __repr__(self):
+        return f'<Label {self.name}>'
+
+class TaskLabel(db.Model):
+    """Which labels are on which tasks.
+    
+    The primary key finds a task's labels; the label index is the inverted
+    index, listing the tasks with a label. ``task_id`` has no foreign key
+    because archived tasks keep their id, and their labels, in
+    ``tasks_archive``.
+    """
+    __tablename__ = 'task_labels'
+    __table_args__ = (
+        db.Index('ix_task_labels_label', 'label_id', 'task_id'),
+    )
+    
+    task_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    label_id = db.Column(db.Integer, db.ForeignKey('labels.id'), primary_key=True)
+    
+    def __repr__(self):
+        return f'<TaskLabel task={self.task_id} label={self.label_id}>'
@@ -1,8 +1,7 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from enum import Enum
 
-db = SQLAlchemy()
+from src.models.base import db
 
 class TaskStatus(Enum):
     PENDING = "pending"
@@ -18,6 +17,13 @@ class TaskPriority(Enum):
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Lets the archiver find closed tasks without scanning the whole table
+        db.Index('ix_tasks_status_updated_at', 'status', 'updated_at'),
+        # Never hand out the id of an archived or deleted task again: archived
+        # tasks keep their id, and labels and history are keyed by it
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -27,6 +33,15 @@ class Task(db.Model):
     due_date = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Bumped on every write; clients send it back in If-Match to detect lost updates
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    
+    # Subtasks point at their parent; the full hierarchy lives in ``task_closure``
+    parent_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=True, index=True)
+    # Precomputed over every task below this one, kept current as subtasks are
+    # added, moved, deleted and change status
+    subtask_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    completed_subtask_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     
     # Foreign key to User
     assigned_to = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
@@ -36,8 +51,8 @@ class Task(db.Model):
     assignee = db.relationship('User', foreign_keys=[assigned_to], backref='assigned_tasks')
     creator = db.relationship('User', foreign_keys=[created_by], backref='created_tasks')
     
-    def to_dict(self):
-        return {
+    def to_dict(self, include_users=True):
+        data = {
             'id': self.id,
             'title': self.title,
             'description': self.description,
@@ -46,11 +61,17 @@ class Task(db.Model):
             'due_date': self.due_date.isoformat() if self.due_date else None,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
+            'version': self.version,
+            'parent_id': self.parent_id,
+            'subtask_count': self.subtask_count,
+            'completed_subtask_count': self.completed_subtask_count,
             'assigned_to': self.assigned_to,
-            'created_by': self.created_by,
-            'assignee': self.assignee.to_dict() if self.assignee else None,
-            'creator': self.creator.to_dict() if self.creator else None
+            'created_by': self.created_by
         }
+        if include_users:
+            data['assignee'] = self.assignee.to_dict() if self.assignee else None
+            data['creator'] = self.creator.to_dict() if self.creator else None
+        return data
     
     def __repr__(self):
         return f'<Task {self.id}: {self.title}>'
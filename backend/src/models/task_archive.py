@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from src.models.base import db
+from src.models.task import TaskStatus, TaskPriority
+
+class TaskArchive(db.Model):
+    """Cold storage for closed tasks moved out of ``tasks`` by the archiver"""
+    __tablename__ = 'tasks_archive'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    status = db.Column(db.Enum(TaskStatus), nullable=False)
+    priority = db.Column(db.Enum(TaskPriority), nullable=False)
+    due_date = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    assigned_to = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    
+    assignee = db.relationship('User', foreign_keys=[assigned_to])
+    creator = db.relationship('User', foreign_keys=[created_by])
+    
+    def to_dict(self, include_users=True):
+        data = {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'status': self.status.value if self.status else None,
+            'priority': self.priority.value if self.priority else None,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+            'version': self.version,
+            'archived_at': self.archived_at.isoformat(),
+            'archived': True,
+            'assigned_to': self.assigned_to,
+            'created_by': self.created_by
+        }
+        if include_users:
+            data['assignee'] = self.assignee.to_dict() if self.assignee else None
+            data['creator'] = self.creator.to_dict() if self.creator else None
+        return data
+    
+    def __repr__(self):
+        return f'<TaskArchive {self.id}: {self.title}>'
+
+class TaskArchiveCount(db.Model):
+    """Precomputed per-user counts of archived tasks, used by the stats endpoint"""
+    __tablename__ = 'task_archive_counts'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    status = db.Column(db.Enum(TaskStatus), primary_key=True)
+    priority = db.Column(db.Enum(TaskPriority), primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<TaskArchiveCount user={self.user_id} {self.status.value}/{self.priority.value}: {self.count}>'
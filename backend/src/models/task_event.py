@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from src.models.base import db
+
+class TaskEvent(db.Model):
+    """One entry of the append-only task history.
+    
+    ``id`` is the sequence history pages are read by. ``changes`` maps each
+    field that changed to ``[old, new]`` (``old`` is null on creation and
+    ``new`` on deletion). ``task_id`` and ``user_id`` have no foreign keys,
+    so events outlive deleted and archived tasks and users. Compaction
+    merges runs of old updates into one event; ``merged`` counts the events
+    it stands for.
+    """
+    __tablename__ = 'task_events'
+    __table_args__ = (
+        db.Index('ix_task_events_task_id_id', 'task_id', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False)
+    # The task's created_at, so a task that somehow gets an old id never
+    # sees the events of the task that had it before
+    task_created_at = db.Column(db.DateTime, nullable=False)
+    # The task's version after the change
+    version = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(16), nullable=False)
+    changes = db.Column(db.JSON, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    merged = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    
+    def to_dict(self):
+        return {
+            'sequence': self.id,
+            'task_id': self.task_id,
+            'version': self.version,
+            'action': self.action,
+            'changes': self.changes,
+            'user_id': self.user_id,
+            'created_at': self.created_at.isoformat(),
+            'merged': self.merged
+        }
+    
+    def __repr__(self):
+        return f'<TaskEvent {self.id}: task {self.task_id} {self.action}>'
@@ -0,0 +1,26 @@
+from src.models.base import db
+from src.models.task import TaskStatus
+
+class TaskDailyStats(db.Model):
+    """Per-user, per-day status transition counts behind the analytics endpoint.
+    
+    A task counts for its creator and, if different, its assignee. Every
+    change of status (or of who the task belongs to) adds one to ``exited``
+    for the old status and one to ``entered`` for the new one, so the number
+    of a user's tasks in a status on any day is the running sum of
+    ``entered - exited``.
+    """
+    __tablename__ = 'task_daily_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.Enum(TaskStatus), primary_key=True)
+    # Tasks created that day with this as their first status
+    created = db.Column(db.Integer, default=0, nullable=False)
+    entered = db.Column(db.Integer, default=0, nullable=False)
+    exited = db.Column(db.Integer, default=0, nullable=False)
+    # Sum of created-to-completed durations of tasks entering COMPLETED that day
+    completion_seconds = db.Column(db.BigInteger, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<TaskDailyStats user={self.user_id} {self.day} {self.status.value}>'
@@ -0,0 +1,21 @@
+from src.models.base import db
+
+class TaskClosure(db.Model):
+    """Every ancestor/descendant pair of the task hierarchy, with the distance between them.
+    
+    A task has one row per task above it (its parent at depth 1, the parent's
+    parent at depth 2, ...) and none for itself, so tasks outside any hierarchy
+    have no rows at all. The primary key serves subtree lookups by ancestor,
+    the descendant index serves ancestor lookups.
+    """
+    __tablename__ = 'task_closure'
+    __table_args__ = (
+        db.Index('ix_task_closure_descendant', 'descendant_id', 'ancestor_id'),
+    )
+    
+    ancestor_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), primary_key=True)
+    descendant_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), primary_key=True)
+    depth = db.Column(db.Integer, nullable=False)
+    
+    def __repr__(self):
+        return f'<TaskClosure {self.ancestor_id} -> {self.descendant_id} ({self.depth})>'
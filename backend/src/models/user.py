@@ -1,8 +1,7 @@
-from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
-db = SQLAlchemy()
+from src.models.base import db
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -39,3 +38,18 @@ class User(db.Model):
     
     def __repr__(self):
         return f'<User {self.username}>'
+
+def _lower_prefix_index(field):
+    # On PostgreSQL, text_pattern_ops serves LIKE 'prefix%' whatever the
+    # database's collation
+    return db.Index(
+        f'ix_users_{field}_lower',
+        db.func.lower(getattr(User, field)).label(f'{field}_lower'),
+        postgresql_ops={f'{field}_lower': 'text_pattern_ops'}
+    )
+
+# Case-insensitive prefix indexes backing the user typeahead
+_lower_prefix_index('username')
+_lower_prefix_index('email')
+_lower_prefix_index('first_name')
+_lower_prefix_index('last_name')
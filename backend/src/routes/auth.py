@@ -1,11 +1,10 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from flask_cors import CORS
 from src.models.user import User, db
+from src.routes.user import user_search_cache
 from datetime import timedelta
 
 auth_bp = Blueprint('auth', __name__)
-CORS(auth_bp)
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -37,6 +36,7 @@ def register():
         
         db.session.add(user)
         db.session.commit()
+        user_search_cache.clear()
         
         # Create access token
         access_token = create_access_token(
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import joinedload
+from src.models.task import Task, TaskStatus, db
+from src.models.task_archive import TaskArchiveCount
+from src.services.cache import TTLCache
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+# Composite dashboard payloads by user id; entries are dropped when a task
+# involving the user changes. The cache is per process, so other workers
+# may serve a result up to DASHBOARD_CACHE_TTL seconds old.
+dashboard_cache = TTLCache(maxsize=4096)
+
+def invalidate_dashboards(*user_ids):
+    """Forget cached dashboards for the given users (None ids are ignored)"""
+    for user_id in set(user_ids):
+        if user_id is not None:
+            dashboard_cache.delete(user_id)
+
+def task_stats_query(user_id, now):
+    """Cached SELECT of the status/priority/overdue/assigned counts of the user's live tasks, grouped"""
+    return db.lambda_stmt(lambda: (
+        db.select(
+            Task.status,
+            Task.priority,
+            db.func.count(),
+            db.func.sum(db.case((db.and_(Task.due_date < now, Task.status != TaskStatus.COMPLETED), 1), else_=0)),
+            db.func.sum(db.case((Task.assigned_to == user_id, 1), else_=0))
+        )
+        .where((Task.assigned_to == user_id) | (Task.created_by == user_id))
+        .group_by(Task.status, Task.priority)
+    ))
+
+def archive_counts_query(user_id):
+    """Cached SELECT of the user's TaskArchiveCount rows"""
+    return db.lambda_stmt(lambda: db.select(TaskArchiveCount).where(TaskArchiveCount.user_id == user_id))
+
+def fold_task_stats(rows, archive_counts):
+    """Stats payload and assigned-to-me count from :func:`task_stats_query` rows.
+    
+    ``archive_counts`` are the user's TaskArchiveCount rows, or None to leave
+    archived tasks out.
+    """
+    stats = {'total_tasks': 0, 'status_counts': {}, 'priority_counts': {}, 'overdue_tasks': 0}
+    assigned_to_me = 0
+    for status, priority, count, overdue, assigned in rows:
+        stats['total_tasks'] += count
+        stats['status_counts'][status.value] = stats['status_counts'].get(status.value, 0) + count
+        stats['priority_counts'][priority.value] = stats['priority_counts'].get(priority.value, 0) + count
+        stats['overdue_tasks'] += overdue or 0
+        assigned_to_me += assigned or 0
+    
+    if archive_counts is None:
+        return stats, assigned_to_me
+    
+    # Archived tasks are closed, so they only add to the totals
+    archived_tasks = 0
+    for archive_count in archive_counts:
+        archived_tasks += archive_count.count
+        status_key = archive_count.status.value
+        stats['status_counts'][status_key] = stats['status_counts'].get(status_key, 0) + archive_count.count
+        priority_key = archive_count.priority.value
+        stats['priority_counts'][priority_key] = stats['priority_counts'].get(priority_key, 0) + archive_count.count
+    stats['total_tasks'] += archived_tasks
+    stats['archived_tasks'] = archived_tasks
+    
+    return stats, assigned_to_me
+
+def _task_stats(user_id, now):
+    """Status/priority/overdue/assigned counts in one grouped query"""
+    rows = db.session.execute(task_stats_query(user_id, now)).all()
+    return fold_task_stats(rows, db.session.execute(archive_counts_query(user_id)).scalars())
+
+def _task_list(user_id, *criteria, order_by, limit):
+    """Tasks visible to the user, with assignee and creator joined in"""
+    query = (
+        db.select(Task)
+        .options(joinedload(Task.assignee), joinedload(Task.creator))
+        .where((Task.assigned_to == user_id) | (Task.created_by == user_id), *criteria)
+        .order_by(order_by)
+        .limit(limit)
+    )
+    return [task.to_dict() for task in db.session.execute(query).scalars()]
+
+def build_dashboard(user_id):
+    """Everything the dashboard page shows, in four queries"""
+    config = current_app.config
+    now = datetime.utcnow()
+    
+    stats, assigned_to_me = _task_stats(user_id, now)
+    recent_tasks = _task_list(
+        user_id, order_by=Task.created_at.desc(), limit=config['DASHBOARD_RECENT_LIMIT']
+    )
+    due_soon = _task_list(
+        user_id,
+        Task.due_date >= now,
+        Task.due_date < now + timedelta(days=config['DASHBOARD_DUE_SOON_DAYS']),
+        Task.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS]),
+        order_by=Task.due_date,
+        limit=config['DASHBOARD_DUE_SOON_LIMIT']
+    )
+    
+    return {
+        'stats': stats,
+        'assigned_to_me': assigned_to_me,
+        'recent_tasks': recent_tasks,
+        'due_soon': due_soon,
+        'generated_at': now.isoformat()
+    }
+
+@dashboard_bp.route('/', methods=['GET'])
+@jwt_required()
+def get_dashboard():
+    """Get stats, recent tasks and tasks due soon for the current user"""
+    try:
+        current_user_id = get_jwt_identity()
+        
+        dashboard = dashboard_cache.get(current_user_id)
+        if dashboard is None:
+            dashboard = build_dashboard(current_user_id)
+            dashboard_cache.set(current_user_id, dashboard, ttl=current_app.config['DASHBOARD_CACHE_TTL'])
+        
+        return jsonify(dashboard), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,19 @@
+from flask import Blueprint, jsonify
+from src.extensions import health
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/live', methods=['GET'])
+def liveness():
+    """Liveness probe: the worker answers requests"""
+    return jsonify(health.liveness()), 200
+
+@health_bp.route('/ready', methods=['GET'])
+def readiness():
+    """Readiness probe: 503 while the database, pool, queues or Socket.IO are unhealthy"""
+    try:
+        ready, report = health.readiness()
+        return jsonify(report), 200 if ready else 503
+    
+    except Exception as e:
+        return jsonify({'status': 'not_ready', 'error': str(e)}), 503
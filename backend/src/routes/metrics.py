@@ -0,0 +1,62 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from src.extensions import broadcaster, group_commit, statement_cache, task_history
+from src.models.user import db
+from src.services.socket_payloads import payload_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/socket', methods=['GET'])
+@jwt_required()
+def get_socket_metrics():
+    """Get counts and encoded sizes of Socket.IO events sent by this worker"""
+    try:
+        events = payload_metrics.snapshot()
+        return jsonify({
+            'events': events,
+            'total_events': sum(event['count'] for event in events),
+            'total_bytes': sum(event['bytes'] for event in events)
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@metrics_bp.route('/stream', methods=['GET'])
+@jwt_required()
+def get_stream_metrics():
+    """Get open Server-Sent Event streams and dropped slow consumers of this worker"""
+    try:
+        return jsonify(broadcaster.snapshot()), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@metrics_bp.route('/writes', methods=['GET'])
+@jwt_required()
+def get_write_metrics():
+    """Get how many task writes this worker committed in how many group commits"""
+    try:
+        return jsonify(group_commit.snapshot()), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@metrics_bp.route('/history', methods=['GET'])
+@jwt_required()
+def get_history_metrics():
+    """Get task history events this worker has buffered, written and dropped"""
+    try:
+        return jsonify(task_history.snapshot()), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@metrics_bp.route('/statements', methods=['GET'])
+@jwt_required()
+def get_statement_metrics():
+    """Get the compiled statement cache hits and misses of this worker"""
+    try:
+        return jsonify(statement_cache.snapshot(db.engine)), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,32 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from src.extensions import presence
+
+presence_bp = Blueprint('presence', __name__)
+
+@presence_bp.route('/', methods=['GET'])
+@jwt_required()
+def get_presence():
+    """Get online status for a comma-separated list of user ids"""
+    try:
+        raw_ids = [value for value in request.args.get('user_ids', '').split(',') if value.strip()]
+        if not raw_ids:
+            return jsonify({'error': 'user_ids is required'}), 400
+        
+        max_ids = current_app.config['PRESENCE_MAX_IDS']
+        if len(raw_ids) > max_ids:
+            return jsonify({'error': f'At most {max_ids} user_ids per request'}), 400
+        
+        try:
+            user_ids = [int(value) for value in raw_ids]
+        except ValueError:
+            return jsonify({'error': 'user_ids must be integers'}), 400
+        
+        online = presence.online(user_ids)
+        return jsonify({
+            'presence': {str(user_id): user_id in online for user_id in user_ids},
+            'online': sorted(online)
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
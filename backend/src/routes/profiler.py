@@ -0,0 +1,93 @@
+from functools import wraps
+
+from flask import Blueprint, Response, current_app, jsonify, request, send_file
+from src.extensions import profiler
+from src.services.profiler import TOKEN_HEADER, verify_token
+
+profiler_bp = Blueprint('profiler', __name__)
+
+def profiler_admin_required(view):
+    """Only serve requests with a valid X-Profile-Token while profiling is enabled"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled:
+            return jsonify({'error': 'Profiling is disabled'}), 404
+        if not verify_token(current_app, request.headers.get(TOKEN_HEADER, '')):
+            return jsonify({'error': f'A valid {TOKEN_HEADER} header is required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@profiler_bp.route('', methods=['GET'])
+@profiler_admin_required
+def get_profiler():
+    """Get this worker's profiler settings and saved request profiles"""
+    try:
+        dumps = [{
+            'name': entry.name,
+            'bytes': entry.stat().st_size,
+            'created_at': entry.stat().st_mtime
+        } for entry in profiler.dumps()]
+        return jsonify({**profiler.status(), 'dumps': dumps}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@profiler_bp.route('', methods=['PUT'])
+@profiler_admin_required
+def update_profiler():
+    """Change this worker's request sampling rate or start/stop its stack sampler"""
+    try:
+        data = request.get_json() or {}
+        
+        if 'request_rate' in data:
+            rate = data['request_rate']
+            if isinstance(rate, bool) or not isinstance(rate, (int, float)) or not 0 <= rate <= 1:
+                return jsonify({'error': 'request_rate must be a number from 0 to 1'}), 400
+            profiler.request_rate = float(rate)
+        
+        if 'sampler' in data:
+            if not isinstance(data['sampler'], bool):
+                return jsonify({'error': 'sampler must be true or false'}), 400
+            profiler.set_sampler(data['sampler'])
+        
+        return jsonify(profiler.status()), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@profiler_bp.route('/dumps/<name>', methods=['GET'])
+@profiler_admin_required
+def download_dump(name):
+    """Download a saved request profile, or its pstats summary with ?format=text"""
+    try:
+        path = profiler.dump_path(name)
+        if path is None:
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        if request.args.get('format') == 'text':
+            sort = request.args.get('sort', 'cumulative')
+            limit = request.args.get('limit', 40, type=int)
+            return Response(profiler.summary(path, sort, limit), mimetype='text/plain')
+        
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=name)
+    
+    except KeyError:
+        return jsonify({'error': 'Unknown sort key'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@profiler_bp.route('/stacks', methods=['GET'])
+@profiler_admin_required
+def download_stacks():
+    """Download this worker's sampled stacks in folded (flamegraph) format"""
+    try:
+        folded = profiler.folded_stacks()
+        if folded is None:
+            return jsonify({'error': 'The stack sampler has not run in this worker'}), 404
+        
+        return Response(folded, mimetype='text/plain', headers={
+            'Content-Disposition': f'attachment; filename=stacks-{profiler.status()["pid"]}.folded'
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,77 +1,104 @@
+from functools import cache
+
+from flask import current_app, request
 from flask_socketio import emit, join_room, leave_room
 from flask_jwt_extended import decode_token
+from src.extensions import broadcaster, presence, socketio
+from src.services.socket_payloads import msgpack_available, pack, serialize_changes
 from src.models.user import User
 from src.models.task import Task
 
+def notify_user(socketio, user_id, event, build_payload):
+    """Emit ``event`` to ``user_id`` if they are connected, otherwise queue it.
+    
+    ``build_payload`` is only called when the payload is actually needed, so
+    nothing is serialized for users who are offline with queueing disabled.
+    Connections that negotiated MessagePack get the payload packed as a
+    binary attachment in their own room. The event also goes to the user's
+    Server-Sent Event streams.
+    """
+    broadcaster.publish(user_id, event, build_payload)
+    
+    encodings = presence.encodings(user_id)
+    if encodings:
+        payload = build_payload()
+        if 'json' in encodings:
+            socketio.emit(event, payload, room=f'user_{user_id}')
+        if 'msgpack' in encodings:
+            socketio.emit(event, pack(payload), room=f'user_{user_id}:msgpack')
+    elif presence.queue_limit > 0:
+        presence.queue(user_id, event, build_payload())
+
+def task_recipients(task):
+    """Creator first, then the assignee if it is someone else"""
+    if task.assigned_to and task.assigned_to != task.created_by:
+        return [task.created_by, task.assigned_to]
+    return [task.created_by]
+
 def handle_task_created(socketio, task_data):
     """Emit task created event to relevant users"""
     task = task_data
+    task_dict = cache(task.to_dict)
     
     # Notify task creator
-    socketio.emit('task_created', {
-        'task': task.to_dict(),
+    notify_user(socketio, task.created_by, 'task_created', lambda: {
+        'task': task_dict(),
         'message': f'Task "{task.title}" has been created'
-    }, room=f'user_{task.created_by}')
+    })
     
     # Notify assigned user if different from creator
     if task.assigned_to and task.assigned_to != task.created_by:
-        socketio.emit('task_assigned', {
-            'task': task.to_dict(),
+        notify_user(socketio, task.assigned_to, 'task_assigned', lambda: {
+            'task': task_dict(),
             'message': f'You have been assigned task: "{task.title}"'
-        }, room=f'user_{task.assigned_to}')
+        })
 
-def handle_task_updated(socketio, task_data, old_status=None):
-    """Emit task updated event to relevant users"""
-    task = task_data
+def handle_task_updated(socketio, task_data, changes, old_status=None):
+    """Emit task updated event to relevant users.
     
-    # Notify task creator
-    socketio.emit('task_updated', {
-        'task': task.to_dict(),
-        'message': f'Task "{task.title}" has been updated'
-    }, room=f'user_{task.created_by}')
+    Payloads carry only ``changes`` (the columns that were written) plus the
+    task's id, title, version and updated_at, not the whole task.
+    """
+    task = task_data
+    summary = {'id': task.id, 'title': task.title, 'version': task.version}
     
-    # Notify assigned user if different from creator
-    if task.assigned_to and task.assigned_to != task.created_by:
-        socketio.emit('task_updated', {
-            'task': task.to_dict(),
+    def update_payload():
+        return {
+            'task': {**summary, 'updated_at': task.updated_at.isoformat(), **serialize_changes(changes)},
+            'changed': sorted(changes),
             'message': f'Task "{task.title}" has been updated'
-        }, room=f'user_{task.assigned_to}')
+        }
+    
+    for user_id in task_recipients(task):
+        notify_user(socketio, user_id, 'task_updated', update_payload)
     
     # If status changed, send specific status change event
-    if old_status and old_status != task.status:
-        status_message = f'Task "{task.title}" status changed from {old_status.value} to {task.status.value}'
+    if 'status' in changes and (old_status is None or old_status != task.status):
+        if old_status:
+            status_message = f'Task "{task.title}" status changed from {old_status.value} to {task.status.value}'
+        else:
+            status_message = f'Task "{task.title}" status changed to {task.status.value}'
         
-        socketio.emit('task_status_changed', {
-            'task': task.to_dict(),
-            'old_status': old_status.value,
-            'new_status': task.status.value,
-            'message': status_message
-        }, room=f'user_{task.created_by}')
-        
-        if task.assigned_to and task.assigned_to != task.created_by:
-            socketio.emit('task_status_changed', {
-                'task': task.to_dict(),
-                'old_status': old_status.value,
+        def status_payload():
+            return {
+                'task': {**summary, 'status': task.status.value},
+                'old_status': old_status.value if old_status else None,
                 'new_status': task.status.value,
                 'message': status_message
-            }, room=f'user_{task.assigned_to}')
+            }
+        
+        for user_id in task_recipients(task):
+            notify_user(socketio, user_id, 'task_status_changed', status_payload)
 
 def handle_task_deleted(socketio, task_data):
     """Emit task deleted event to relevant users"""
     task = task_data
     
-    # Notify task creator
-    socketio.emit('task_deleted', {
-        'task_id': task.id,
-        'message': f'Task "{task.title}" has been deleted'
-    }, room=f'user_{task.created_by}')
-    
-    # Notify assigned user if different from creator
-    if task.assigned_to and task.assigned_to != task.created_by:
-        socketio.emit('task_deleted', {
+    for user_id in task_recipients(task):
+        notify_user(socketio, user_id, 'task_deleted', lambda: {
             'task_id': task.id,
             'message': f'Task "{task.title}" has been deleted'
-        }, room=f'user_{task.assigned_to}')
+        })
 
 def authenticate_socket_user(token):
     """Authenticate user from socket token"""
@@ -84,3 +111,55 @@ def authenticate_socket_user(token):
         print(f"Socket authentication failed: {e}")
         return None
 
+def connected_clients():
+    """Socket.IO clients connected to this worker"""
+    return len(socketio.server.manager.rooms.get('/', {}).get(None, ()))
+
+@socketio.on('connect')
+def handle_connect(auth):
+    # Every client holds one of the worker's connections for as long as it stays
+    max_clients = current_app.config['SOCKETIO_MAX_CLIENTS']
+    if max_clients and connected_clients() > max_clients:
+        print('Socket connection refused: SOCKETIO_MAX_CLIENTS reached')
+        return False
+    print('Client connected')
+    
+    # Authenticate user if token provided
+    if auth and 'token' in auth:
+        user = authenticate_socket_user(auth['token'])
+        if user:
+            print(f'User {user.username} authenticated via socket')
+            
+            # Clients may ask for MessagePack payloads; they get JSON when
+            # msgpack isn't installed, and are told which one they got
+            encoding = 'json'
+            if auth.get('encoding') == 'msgpack' and msgpack_available():
+                encoding = 'msgpack'
+            join_room(f'user_{user.id}' if encoding == 'json' else f'user_{user.id}:{encoding}')
+            presence.connect(request.sid, user.id, encoding)
+            emit('session', {'user_id': user.id, 'encoding': encoding})
+            
+            # Deliver what was queued while the user was offline
+            for event, payload in presence.pending(user.id):
+                emit(event, payload if encoding == 'json' else pack(payload))
+        else:
+            print('Socket authentication failed')
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    print('Client disconnected')
+    presence.disconnect(request.sid)
+
+@socketio.on('join_room')
+def handle_join_room(data):
+    room = data.get('room')
+    if room:
+        join_room(room)
+        print(f'Client joined room: {room}')
+
+@socketio.on('leave_room')
+def handle_leave_room(data):
+    room = data.get('room')
+    if room:
+        leave_room(room)
+        print(f'Client left room: {room}')
@@ -1,12 +1,33 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask_cors import CORS
+from sqlalchemy.orm import joinedload
 from src.models.task import Task, TaskStatus, TaskPriority, db
+from src.models.task_archive import TaskArchive
+from src.models.task_event import TaskEvent
+from src.models.label import Label, TaskLabel
 from src.models.user import User
-from datetime import datetime
+from src.extensions import broadcaster, group_commit, task_history
+from src.routes.dashboard import (
+    archive_counts_query, fold_task_stats, invalidate_dashboards, task_stats_query
+)
+from src.services.broadcaster import sse_stream
+from src.services.labels import (
+    delete_task_labels, group_labels, label_counts, label_criteria, parse_label_names, set_task_labels,
+    task_labels, with_labels
+)
+from src.services.normalize import iter_with_users, load_user_map, normalized_tasks, wants_normalized
+from src.services.rollups import record_task_change, task_analytics, task_state
+from src.services.subtasks import (
+    ancestor_user_ids, attach_subtask, count_status_change, detach_task, move_subtree, subtree_query
+)
+from src.services.task_history import TRACKED_FIELDS, task_diff, task_snapshot
+from src.services.task_transfer import (
+    EXPORT_FORMATS, import_tasks as import_task_records, iter_csv, iter_export_rows, iter_ndjson, read_records,
+    serialize_task_row
+)
+from datetime import date, datetime, timedelta
 
 tasks_bp = Blueprint('tasks', __name__)
-CORS(tasks_bp)
 
 def emit_task_event(event_name, task_data, **kwargs):
     """Helper function to emit socket events"""
@@ -18,60 +39,191 @@ def emit_task_event(event_name, task_data, **kwargs):
             if event_name == 'task_created':
                 handle_task_created(socketio, task_data)
             elif event_name == 'task_updated':
-                handle_task_updated(socketio, task_data, kwargs.get('old_status'))
+                handle_task_updated(socketio, task_data, kwargs.get('changes', {}), kwargs.get('old_status'))
             elif event_name == 'task_deleted':
                 handle_task_deleted(socketio, task_data)
     except Exception as e:
         print(f"Error emitting socket event: {e}")
 
+def parse_task_changes(data):
+    """Validate the writable fields present in ``data``.
+    
+    Returns ``(changes, error)`` where ``changes`` maps column names to new
+    values and ``error`` is a ready-made 400 response, or None.
+    """
+    changes = {}
+    
+    if 'title' in data:
+        if not data['title']:
+            return None, (jsonify({'error': 'Title cannot be empty'}), 400)
+        changes['title'] = data['title']
+    
+    if 'description' in data:
+        changes['description'] = data['description']
+    
+    if 'status' in data:
+        try:
+            changes['status'] = TaskStatus(data['status'])
+        except ValueError:
+            return None, (jsonify({'error': 'Invalid status value'}), 400)
+    
+    if 'priority' in data:
+        try:
+            changes['priority'] = TaskPriority(data['priority'])
+        except ValueError:
+            return None, (jsonify({'error': 'Invalid priority value'}), 400)
+    
+    if 'due_date' in data:
+        if data['due_date']:
+            try:
+                changes['due_date'] = datetime.fromisoformat(data['due_date'].replace('Z', '+00:00'))
+            except ValueError:
+                return None, (jsonify({'error': 'Invalid due_date format. Use ISO format.'}), 400)
+        else:
+            changes['due_date'] = None
+    
+    if 'assigned_to' in data:
+        changes['assigned_to'] = data['assigned_to'] or None
+    
+    return changes, None
+
+def parse_expected_version(data):
+    """Version the client last saw, from ``If-Match`` or a ``version`` field.
+    
+    Returns ``(version, error)``; ``version`` is None when the client did not
+    ask for a conditional update (no header, or ``If-Match: *``).
+    """
+    value = request.headers.get('If-Match')
+    if value is not None:
+        value = value.strip()
+        if value == '*':
+            return None, None
+        if value.startswith('W/'):
+            value = value[2:]
+        value = value.strip('"')
+    elif data.get('version') is not None:
+        value = data['version']
+    else:
+        return None, None
+    
+    try:
+        return int(value), None
+    except (TypeError, ValueError):
+        return None, (jsonify({'error': 'Invalid version, expected an integer'}), 400)
+
+def with_etag(response, version):
+    """Attach the task version as the response's ETag"""
+    response.set_etag(str(version))
+    return response
+
+def check_parent(parent_id, user_id):
+    """Error response if ``parent_id`` is not a task ``user_id`` can add subtasks to, else None"""
+    if not isinstance(parent_id, int) or isinstance(parent_id, bool):
+        return jsonify({'error': 'Invalid parent_id, expected an integer'}), 400
+    
+    parent = Task.query.get(parent_id)
+    if not parent:
+        return jsonify({'error': 'Parent task not found'}), 404
+    
+    if parent.assigned_to != user_id and parent.created_by != user_id:
+        return jsonify({'error': 'Access denied to parent task'}), 403
+    
+    return None
+
+def task_list_statement(model, user_id, args, labels=False, with_users=False):
+    """Cached SELECT of a task listing filtered by the query ``args``.
+    
+    Built as a lambda statement, so each combination of filters is compiled
+    once and later requests only bind the user, status and priority. With
+    ``labels`` it selects the ``(task_id, label name)`` rows of the listed
+    tasks instead, for :func:`group_labels`. Raises ValueError for an
+    unknown status or priority.
+    """
+    status = args.get('status')
+    priority = args.get('priority')
+    assigned_to_me = args.get('assigned_to_me', 'false').lower() == 'true'
+    created_by_me = args.get('created_by_me', 'false').lower() == 'true'
+    
+    if status:
+        try:
+            status = TaskStatus(status)
+        except ValueError:
+            raise ValueError('Invalid status value')
+    
+    if priority:
+        try:
+            priority = TaskPriority(priority)
+        except ValueError:
+            raise ValueError('Invalid priority value')
+    
+    if labels:
+        stmt = db.lambda_stmt(lambda: (
+            db.select(TaskLabel.task_id, Label.name)
+            .join(Label, Label.id == TaskLabel.label_id)
+            .join(model, model.id == TaskLabel.task_id)
+            .order_by(Label.name)
+        ))
+    else:
+        stmt = db.lambda_stmt(lambda: db.select(model).order_by(model.created_at.desc()))
+        if with_users:
+            stmt += lambda s: s.options(joinedload(model.assignee), joinedload(model.creator))
+    
+    if assigned_to_me:
+        stmt += lambda s: s.where(model.assigned_to == user_id)
+    elif created_by_me:
+        stmt += lambda s: s.where(model.created_by == user_id)
+    else:
+        # Show tasks assigned to user or created by user
+        stmt += lambda s: s.where((model.assigned_to == user_id) | (model.created_by == user_id))
+    
+    if status:
+        stmt += lambda s: s.where(model.status == status)
+    
+    if priority:
+        stmt += lambda s: s.where(model.priority == priority)
+    
+    # ?labels=a,b&exclude_labels=c keeps tasks labelled a and b but not c
+    for criterion in label_criteria(
+        model, parse_label_names(args.get('labels')), parse_label_names(args.get('exclude_labels'))
+    ):
+        stmt += lambda s: s.where(criterion)
+    
+    return stmt
+
 @tasks_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_tasks():
     """Get all tasks for current user"""
     try:
         current_user_id = get_jwt_identity()
+        include_archived = request.args.get('include_archived', 'false').lower() == 'true'
         
-        # Get query parameters
-        status = request.args.get('status')
-        priority = request.args.get('priority')
-        assigned_to_me = request.args.get('assigned_to_me', 'false').lower() == 'true'
-        created_by_me = request.args.get('created_by_me', 'false').lower() == 'true'
-        
-        # Build query
-        query = Task.query
-        
-        if assigned_to_me:
-            query = query.filter(Task.assigned_to == current_user_id)
-        elif created_by_me:
-            query = query.filter(Task.created_by == current_user_id)
-        else:
-            # Show tasks assigned to user or created by user
-            query = query.filter(
-                (Task.assigned_to == current_user_id) | 
-                (Task.created_by == current_user_id)
-            )
-        
-        if status:
+        models = [Task, TaskArchive] if include_archived else [Task]
+        normalize = wants_normalized(request.args)
+        tasks = []
+        labels = {}
+        for model in models:
             try:
-                status_enum = TaskStatus(status)
-                query = query.filter(Task.status == status_enum)
-            except ValueError:
-                return jsonify({'error': 'Invalid status value'}), 400
-        
-        if priority:
-            try:
-                priority_enum = TaskPriority(priority)
-                query = query.filter(Task.priority == priority_enum)
-            except ValueError:
-                return jsonify({'error': 'Invalid priority value'}), 400
+                # Normalized lists look their users up in one query of their own
+                query = task_list_statement(model, current_user_id, request.args, with_users=not normalize)
+                labels_query = task_list_statement(model, current_user_id, request.args, labels=True)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            tasks.extend(db.session.execute(query).scalars())
+            labels.update(group_labels(db.session.execute(labels_query)))
         
-        tasks = query.order_by(Task.created_at.desc()).all()
+        if include_archived:
+            tasks.sort(key=lambda task: task.created_at, reverse=True)
         
-        return jsonify({
-            'tasks': [task.to_dict() for task in tasks],
-            'count': len(tasks)
-        }), 200
+        if normalize:
+            body = normalized_tasks(tasks, load_user_map(tasks))
+        else:
+            body = {'tasks': [task.to_dict() for task in tasks]}
+        with_labels(body['tasks'], labels)
         
+        return jsonify({**body, 'label_counts': label_counts(labels), 'count': len(tasks)}), 200
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -118,28 +270,50 @@ def create_task():
             if not assignee:
                 return jsonify({'error': 'Assigned user not found'}), 404
         
-        # Create task
-        task = Task(
-            title=data['title'],
-            description=data.get('description'),
-            status=status,
-            priority=priority,
-            due_date=due_date,
-            assigned_to=assigned_to,
-            created_by=current_user_id
-        )
+        try:
+            label_names = parse_label_names(data.get('labels'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        db.session.add(task)
-        db.session.commit()
+        # Validate parent_id if provided
+        parent_id = data.get('parent_id')
+        if parent_id:
+            error = check_parent(parent_id, current_user_id)
+            if error:
+                return error
+        
+        # Create task
+        def insert_task():
+            task = Task(
+                title=data['title'],
+                description=data.get('description'),
+                status=status,
+                priority=priority,
+                due_date=due_date,
+                parent_id=parent_id or None,
+                assigned_to=assigned_to,
+                created_by=current_user_id
+            )
+            db.session.add(task)
+            db.session.flush()
+            attach_subtask(task)
+            labels = set_task_labels(task.id, label_names) if label_names else []
+            record_task_change(None, task_state(task), task.created_at)
+            changes = task_diff(None, {**task_snapshot(task), 'labels': labels or None})
+            task_history.record(task, current_user_id, 'created', changes)
+            return task, {**task.to_dict(), 'labels': labels}
+        
+        task, task_dict = group_commit.commit(insert_task)
+        invalidate_dashboards(task.created_by, task.assigned_to)
         
         # Emit socket event
         emit_task_event('task_created', task)
         
         return jsonify({
             'message': 'Task created successfully',
-            'task': task.to_dict()
+            'task': task_dict
         }), 201
-        
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -150,8 +324,11 @@ def get_task(task_id):
     """Get a specific task"""
     try:
         current_user_id = get_jwt_identity()
+        include_archived = request.args.get('include_archived', 'false').lower() == 'true'
         
         task = Task.query.get(task_id)
+        if not task and include_archived:
+            task = TaskArchive.query.get(task_id)
         if not task:
             return jsonify({'error': 'Task not found'}), 404
         
@@ -159,8 +336,10 @@ def get_task(task_id):
         if task.assigned_to != current_user_id and task.created_by != current_user_id:
             return jsonify({'error': 'Access denied'}), 403
         
-        return jsonify({'task': task.to_dict()}), 200
+        task_dict, = with_labels([task.to_dict()], task_labels([task.id]))
         
+        return with_etag(jsonify({'task': task_dict}), task.version), 200
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -182,60 +361,195 @@ def update_task(task_id):
         
         # Store old status for socket event
         old_status = task.status
+        old_assignee = task.assigned_to
         
-        # Update fields
-        if 'title' in data:
-            if not data['title']:
-                return jsonify({'error': 'Title cannot be empty'}), 400
-            task.title = data['title']
+        changes, error = parse_task_changes(data)
+        if error:
+            return error
         
-        if 'description' in data:
-            task.description = data['description']
+        if changes.get('assigned_to'):
+            assignee = User.query.get(changes['assigned_to'])
+            if not assignee:
+                return jsonify({'error': 'Assigned user not found'}), 404
         
-        if 'status' in data:
-            try:
-                task.status = TaskStatus(data['status'])
-            except ValueError:
-                return jsonify({'error': 'Invalid status value'}), 400
+        # Update fields, keeping only real changes for the socket event
+        changes = {field: value for field, value in changes.items() if getattr(task, field) != value}
+        
+        def apply_changes():
+            # The same task from the session that commits it (a group commit
+            # runs this on the coordinator thread)
+            task = Task.query.get(task_id)
+            if not task:
+                return None
+            before = task_state(task)
+            snapshot = task_snapshot(task)
+            for field, value in changes.items():
+                setattr(task, field, value)
+            task.version += 1
+            record_task_change(before, task_state(task))
+            if 'status' in changes and task.parent_id is not None:
+                count_status_change(task.id, before['status'], task.status)
+            task_history.record(
+                task, current_user_id, 'updated', task_diff(snapshot, task_snapshot(task))
+            )
+            # Writes updated_at before the task is serialized
+            db.session.flush()
+            task_dict, = with_labels([task.to_dict()], task_labels([task.id]))
+            return task, task_dict
         
-        if 'priority' in data:
-            try:
-                task.priority = TaskPriority(data['priority'])
-            except ValueError:
-                return jsonify({'error': 'Invalid priority value'}), 400
+        result = group_commit.commit(apply_changes)
+        if result is None:
+            return jsonify({'error': 'Task not found'}), 404
+        task, task_dict = result
+        invalidate_dashboards(task.created_by, old_assignee, task.assigned_to)
         
-        if 'due_date' in data:
-            if data['due_date']:
-                try:
-                    task.due_date = datetime.fromisoformat(data['due_date'].replace('Z', '+00:00'))
-                except ValueError:
-                    return jsonify({'error': 'Invalid due_date format. Use ISO format.'}), 400
-            else:
-                task.due_date = None
-        
-        if 'assigned_to' in data:
-            if data['assigned_to']:
-                assignee = User.query.get(data['assigned_to'])
-                if not assignee:
-                    return jsonify({'error': 'Assigned user not found'}), 404
-                task.assigned_to = data['assigned_to']
-            else:
-                task.assigned_to = None
+        # Emit socket event
+        emit_task_event('task_updated', task, changes=changes, old_status=old_status)
         
+        return with_etag(jsonify({
+            'message': 'Task updated successfully',
+            'task': task_dict
+        }), task.version), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@tasks_bp.route('/<int:task_id>', methods=['PATCH'])
+@jwt_required()
+def patch_task(task_id):
+    """Partially update a task with one conditional UPDATE"""
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        
+        changes, error = parse_task_changes(data)
+        if error:
+            return error
+        
+        expected_version, error = parse_expected_version(data)
+        if error:
+            return error
+        
+        tasks = Task.__table__
+        
+        # Status and ownership changes feed the analytics rollups, and every
+        # change feeds the task history, which need the previous values. On
+        # PostgreSQL the UPDATE reads them itself; elsewhere those edits read
+        # the row first.
+        columns = []
+        if task_history.enabled or 'status' in changes or 'assigned_to' in changes:
+            columns = ['status', 'created_by', 'assigned_to', 'created_at']
+            if task_history.enabled:
+                columns += [field for field in TRACKED_FIELDS if field not in columns]
+        
+        # Ownership, the version check and the assignee check all live in
+        # the WHERE clause
+        conditions = [tasks.c.id == task_id, tasks.c.created_by == current_user_id]
+        if expected_version is not None:
+            conditions.append(tasks.c.version == expected_version)
+        if changes.get('assigned_to'):
+            conditions.append(
+                db.select(User.id).where(User.id == changes['assigned_to']).exists()
+            )
+        
+        now = datetime.utcnow()
+        statement = db.update(tasks).where(*conditions).values(
+            **changes, version=tasks.c.version + 1, updated_at=now
+        )
+        
+        previous = row = None
+        if columns and db.engine.dialect.name == 'postgresql':
+            # Still one statement: the UPDATE joins a locked read of the row
+            # it changes and returns the previous values with the new ones
+            # (SQLite can't return columns of a joined table)
+            result = db.session.execute(returning_previous(statement, task_id, columns)).first()
+            if result is not None:
+                row = {column.name: result._mapping[column.name] for column in tasks.c}
+                previous = {column: result._mapping[f'previous_{column}'] for column in columns}
+        else:
+            if columns:
+                # Read (and lock) the row first
+                previous = db.session.execute(
+                    db.select(*[tasks.c[column] for column in columns])
+                    .where(tasks.c.id == task_id, tasks.c.created_by == current_user_id)
+                    .with_for_update()
+                ).first()
+                if previous is None:
+                    db.session.rollback()
+                    return patch_failure(task_id, current_user_id, expected_version)
+                previous = dict(previous._mapping)
+            
+            if db.engine.dialect.update_returning:
+                result = db.session.execute(statement.returning(*tasks.c)).first()
+            else:
+                result = None
+                if db.session.execute(statement).rowcount:
+                    result = db.session.execute(db.select(tasks).where(tasks.c.id == task_id)).first()
+            if result is not None:
+                row = dict(result._mapping)
+        
+        if row is None:
+            db.session.rollback()
+            return patch_failure(task_id, current_user_id, expected_version)
+        
+        if previous is not None:
+            record_task_change(task_state(previous), task_state(row), now)
+            if row['parent_id'] is not None:
+                count_status_change(row['id'], previous['status'], row['status'])
+        if task_history.enabled:
+            task_history.record(
+                row, current_user_id, 'updated', task_diff(task_snapshot(previous), task_snapshot(row))
+            )
         db.session.commit()
         
-        # Emit socket event
-        emit_task_event('task_updated', task, old_status=old_status)
+        old_status = previous['status'] if previous is not None else None
+        invalidate_dashboards(row['created_by'], row['assigned_to'], previous['assigned_to'] if previous else None)
         
-        return jsonify({
-            'message': 'Task updated successfully',
-            'task': task.to_dict()
-        }), 200
+        task = serialize_task_row(row)
+        emit_task_event('task_updated', Task(**row), changes=changes, old_status=old_status)
         
+        return with_etag(jsonify({
+            'message': 'Task updated successfully',
+            'task': task
+        }), task['version']), 200
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def returning_previous(statement, task_id, columns):
+    """``statement``, an UPDATE of task ``task_id``, returning the new row and the old ``columns`` as previous_<column>"""
+    tasks = Task.__table__
+    old = (
+        db.select(tasks.c.id, *[tasks.c[column].label(f'previous_{column}') for column in columns])
+        .where(tasks.c.id == task_id)
+        .with_for_update()
+        .subquery('previous')
+    )
+    return statement.where(tasks.c.id == old.c.id).returning(*tasks.c, *list(old.c)[1:])
+
+def patch_failure(task_id, current_user_id, expected_version):
+    """Work out why a conditional UPDATE matched no rows"""
+    tasks = Task.__table__
+    current = db.session.execute(
+        db.select(tasks.c.created_by, tasks.c.version).where(tasks.c.id == task_id)
+    ).first()
+    
+    if current is None:
+        return jsonify({'error': 'Task not found'}), 404
+    
+    if current.created_by != current_user_id:
+        return jsonify({'error': 'Only task creator can modify the task'}), 403
+    
+    if expected_version is not None and current.version != expected_version:
+        return with_etag(jsonify({
+            'error': 'Task has been modified by someone else',
+            'version': current.version
+        }), current.version), 412
+    
+    return jsonify({'error': 'Assigned user not found'}), 404
+
 @tasks_bp.route('/<int:task_id>', methods=['DELETE'])
 @jwt_required()
 def delete_task(task_id):
@@ -254,58 +568,347 @@ def delete_task(task_id):
         # Store task data before deletion for socket event
         task_data_copy = task.to_dict()
         
+        record_task_change(task_state(task), None)
+        task_history.record(task, current_user_id, 'deleted', task_diff(task_snapshot(task), None))
+        detach_task(task)
+        delete_task_labels(task.id)
         db.session.delete(task)
         db.session.commit()
+        invalidate_dashboards(task_data_copy['created_by'], task_data_copy['assigned_to'])
         
         # Emit socket event with copied data
         emit_task_event('task_deleted', type('Task', (), task_data_copy))
         
         return jsonify({'message': 'Task deleted successfully'}), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@tasks_bp.route('/<int:task_id>/subtree', methods=['GET'])
+@jwt_required()
+def get_subtree(task_id):
+    """Get a task and every subtask below it, shallowest first"""
+    try:
+        current_user_id = get_jwt_identity()
+        max_depth = request.args.get('max_depth', type=int)
+        
+        task = Task.query.get(task_id)
+        if not task:
+            return jsonify({'error': 'Task not found'}), 404
+        
+        # Access to a task gives access to everything below it
+        if task.assigned_to != current_user_id and task.created_by != current_user_id:
+            return jsonify({'error': 'Access denied'}), 403
+        
+        normalize = wants_normalized(request.args)
+        query = subtree_query(task_id, max_depth)
+        if not normalize:
+            query = query.options(joinedload(Task.assignee), joinedload(Task.creator))
+        rows = db.session.execute(query).all()
+        
+        if normalize:
+            body = {
+                'task': task.to_dict(include_users=False),
+                'users': load_user_map([task] + [subtask for subtask, _ in rows])
+            }
+        else:
+            body = {'task': task.to_dict()}
+        body['subtasks'] = [
+            {**subtask.to_dict(include_users=not normalize), 'depth': depth} for subtask, depth in rows
+        ]
+        
+        return jsonify({**body, 'count': len(rows)}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@tasks_bp.route('/<int:task_id>/move', methods=['POST'])
+@jwt_required()
+def move_task(task_id):
+    """Move a task, with all of its subtasks, under another task or to the top level"""
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        
+        if 'parent_id' not in data:
+            return jsonify({'error': 'parent_id is required (null for the top level)'}), 400
+        parent_id = data['parent_id']
+        
+        task = Task.query.get(task_id)
+        if not task:
+            return jsonify({'error': 'Task not found'}), 404
+        
+        # Check if user has access to modify this task
+        if task.created_by != current_user_id:
+            return jsonify({'error': 'Only task creator can modify the task'}), 403
         
+        if parent_id is not None:
+            error = check_parent(parent_id, current_user_id)
+            if error:
+                return error
+        
+        def apply_move():
+            task = Task.query.get(task_id)
+            if not task:
+                return None
+            old_parent_id = task.parent_id
+            # The subtask counts of the old and the new ancestors change too
+            user_ids = {task.created_by, task.assigned_to} | ancestor_user_ids(task.id, parent_id)
+            move_subtree(task, parent_id)
+            task.version += 1
+            task_history.record(
+                task, current_user_id, 'updated',
+                task_diff({'parent_id': old_parent_id}, {'parent_id': parent_id})
+            )
+            db.session.flush()
+            return task, task.to_dict(), user_ids
+        
+        try:
+            result = group_commit.commit(apply_move)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        if result is None:
+            return jsonify({'error': 'Task not found'}), 404
+        task, task_dict, user_ids = result
+        invalidate_dashboards(*user_ids)
+        
+        emit_task_event('task_updated', task, changes={'parent_id': parent_id})
+        
+        return with_etag(jsonify({
+            'message': 'Task moved successfully',
+            'task': task_dict
+        }), task.version), 200
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@tasks_bp.route('/stats', methods=['GET'])
+@tasks_bp.route('/<int:task_id>/history', methods=['GET'])
 @jwt_required()
-def get_task_stats():
-    """Get task statistics for current user"""
+def get_task_history(task_id):
+    """Get the changes made to a task, oldest first, a page at a time"""
     try:
         current_user_id = get_jwt_identity()
+        try:
+            limit = min(int(request.args.get('limit', current_app.config['TASK_HISTORY_PAGE_SIZE'])), 200)
+            after = int(request.args.get('after', 0))
+        except ValueError:
+            return jsonify({'error': 'limit and after must be integers'}), 400
+        if limit < 1:
+            return jsonify({'error': 'limit must be positive'}), 400
+        
+        task = Task.query.get(task_id) or TaskArchive.query.get(task_id)
+        if not task:
+            return jsonify({'error': 'Task not found'}), 404
         
-        # Get tasks assigned to or created by current user
-        user_tasks = Task.query.filter(
-            (Task.assigned_to == current_user_id) | 
-            (Task.created_by == current_user_id)
-        ).all()
-        
-        # Calculate statistics
-        total_tasks = len(user_tasks)
-        status_counts = {}
-        priority_counts = {}
-        
-        for task in user_tasks:
-            # Count by status
-            status_key = task.status.value if task.status else 'unknown'
-            status_counts[status_key] = status_counts.get(status_key, 0) + 1
-            
-            # Count by priority
-            priority_key = task.priority.value if task.priority else 'unknown'
-            priority_counts[priority_key] = priority_counts.get(priority_key, 0) + 1
+        # Check if user has access to this task
+        if task.assigned_to != current_user_id and task.created_by != current_user_id:
+            return jsonify({'error': 'Access denied'}), 403
         
-        # Count overdue tasks
-        overdue_tasks = 0
-        for task in user_tasks:
-            if task.due_date and task.due_date < datetime.utcnow() and task.status != TaskStatus.COMPLETED:
-                overdue_tasks += 1
+        # Keyset pagination on the (task_id, id) index, skipping any events
+        # of an earlier task that had the same id
+        events = TaskEvent.query.filter(
+            TaskEvent.task_id == task_id, TaskEvent.task_created_at == task.created_at, TaskEvent.id > after
+        ).order_by(TaskEvent.id).limit(limit + 1).all()
+        has_next = len(events) > limit
+        events = events[:limit]
         
         return jsonify({
-            'total_tasks': total_tasks,
-            'status_counts': status_counts,
-            'priority_counts': priority_counts,
-            'overdue_tasks': overdue_tasks
+            'events': [event.to_dict() for event in events],
+            'count': len(events),
+            'next_after': events[-1].id if has_next else None
         }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@tasks_bp.route('/<int:task_id>/labels', methods=['PUT'])
+@jwt_required()
+def update_task_labels(task_id):
+    """Replace the labels on a task"""
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        
+        if 'labels' not in data:
+            return jsonify({'error': 'labels is required'}), 400
+        try:
+            names = parse_label_names(data['labels'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        task = Task.query.get(task_id)
+        if not task:
+            return jsonify({'error': 'Task not found'}), 404
+        
+        # Check if user has access to modify this task
+        if task.created_by != current_user_id:
+            return jsonify({'error': 'Only task creator can modify the task'}), 403
+        
+        def apply_labels():
+            task = Task.query.get(task_id)
+            if not task:
+                return None
+            old_labels = task_labels([task_id]).get(task_id, []) if task_history.enabled else None
+            labels = set_task_labels(task_id, names)
+            task.version += 1
+            if labels != old_labels:
+                task_history.record(task, current_user_id, 'updated', {'labels': [old_labels, labels]})
+            db.session.flush()
+            return task, labels
+        
+        result = group_commit.commit(apply_labels)
+        if result is None:
+            return jsonify({'error': 'Task not found'}), 404
+        task, labels = result
+        invalidate_dashboards(task.created_by, task.assigned_to)
+        
+        emit_task_event('task_updated', task, changes={'labels': labels})
+        
+        return with_etag(jsonify({
+            'message': 'Labels updated successfully',
+            'task_id': task_id,
+            'labels': labels
+        }), task.version), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@tasks_bp.route('/stats', methods=['GET'])
+@jwt_required()
+def get_task_stats():
+    """Get task statistics for current user, including archived tasks by default"""
+    try:
+        current_user_id = get_jwt_identity()
+        include_archived = request.args.get('include_archived', 'true').lower() == 'true'
+        
+        # One grouped query, and the per-user archive counts
+        rows = db.session.execute(task_stats_query(current_user_id, datetime.utcnow())).all()
+        archive_counts = None
+        if include_archived:
+            archive_counts = db.session.execute(archive_counts_query(current_user_id)).scalars()
+        
+        stats, _ = fold_task_stats(rows, archive_counts)
+        
+        return jsonify(stats), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@tasks_bp.route('/analytics', methods=['GET'])
+@jwt_required()
+def get_task_analytics():
+    """Get daily created/completed/open counts for the current user"""
+    try:
+        current_user_id = get_jwt_identity()
+        config = current_app.config
+        
+        try:
+            end = date.fromisoformat(request.args['end']) if request.args.get('end') else datetime.utcnow().date()
+            start = date.fromisoformat(request.args['start']) if request.args.get('start') \
+                else end - timedelta(days=config['ANALYTICS_DEFAULT_DAYS'] - 1)
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD.'}), 400
+        
+        if start > end:
+            return jsonify({'error': 'start must not be after end'}), 400
+        if (end - start).days + 1 > config['ANALYTICS_MAX_DAYS']:
+            return jsonify({'error': f"Range is limited to {config['ANALYTICS_MAX_DAYS']} days"}), 400
+        
+        return jsonify(task_analytics(current_user_id, start, end)), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@tasks_bp.route('/stream', methods=['GET'])
+# EventSource can't send headers, so browsers pass the token as ?jwt=
+@jwt_required(locations=['headers', 'query_string'])
+def stream_tasks():
+    """Stream the current user's task events as Server-Sent Events"""
+    try:
+        current_user_id = get_jwt_identity()
+        config = current_app.config
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        
+        subscription = broadcaster.subscribe(current_user_id, last_event_id)
+        if subscription is None:
+            response = jsonify({'error': 'Too many open streams, please retry'})
+            response.headers['Retry-After'] = str(config['SSE_RETRY_MS'] // 1000)
+            return response, 503
+        
+        subscriber, backlog = subscription
+        response = Response(
+            sse_stream(
+                subscriber, backlog,
+                heartbeat=config['SSE_HEARTBEAT_SECONDS'],
+                max_seconds=config['SSE_MAX_STREAM_SECONDS'],
+                retry_ms=config['SSE_RETRY_MS']
+            ),
+            mimetype='text/event-stream',
+            # Proxies must neither cache nor buffer the stream
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+        response.call_on_close(lambda: broadcaster.unsubscribe(subscriber))
+        return response
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@tasks_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_tasks():
+    """Stream the current user's tasks as NDJSON or CSV"""
+    try:
+        current_user_id = get_jwt_identity()
+        fmt = request.args.get('format', 'ndjson').lower()
+        include_archived = request.args.get('include_archived', 'false').lower() == 'true'
         
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'error': 'Invalid format. Use ndjson or csv.'}), 400
+        
+        normalize = wants_normalized(request.args)
+        if normalize and fmt != 'ndjson':
+            return jsonify({'error': 'normalize is only supported for ndjson'}), 400
+        
+        rows = iter_export_rows(current_user_id, include_archived=include_archived)
+        if normalize:
+            rows = iter_with_users(rows)
+        body = iter_ndjson(rows) if fmt == 'ndjson' else iter_csv(rows)
+        
+        return Response(
+            stream_with_context(body),
+            mimetype=EXPORT_FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename=tasks.{fmt}'}
+        )
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@tasks_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_tasks():
+    """Bulk-create tasks from an NDJSON or CSV upload"""
+    try:
+        current_user_id = get_jwt_identity()
+        
+        upload = request.files.get('file')
+        stream = upload.stream if upload else request.stream
+        mimetype = upload.mimetype if upload else request.mimetype
+        fmt = request.args.get('format', 'csv' if mimetype == 'text/csv' else 'ndjson').lower()
+        
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'error': 'Invalid format. Use ndjson or csv.'}), 400
+        
+        summary = import_task_records(read_records(stream, fmt), current_user_id)
+        
+        return jsonify({
+            'message': f"Imported {summary['imported']} tasks",
+            **summary
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -1,20 +1,102 @@
-from flask import Blueprint, jsonify, request
+import sys
+
+from flask import Blueprint, jsonify, request, current_app
+from flask_jwt_extended import jwt_required
 from src.models.user import User, db
+from src.routes.dashboard import dashboard_cache
+from src.services.cache import TTLCache
 
 user_bp = Blueprint('user', __name__)
 
+# Typeahead results by (prefix, limit); cleared whenever a user changes
+user_search_cache = TTLCache(maxsize=2048)
+
+SEARCH_FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _prefix_condition(column, prefix, dialect_name):
+    """Match ``lower(column)`` starting with ``prefix`` as an index range scan"""
+    lowered = db.func.lower(column)
+    like = lowered.like(_escape_like(prefix) + '%', escape='\\')
+    # PostgreSQL's text_pattern_ops indexes turn the LIKE into a range
+    # itself; its >= and < follow the locale's collation, which can sort
+    # other strings between a prefix and its upper bound
+    if dialect_name == 'postgresql' or ord(prefix[-1]) == sys.maxunicode:
+        return like
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return db.and_(lowered >= prefix, lowered < upper_bound, like)
+
+def _summary(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name
+    }
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    """List users a page at a time, ordered by id"""
+    try:
+        limit = min(int(request.args.get('limit', current_app.config['USER_PAGE_SIZE'])), 100)
+        after = int(request.args.get('after', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and after must be integers'}), 400
+    if limit < 1:
+        return jsonify({'error': 'limit must be positive'}), 400
+    
+    # Keyset pagination: each page is an index range scan on the primary key
+    users = User.query.filter(User.id > after).order_by(User.id).limit(limit + 1).all()
+    has_next = len(users) > limit
+    users = users[:limit]
+    
+    return jsonify({
+        'users': [user.to_dict() for user in users],
+        'count': len(users),
+        'next_after': users[-1].id if has_next else None
+    })
+
+@user_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_users():
+    """Case-insensitive prefix search on username, name and email"""
+    prefix = request.args.get('prefix', '').strip().lower()
+    if not prefix:
+        return jsonify({'error': 'prefix is required'}), 400
+    
+    max_limit = current_app.config['USER_SEARCH_LIMIT']
+    try:
+        limit = min(int(request.args.get('limit', max_limit)), max_limit)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    key = (prefix, limit)
+    users = user_search_cache.get(key)
+    if users is None:
+        matches = User.query.filter(
+            User.is_active.is_(True),
+            db.or_(*[
+                _prefix_condition(getattr(User, field), prefix, db.engine.dialect.name) for field in SEARCH_FIELDS
+            ])
+        ).order_by(User.username).limit(limit).all()
+        users = [_summary(user) for user in matches]
+        user_search_cache.set(key, users, ttl=current_app.config['USER_SEARCH_CACHE_TTL'])
+    
+    response = jsonify({'users': users, 'count': len(users)})
+    response.headers['Cache-Control'] = f"private, max-age={current_app.config['USER_SEARCH_CACHE_TTL']}"
+    return response
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
-    
+
     data = request.json
     user = User(username=data['username'], email=data['email'])
     db.session.add(user)
     db.session.commit()
+    user_search_cache.clear()
     return jsonify(user.to_dict()), 201
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
@@ -29,6 +111,9 @@ def update_user(user_id):
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
     db.session.commit()
+    user_search_cache.clear()
+    # Dashboards embed assignee/creator details
+    dashboard_cache.clear()
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
@@ -36,4 +121,7 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    user_search_cache.clear()
+    # Dashboards embed assignee/creator details
+    dashboard_cache.clear()
     return '', 204
@@ -0,0 +1,118 @@
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from src.models.task import Task, TaskStatus, db
+from src.models.task_archive import TaskArchive, TaskArchiveCount
+from src.routes.dashboard import invalidate_dashboards
+
+ARCHIVABLE_STATUSES = (TaskStatus.COMPLETED, TaskStatus.CANCELLED)
+
+def archive_tasks(older_than_days=30, batch_size=500, pause=0.0, max_batches=None):
+    """Move closed tasks older than ``older_than_days`` into ``tasks_archive``.
+    
+    Tasks are moved in batches of ``batch_size``, each in its own short
+    transaction, so writers on ``tasks`` are never blocked for long. Tasks
+    with a parent or subtasks stay put, since the task hierarchy only links
+    live tasks. Returns the number of tasks archived.
+    """
+    tasks = Task.__table__
+    archive_columns = set(TaskArchive.__table__.c.keys())
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+    batches = 0
+    
+    while max_batches is None or batches < max_batches:
+        rows = db.session.execute(
+            db.select(tasks)
+            .where(
+                tasks.c.status.in_(ARCHIVABLE_STATUSES),
+                tasks.c.updated_at < cutoff,
+                tasks.c.parent_id.is_(None),
+                tasks.c.subtask_count == 0
+            )
+            .order_by(tasks.c.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).mappings().all()
+        if not rows:
+            break
+        
+        try:
+            archived_at = datetime.utcnow()
+            db.session.execute(
+                db.insert(TaskArchive.__table__),
+                [
+                    {key: value for key, value in row.items() if key in archive_columns}
+                    | {'archived_at': archived_at}
+                    for row in rows
+                ]
+            )
+            _add_archive_counts(rows)
+            db.session.execute(
+                db.delete(tasks).where(tasks.c.id.in_([row['id'] for row in rows]))
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        # Only this process's cache; other workers catch up within DASHBOARD_CACHE_TTL
+        invalidate_dashboards(*(user_id for row in rows for user_id in (row['created_by'], row['assigned_to'])))
+        
+        archived += len(rows)
+        batches += 1
+        if len(rows) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    
+    return archived
+
+def _add_archive_counts(rows):
+    """Fold a batch of archived task rows into ``task_archive_counts``"""
+    counts = TaskArchiveCount.__table__
+    increments = Counter()
+    for row in rows:
+        # A task counts once for its creator and once for a different assignee,
+        # matching the ownership rule used by the stats endpoint
+        for user_id in {row['created_by'], row['assigned_to']} - {None}:
+            increments[(user_id, row['status'], row['priority'])] += 1
+    
+    for (user_id, status, priority), amount in increments.items():
+        result = db.session.execute(
+            db.update(counts)
+            .where(
+                counts.c.user_id == user_id,
+                counts.c.status == status,
+                counts.c.priority == priority
+            )
+            .values(count=counts.c.count + amount)
+        )
+        if result.rowcount == 0:
+            db.session.execute(
+                db.insert(counts).values(
+                    user_id=user_id, status=status, priority=priority, count=amount
+                )
+            )
+
+@click.command('archive-tasks')
+@click.option('--older-than-days', type=int, default=None,
+              help='Minimum age of closed tasks to archive (default: ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, default=None,
+              help='Tasks moved per transaction (default: ARCHIVE_BATCH_SIZE).')
+@click.option('--pause', type=float, default=0.0,
+              help='Seconds to sleep between batches.')
+@with_appcontext
+def archive_tasks_command(older_than_days, batch_size, pause):
+    """Move completed and cancelled tasks into the archive table."""
+    if older_than_days is None:
+        older_than_days = current_app.config['ARCHIVE_AFTER_DAYS']
+    if batch_size is None:
+        batch_size = current_app.config['ARCHIVE_BATCH_SIZE']
+    
+    archived = archive_tasks(older_than_days=older_than_days, batch_size=batch_size, pause=pause)
+    click.echo(f'Archived {archived} tasks older than {older_than_days} days')
@@ -0,0 +1,390 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import zlib
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import make_url
+
+MANIFEST_TIME_FORMAT = '%Y%m%dT%H%M%S%fZ'
+
+class BackupStore:
+    """Content-addressed chunk store plus one JSON manifest per backup.
+    
+    Chunks are keyed by the SHA-256 of their uncompressed content and stored
+    zlib-compressed under ``chunks/``, so a chunk shared by several backups is
+    kept once. Manifests under ``manifests/`` list the chunks of a backup in
+    order.
+    """
+    
+    def __init__(self, root):
+        self.root = root
+        self.chunk_dir = os.path.join(root, 'chunks')
+        self.manifest_dir = os.path.join(root, 'manifests')
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+    
+    def _chunk_path(self, digest):
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+    
+    def put_chunk(self, data):
+        """Store a chunk if it is new; return ``(digest, stored_bytes)``"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        
+        compressed = zlib.compress(data, 6)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write_atomic(path, compressed)
+        return digest, len(compressed)
+    
+    def get_chunk(self, digest):
+        with open(self._chunk_path(digest), 'rb') as f:
+            return zlib.decompress(f.read())
+    
+    def write_manifest(self, manifest):
+        path = os.path.join(self.manifest_dir, f"{manifest['id']}.json")
+        self._write_atomic(path, json.dumps(manifest, indent=2).encode('utf-8'))
+    
+    def load_manifest(self, backup_id):
+        with open(os.path.join(self.manifest_dir, f'{backup_id}.json')) as f:
+            return json.load(f)
+    
+    def delete_manifest(self, backup_id):
+        os.remove(os.path.join(self.manifest_dir, f'{backup_id}.json'))
+    
+    def list_manifests(self):
+        """Return all manifests, oldest first"""
+        names = sorted(name for name in os.listdir(self.manifest_dir) if name.endswith('.json'))
+        return [self.load_manifest(name[:-len('.json')]) for name in names]
+    
+    def collect_garbage(self):
+        """Delete chunks no manifest refers to; return how many were removed"""
+        referenced = set()
+        for manifest in self.list_manifests():
+            referenced.update(_manifest_chunks(manifest))
+        
+        removed = 0
+        for prefix in os.listdir(self.chunk_dir):
+            prefix_dir = os.path.join(self.chunk_dir, prefix)
+            for digest in os.listdir(prefix_dir):
+                if digest not in referenced:
+                    os.remove(os.path.join(prefix_dir, digest))
+                    removed += 1
+        return removed
+    
+    @staticmethod
+    def _write_atomic(path, data):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+def _manifest_chunks(manifest):
+    if manifest['engine'] == 'sqlite':
+        return manifest['chunks']
+    return [digest for table in manifest['tables'] for digest in table['chunks']]
+
+def create_backup(database_uri, store, chunk_size=1024 * 1024):
+    """Take a consistent online backup of ``database_uri`` into ``store``.
+    
+    Only chunks that differ from those already in the store take up space,
+    so each backup grows with the amount of changed data rather than with
+    the size of the database. Returns the manifest.
+    """
+    url = make_url(database_uri)
+    now = datetime.utcnow()
+    manifest = {
+        'id': now.strftime(MANIFEST_TIME_FORMAT),
+        'created_at': now.isoformat(),
+        'engine': url.get_backend_name(),
+        'size': 0,
+        'stored_bytes': 0,
+        'new_chunks': 0
+    }
+    
+    if manifest['engine'] == 'sqlite':
+        _backup_sqlite(url.database, store, manifest, chunk_size)
+    elif manifest['engine'] == 'postgresql':
+        _backup_postgresql(database_uri, store, manifest, chunk_size)
+    else:
+        raise ValueError(f"Unsupported database backend: {manifest['engine']}")
+    
+    store.write_manifest(manifest)
+    return manifest
+
+def _store_chunk(store, manifest, data):
+    digest, stored_bytes = store.put_chunk(data)
+    manifest['size'] += len(data)
+    manifest['stored_bytes'] += stored_bytes
+    if stored_bytes:
+        manifest['new_chunks'] += 1
+    return digest
+
+def _backup_sqlite(path, store, manifest, chunk_size):
+    if not path or path == ':memory:':
+        raise ValueError('Cannot back up an in-memory SQLite database')
+    
+    source = sqlite3.connect(path)
+    fd, snapshot_path = tempfile.mkstemp(suffix='.db', dir=store.root)
+    os.close(fd)
+    try:
+        snapshot = sqlite3.connect(snapshot_path)
+        try:
+            # Copy every page in one step, under one read transaction. Done a
+            # few pages at a time, the copy restarts whenever another
+            # connection writes between steps, so a busy database might never
+            # finish. Writers carry on in WAL mode and wait for the copy with
+            # a rollback journal.
+            source.backup(snapshot)
+            page_size = snapshot.execute('PRAGMA page_size').fetchone()[0]
+        finally:
+            snapshot.close()
+        
+        # Align chunks to whole pages so an unchanged page range always
+        # produces the same chunk
+        chunk_size = max(page_size, chunk_size - chunk_size % page_size)
+        manifest['page_size'] = page_size
+        manifest['chunks'] = []
+        with open(snapshot_path, 'rb') as f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                manifest['chunks'].append(_store_chunk(store, manifest, data))
+    finally:
+        source.close()
+        os.remove(snapshot_path)
+
+class _RowChunker:
+    """File-like sink for ``COPY ... TO STDOUT`` that cuts chunks on row boundaries.
+    
+    A row ends a chunk when its CRC matches a fixed bit mask, so boundaries
+    depend on content rather than offsets and an inserted row only changes
+    the chunk it lands in.
+    """
+    
+    def __init__(self, store, manifest, chunk_size):
+        self.store = store
+        self.manifest = manifest
+        self.min_size = chunk_size // 4
+        self.max_size = chunk_size * 4
+        self.mask = 0x3FF
+        self.buffer = bytearray()
+        self.pending = b''
+        self.chunks = []
+    
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        lines = (self.pending + data).split(b'\n')
+        self.pending = lines.pop()
+        for line in lines:
+            self.buffer += line + b'\n'
+            if len(self.buffer) >= self.max_size or (
+                len(self.buffer) >= self.min_size and zlib.crc32(line) & self.mask == 0
+            ):
+                self._flush()
+    
+    def close(self):
+        self.buffer += self.pending
+        self.pending = b''
+        self._flush()
+    
+    def _flush(self):
+        if self.buffer:
+            self.chunks.append(_store_chunk(self.store, self.manifest, bytes(self.buffer)))
+            self.buffer = bytearray()
+
+def _sorted_table_names(engine):
+    """Table names ordered so that referenced tables come first"""
+    return [name for name, _ in inspect(engine).get_sorted_table_and_fkc_names() if name]
+
+def _backup_postgresql(database_uri, store, manifest, chunk_size):
+    engine = create_engine(database_uri)
+    try:
+        tables = _sorted_table_names(engine)
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            # Every table is read from the same snapshot while writers carry on
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+            manifest['tables'] = []
+            for table in tables:
+                chunker = _RowChunker(store, manifest, chunk_size)
+                cursor.copy_expert(f'COPY "{table}" TO STDOUT', chunker)
+                chunker.close()
+                manifest['tables'].append({'name': table, 'chunks': chunker.chunks})
+            connection.rollback()
+        finally:
+            connection.close()
+    finally:
+        engine.dispose()
+
+def find_backup(store, backup_id=None, at=None):
+    """Pick the backup to restore: by id, the latest taken at or before ``at``, or the latest"""
+    if backup_id:
+        return store.load_manifest(backup_id)
+    
+    manifests = store.list_manifests()
+    if at is not None:
+        manifests = [m for m in manifests if datetime.fromisoformat(m['created_at']) <= at]
+    if not manifests:
+        raise LookupError('No backup found')
+    return manifests[-1]
+
+def restore_backup(database_uri, store, manifest):
+    """Restore the database at ``database_uri`` to the state captured in ``manifest``"""
+    url = make_url(database_uri)
+    if url.get_backend_name() != manifest['engine']:
+        raise ValueError(f"Backup {manifest['id']} was taken from {manifest['engine']}")
+    
+    if manifest['engine'] == 'sqlite':
+        _restore_sqlite(url.database, store, manifest)
+    else:
+        _restore_postgresql(database_uri, store, manifest)
+
+def _restore_sqlite(path, store, manifest):
+    fd, snapshot_path = tempfile.mkstemp(suffix='.db', dir=store.root)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for digest in manifest['chunks']:
+                f.write(store.get_chunk(digest))
+        
+        snapshot = sqlite3.connect(snapshot_path)
+        target = sqlite3.connect(path)
+        try:
+            # Going through the backup API keeps open connections to the
+            # live database valid
+            snapshot.backup(target)
+        finally:
+            target.close()
+            snapshot.close()
+    finally:
+        os.remove(snapshot_path)
+
+class _ChunkReader:
+    """File-like source for ``COPY ... FROM STDIN`` streaming stored chunks"""
+    
+    def __init__(self, store, digests):
+        self.store = store
+        self.digests = iter(digests)
+        self.buffer = b''
+    
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            digest = next(self.digests, None)
+            if digest is None:
+                break
+            self.buffer += self.store.get_chunk(digest)
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+def _restore_postgresql(database_uri, store, manifest):
+    engine = create_engine(database_uri)
+    try:
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            names = ', '.join(f'"{table["name"]}"' for table in manifest['tables'])
+            cursor.execute(f'TRUNCATE {names} CASCADE')
+            for table in manifest['tables']:
+                cursor.copy_expert(f'COPY "{table["name"]}" FROM STDIN', _ChunkReader(store, table['chunks']))
+                cursor.execute(
+                    "SELECT pg_get_serial_sequence(%s, 'id') FROM information_schema.columns "
+                    "WHERE table_name = %s AND column_name = 'id'",
+                    (f'"{table["name"]}"', table['name'])
+                )
+                row = cursor.fetchone()
+                if row and row[0]:
+                    cursor.execute(
+                        f'SELECT setval(%s, COALESCE((SELECT MAX(id) FROM "{table["name"]}"), 0) + 1, false)',
+                        (row[0],)
+                    )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+    finally:
+        engine.dispose()
+
+def prune_backups(store, keep_last=7, keep_daily=30, now=None):
+    """Apply the retention policy and drop chunks no longer referenced.
+    
+    Keeps the ``keep_last`` most recent backups plus the newest backup of each
+    of the last ``keep_daily`` days. Returns ``(removed_backups, removed_chunks)``.
+    """
+    now = now or datetime.utcnow()
+    manifests = store.list_manifests()
+    keep = {m['id'] for m in manifests[-keep_last:]} if keep_last else set()
+    
+    oldest_day = (now - timedelta(days=keep_daily)).date()
+    newest_per_day = {}
+    for manifest in manifests:
+        day = datetime.fromisoformat(manifest['created_at']).date()
+        if day > oldest_day:
+            newest_per_day[day] = manifest['id']
+    keep.update(newest_per_day.values())
+    
+    removed_backups = 0
+    for manifest in manifests:
+        if manifest['id'] not in keep:
+            store.delete_manifest(manifest['id'])
+            removed_backups += 1
+    
+    return removed_backups, store.collect_garbage()
+
+backup_cli = AppGroup('backup', help='Incremental database backups.')
+
+def _store():
+    return BackupStore(current_app.config['BACKUP_DIR'])
+
+@backup_cli.command('create')
+def create_backup_command():
+    """Take an incremental online backup of the app database."""
+    manifest = create_backup(current_app.config['SQLALCHEMY_DATABASE_URI'], _store())
+    click.echo(
+        f"Backup {manifest['id']} created: {manifest['size']} bytes, "
+        f"{manifest['new_chunks']} new chunks ({manifest['stored_bytes']} bytes stored)"
+    )
+
+@backup_cli.command('list')
+def list_backups_command():
+    """List stored backups, oldest first."""
+    for manifest in _store().list_manifests():
+        click.echo(f"{manifest['id']}  {manifest['created_at']}  {manifest['size']} bytes")
+
+@backup_cli.command('restore')
+@click.option('--id', 'backup_id', default=None, help='Backup id to restore.')
+@click.option('--at', default=None, help='Restore the latest backup taken at or before this ISO timestamp.')
+@click.confirmation_option(prompt='This overwrites the current database. Continue?')
+def restore_backup_command(backup_id, at):
+    """Restore the app database from a backup (latest by default)."""
+    store = _store()
+    manifest = find_backup(store, backup_id=backup_id, at=datetime.fromisoformat(at) if at else None)
+    restore_backup(current_app.config['SQLALCHEMY_DATABASE_URI'], store, manifest)
+    click.echo(f"Restored backup {manifest['id']} taken at {manifest['created_at']}")
+
+@backup_cli.command('prune')
+@click.option('--keep-last', type=int, default=None, help='Most recent backups to keep (default: BACKUP_KEEP_LAST).')
+@click.option('--keep-daily', type=int, default=None, help='Days to keep one backup per day for (default: BACKUP_KEEP_DAILY).')
+def prune_backups_command(keep_last, keep_daily):
+    """Delete backups outside the retention policy and unreferenced chunks."""
+    if keep_last is None:
+        keep_last = current_app.config['BACKUP_KEEP_LAST']
+    if keep_daily is None:
+        keep_daily = current_app.config['BACKUP_KEEP_DAILY']
+    
+    removed_backups, removed_chunks = prune_backups(_store(), keep_last=keep_last, keep_daily=keep_daily)
+    click.echo(f'Removed {removed_backups} backups and {removed_chunks} chunks')
@@ -0,0 +1,208 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+class Subscriber:
+    """Bounded buffer of events waiting to be written to one SSE stream"""
+    
+    def __init__(self, user_id, limit):
+        self.user_id = user_id
+        self.limit = limit
+        self.closed = False
+        self.dropped = False
+        self._events = deque()
+        self._cond = threading.Condition()
+    
+    def put(self, event):
+        with self._cond:
+            if self.closed:
+                return
+            if len(self._events) >= self.limit:
+                # Too far behind to catch up from memory; the client reconnects
+                # with Last-Event-ID and is replayed what it can be
+                self.closed = self.dropped = True
+                self._events.clear()
+            else:
+                self._events.append(event)
+            self._cond.notify()
+    
+    def get(self, timeout):
+        """Next ``(event_id, event, data)``, or None after ``timeout`` seconds or once closed"""
+        with self._cond:
+            if not self._events and not self.closed:
+                self._cond.wait(timeout)
+            return self._events.popleft() if self._events else None
+    
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+    
+    def __len__(self):
+        return len(self._events)
+
+class _History:
+    """Recent events of one user, numbered from 1 under a random token"""
+    
+    def __init__(self, limit):
+        self.token = uuid.uuid4().hex[:12]
+        self.events = deque(maxlen=limit)
+        self.last = 0
+    
+    def since(self, last_event_id):
+        """Events after ``last_event_id``, or None if some of them are gone"""
+        token, _, number = last_event_id.rpartition('-')
+        if token != self.token or not number.isdigit() or int(number) > self.last:
+            return None
+        missed = self.last - int(number)
+        if missed > len(self.events):
+            return None
+        return list(self.events)[len(self.events) - missed:]
+
+class ChangeBroadcaster:
+    """Fans committed task events out to the Server-Sent Event streams of this process.
+    
+    Publishing is free for users without a recent stream. Each user who has
+    streamed keeps their last ``SSE_REPLAY_LIMIT`` events (for up to
+    ``SSE_HISTORY_USERS`` users, least recently subscribed dropped first) so
+    a reconnecting client sending ``Last-Event-ID`` gets what it missed, and
+    each open stream buffers at most ``SSE_SUBSCRIBER_BUFFER`` events before
+    it is dropped as too slow. Event payloads are serialized once, however
+    many streams receive them.
+    """
+    
+    def __init__(self, app=None):
+        self.buffer_limit = 0
+        self.replay_limit = 0
+        self.history_users = 0
+        self.max_streams = 0
+        self.dropped = 0
+        self._history = OrderedDict()
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.buffer_limit = app.config['SSE_SUBSCRIBER_BUFFER']
+        self.replay_limit = app.config['SSE_REPLAY_LIMIT']
+        self.history_users = app.config['SSE_HISTORY_USERS']
+        self.max_streams = app.config['SSE_MAX_STREAMS']
+        self.reset()
+        app.extensions['broadcaster'] = self
+    
+    def publish(self, user_id, event, build_payload):
+        """Send ``event`` to ``user_id``'s streams; ``build_payload`` is only called if needed"""
+        if user_id not in self._history:
+            return
+        data = json.dumps(build_payload(), separators=(',', ':'))
+        with self._lock:
+            history = self._history.get(user_id)
+            if history is None:
+                return
+            history.last += 1
+            item = (f'{history.token}-{history.last}', event, data)
+            history.events.append(item)
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscriber in subscribers:
+            subscriber.put(item)
+    
+    def subscribe(self, user_id, last_event_id=None):
+        """Open a stream for ``user_id``.
+        
+        Returns ``(subscriber, backlog)``, where ``backlog`` holds the events
+        after ``last_event_id`` or is None when they can't all be replayed, or
+        None when ``SSE_MAX_STREAMS`` streams are already open.
+        """
+        with self._lock:
+            if self.max_streams and self.stream_count() >= self.max_streams:
+                return None
+            
+            history = self._history.pop(user_id, None)
+            if history is None:
+                history = _History(self.replay_limit)
+                self._evict_history()
+            self._history[user_id] = history
+            
+            subscriber = Subscriber(user_id, self.buffer_limit)
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+            backlog = history.since(last_event_id) if last_event_id else []
+        return subscriber, backlog
+    
+    def unsubscribe(self, subscriber):
+        subscriber.close()
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.user_id, set())
+            if subscriber not in subscribers:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.user_id]
+            if subscriber.dropped:
+                self.dropped += 1
+    
+    def _evict_history(self):
+        # Oldest first, but never the history of a user with an open stream
+        for user_id in list(self._history):
+            if len(self._history) < self.history_users:
+                break
+            if user_id not in self._subscribers:
+                del self._history[user_id]
+    
+    def stream_count(self):
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+    
+    def queued(self):
+        """Events buffered in open streams and not yet written to them"""
+        with self._lock:
+            subscribers = [subscriber for subscribers in self._subscribers.values() for subscriber in subscribers]
+        return sum(len(subscriber) for subscriber in subscribers)
+    
+    def snapshot(self):
+        with self._lock:
+            return {
+                'streams': self.stream_count(),
+                'users_streaming': len(self._subscribers),
+                'users_with_history': len(self._history),
+                'dropped_streams': self.dropped
+            }
+    
+    def reset(self):
+        with self._lock:
+            for subscribers in self._subscribers.values():
+                for subscriber in subscribers:
+                    subscriber.close()
+            self._subscribers.clear()
+            self._history.clear()
+            self.dropped = 0
+
+def format_event(event_id, event, data):
+    return f'id: {event_id}\nevent: {event}\ndata: {data}\n\n'
+
+def sse_stream(subscriber, backlog, heartbeat, max_seconds, retry_ms):
+    """Generator of Server-Sent Event text for one subscriber.
+    
+    Starts with any ``backlog`` (or a ``reset`` event when the client has to
+    refetch), then writes events as they are published and a comment line
+    every ``heartbeat`` seconds so proxies keep the connection open. Ends
+    after ``max_seconds`` or when the subscriber is dropped; the browser
+    reconnects on its own with ``Last-Event-ID``.
+    """
+    yield f'retry: {retry_ms}\n\n'
+    if backlog is None:
+        yield 'event: reset\ndata: {}\n\n'
+    for item in backlog or ():
+        yield format_event(*item)
+    
+    deadline = time.monotonic() + max_seconds
+    while not subscriber.closed:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        item = subscriber.get(min(heartbeat, remaining))
+        if item is not None:
+            yield format_event(*item)
+        elif not subscriber.closed:
+            yield ': keepalive\n\n'
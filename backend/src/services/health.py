@@ -0,0 +1,108 @@
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy.pool import QueuePool
+
+from src.models.user import User, db
+from src.services.cache import TTLCache
+
+class HealthProbe:
+    """Readiness checks of this worker, cached so frequent probes stay cheap.
+    
+    A worker is ready when a small read finishes within
+    ``HEALTH_DB_LATENCY_MS``, its connection pool has a free connection, no
+    in-process queue (SSE stream buffers, group commit, task history) holds
+    more than ``HEALTH_MAX_QUEUE_DEPTH`` items and the Socket.IO server is
+    running. Results are reused for ``HEALTH_CACHE_SECONDS``, so however many
+    probes arrive the database sees at most one check per interval.
+    """
+    
+    def __init__(self, app=None):
+        self.db_latency_ms = 250.0
+        self.max_queue_depth = 1000
+        self.started_at = time.monotonic()
+        self._cache = TTLCache(maxsize=1)
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.db_latency_ms = app.config['HEALTH_DB_LATENCY_MS']
+        self.max_queue_depth = app.config['HEALTH_MAX_QUEUE_DEPTH']
+        self._cache = TTLCache(maxsize=1, ttl=app.config['HEALTH_CACHE_SECONDS'])
+        app.extensions['health'] = self
+    
+    def liveness(self):
+        """The process is up and serving requests; never touches the database"""
+        return {'status': 'alive', 'pid': os.getpid(), 'uptime_seconds': round(time.monotonic() - self.started_at, 1)}
+    
+    def readiness(self):
+        """``(ready, report)``, from the cache when it is fresh enough"""
+        result = self._cache.get('ready')
+        if result is None:
+            result = self._check()
+            if self._cache.ttl > 0:
+                self._cache.set('ready', result)
+        return result
+    
+    def _check(self):
+        pool = self.check_pool()
+        checks = {
+            'pool': pool,
+            # Waiting on an exhausted pool could take pool_timeout seconds
+            'database': self.check_database() if pool['ok'] else {'ok': False, 'error': 'No free connection'},
+            'queues': self.check_queues(),
+            'socketio': self.check_socketio()
+        }
+        ready = all(check['ok'] for check in checks.values())
+        return ready, {
+            'status': 'ready' if ready else 'not_ready',
+            'checks': checks,
+            'checked_at': datetime.utcnow().isoformat()
+        }
+    
+    def check_database(self):
+        """Time a one-row read through a pooled connection"""
+        started = time.perf_counter()
+        try:
+            with db.engine.connect() as connection:
+                connection.execute(db.select(User.id).limit(1)).all()
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        return {'ok': latency_ms <= self.db_latency_ms, 'latency_ms': latency_ms, 'threshold_ms': self.db_latency_ms}
+    
+    def check_pool(self):
+        pool = db.engine.pool
+        if not isinstance(pool, QueuePool):
+            # SQLite memory and single-thread pools never run out
+            return {'ok': True, 'pool': type(pool).__name__}
+        checked_out = pool.checkedout()
+        max_overflow = pool._max_overflow
+        capacity = None if max_overflow < 0 else pool.size() + max_overflow
+        return {
+            'ok': capacity is None or checked_out < capacity,
+            'pool': type(pool).__name__,
+            'checked_out': checked_out,
+            'capacity': capacity
+        }
+    
+    def check_queues(self):
+        # Imported here, as extensions imports this module
+        from src.extensions import broadcaster, group_commit, task_history
+        depths = {
+            'streams': broadcaster.queued(),
+            'group_commit': group_commit.queued(),
+            'task_history': task_history.snapshot()['buffered']
+        }
+        return {'ok': max(depths.values()) <= self.max_queue_depth, 'limit': self.max_queue_depth, **depths}
+    
+    def check_socketio(self):
+        from src.extensions import socketio
+        server = socketio.server
+        if server is None:
+            return {'ok': False, 'error': 'Socket.IO server not initialized'}
+        # A message queue (when configured) is read by a background listener
+        listener = getattr(server.manager, 'thread', None)
+        listening = listener is None or not hasattr(listener, 'is_alive') or listener.is_alive()
+        return {'ok': listening, 'async_mode': server.async_mode}
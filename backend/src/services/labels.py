@@ -0,0 +1,117 @@
+from collections import Counter
+
+from src.models.label import Label, TaskLabel
+from src.models.task import db
+
+MAX_LABEL_LENGTH = 50
+
+def parse_label_names(value):
+    """Label names from a list or comma-separated string: trimmed, lowercased, without repeats.
+    
+    Raises ValueError for a name that isn't a string or is too long.
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list):
+        raise ValueError('Labels must be a list of names')
+    
+    names = []
+    for name in value:
+        if not isinstance(name, str):
+            raise ValueError('Label names must be strings')
+        name = name.strip().lower()
+        if len(name) > MAX_LABEL_LENGTH:
+            raise ValueError(f'Label names are at most {MAX_LABEL_LENGTH} characters')
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def _tasks_labelled(name):
+    """SELECT of the ids of tasks labelled ``name``, a range scan of the label index"""
+    label_id = db.select(Label.id).where(Label.name == name).scalar_subquery()
+    return db.select(TaskLabel.task_id).where(TaskLabel.label_id == label_id)
+
+def label_criteria(model, labels=(), exclude_labels=()):
+    """WHERE clauses keeping tasks with every one of ``labels`` and none of ``exclude_labels``.
+    
+    The task ids under each label are intersected in the database before
+    they are matched against ``model``, so the cost follows the size of the
+    smallest label rather than the number of tasks the user can see.
+    """
+    criteria = []
+    if labels:
+        selects = [_tasks_labelled(name) for name in labels]
+        matching = selects[0] if len(selects) == 1 else db.intersect(*selects)
+        criteria.append(model.id.in_(matching))
+    if exclude_labels:
+        criteria.append(model.id.not_in(
+            db.select(TaskLabel.task_id)
+            .join(Label, Label.id == TaskLabel.label_id)
+            .where(Label.name.in_(exclude_labels))
+        ))
+    return criteria
+
+def task_labels_query(task_ids):
+    """Cached SELECT of ``(task_id, label name)`` for a list of task ids"""
+    task_ids = list(task_ids)
+    return db.lambda_stmt(lambda: (
+        db.select(TaskLabel.task_id, Label.name)
+        .join(Label, Label.id == TaskLabel.label_id)
+        .where(TaskLabel.task_id.in_(task_ids))
+        .order_by(Label.name)
+    ))
+
+def group_labels(rows):
+    """``{task_id: [label names]}`` from the rows of :func:`task_labels_query`"""
+    labels = {}
+    for task_id, name in rows:
+        labels.setdefault(task_id, []).append(name)
+    return labels
+
+def task_labels(task_ids):
+    """``{task_id: [label names]}`` for a list of task ids, in one query"""
+    return group_labels(db.session.execute(task_labels_query(task_ids)))
+
+def with_labels(tasks, labels):
+    """Add each task dict's label names from a :func:`task_labels` dict, returning ``tasks``"""
+    for task in tasks:
+        task['labels'] = labels.get(task['id'], [])
+    return tasks
+
+def label_counts(labels):
+    """``{label name: tasks}`` over a :func:`task_labels` dict"""
+    return dict(Counter(name for names in labels.values() for name in names))
+
+def set_task_labels(task_id, names):
+    """Replace the labels on ``task_id`` with ``names``, creating labels that don't exist yet.
+    
+    Returns the names in the order :func:`task_labels` lists them.
+    """
+    labels = Label.__table__
+    label_ids = {}
+    if names:
+        label_ids = dict(db.session.execute(
+            db.select(labels.c.name, labels.c.id).where(labels.c.name.in_(names))
+        ).all())
+        missing = [name for name in names if name not in label_ids]
+        if missing:
+            label_ids.update(db.session.execute(
+                db.insert(labels).returning(labels.c.name, labels.c.id),
+                [{'name': name} for name in missing]
+            ).all())
+    
+    task_labels_table = TaskLabel.__table__
+    db.session.execute(db.delete(task_labels_table).where(task_labels_table.c.task_id == task_id))
+    if label_ids:
+        db.session.execute(
+            db.insert(task_labels_table),
+            [{'task_id': task_id, 'label_id': label_id} for label_id in label_ids.values()]
+        )
+    return sorted(label_ids)
+
+def delete_task_labels(task_id):
+    """Take every label off ``task_id``"""
+    task_labels_table = TaskLabel.__table__
+    db.session.execute(db.delete(task_labels_table).where(task_labels_table.c.task_id == task_id))
@@ -0,0 +1,61 @@
+from itertools import islice
+
+from src.models.user import User, db
+
+def wants_normalized(args):
+    """Whether a request asked for ``?normalize=true``"""
+    return args.get('normalize', 'false').lower() == 'true'
+
+def referenced_user_ids(tasks):
+    """Creator and assignee ids of task objects or export rows"""
+    ids = set()
+    for task in tasks:
+        if isinstance(task, dict):
+            ids.update((task['created_by'], task['assigned_to']))
+        else:
+            ids.update((task.created_by, task.assigned_to))
+    ids.discard(None)
+    return ids
+
+def users_query(user_ids):
+    """Cached SELECT of the users with the given ids"""
+    user_ids = sorted(user_ids)
+    return db.lambda_stmt(lambda: db.select(User).where(User.id.in_(user_ids)))
+
+def user_map(users):
+    """``{id: user}``, keyed by string ids as JSON object keys come out"""
+    return {str(user.id): user.to_dict() for user in users}
+
+def load_user_map(tasks):
+    """The users referenced by ``tasks``, loaded with one IN query"""
+    user_ids = referenced_user_ids(tasks)
+    if not user_ids:
+        return {}
+    return user_map(db.session.execute(users_query(user_ids)).scalars())
+
+def normalized_tasks(tasks, users):
+    """``tasks`` with user ids only, and each user they reference once in ``users``"""
+    return {
+        'tasks': [task.to_dict(include_users=False) for task in tasks],
+        'users': users
+    }
+
+def iter_with_users(rows, batch_size=1000):
+    """Yield export rows with a ``{'user': ...}`` record ahead of the first row referencing each user.
+    
+    Users are looked up once per ``batch_size`` rows, one IN query for the
+    ones not yet written, so the stream stays flat in memory apart from the
+    set of ids already sent.
+    """
+    rows = iter(rows)
+    sent = set()
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        user_ids = referenced_user_ids(batch) - sent
+        if user_ids:
+            sent |= user_ids
+            for user in db.session.execute(users_query(user_ids)).scalars():
+                yield {'user': user.to_dict()}
+        yield from batch
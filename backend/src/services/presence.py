@@ -0,0 +1,287 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+
+from flask import current_app
+
+class MemoryPresenceStore:
+    """Connection counts and pending events held in this process"""
+    
+    def __init__(self, max_queues=10000):
+        self.max_queues = max_queues
+        self._counts = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+    
+    def connect(self, user_id):
+        with self._lock:
+            self._counts[user_id] = self._counts.get(user_id, 0) + 1
+            return self._counts[user_id]
+    
+    def disconnect(self, user_id):
+        with self._lock:
+            count = self._counts.get(user_id, 0) - 1
+            if count > 0:
+                self._counts[user_id] = count
+            else:
+                self._counts.pop(user_id, None)
+            return max(count, 0)
+    
+    def online(self, user_ids):
+        """Return the subset of ``user_ids`` with at least one connection"""
+        with self._lock:
+            return {user_id for user_id in user_ids if user_id in self._counts}
+    
+    def counts(self, keys):
+        with self._lock:
+            return [self._counts.get(key, 0) for key in keys]
+    
+    def push_pending(self, user_id, event, payload, limit, ttl):
+        now = time.monotonic()
+        with self._lock:
+            queue = self._pending.get(user_id)
+            if queue is None:
+                if len(self._pending) >= self.max_queues:
+                    self._evict_expired(now)
+                queue = self._pending[user_id] = deque(maxlen=limit)
+            queue.append((now + ttl, event, payload))
+    
+    def pop_pending(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            queue = self._pending.pop(user_id, ())
+        return [(event, payload) for expires_at, event, payload in queue if expires_at > now]
+    
+    def _evict_expired(self, now):
+        # A queue whose newest event has expired holds nothing deliverable
+        for user_id in [k for k, queue in self._pending.items() if queue[-1][0] <= now]:
+            del self._pending[user_id]
+    
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._pending.clear()
+
+class RedisPresenceStore:
+    """Connection counts and pending events shared by every worker through Redis.
+    
+    Besides the total per user, each worker counts the connections it holds
+    in a hash of its own and records a heartbeat in a sorted set. Whichever
+    worker next finds a heartbeat older than ``heartbeat_ttl`` subtracts
+    that worker's connections, so users of a worker that died without
+    disconnecting them go offline.
+    """
+    
+    CONNECT_SCRIPT = """
+    redis.call('HINCRBY', KEYS[2], ARGV[1], 1)
+    redis.call('ZADD', KEYS[3], ARGV[2], ARGV[3])
+    return redis.call('HINCRBY', KEYS[1], ARGV[1], 1)
+    """
+    
+    DISCONNECT_SCRIPT = """
+    local held = redis.call('HINCRBY', KEYS[2], ARGV[1], -1)
+    if held <= 0 then
+        redis.call('HDEL', KEYS[2], ARGV[1])
+    end
+    if held < 0 then
+        -- Already subtracted when this worker was taken for dead
+        return tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or 0)
+    end
+    local count = redis.call('HINCRBY', KEYS[1], ARGV[1], -1)
+    if count <= 0 then
+        redis.call('HDEL', KEYS[1], ARGV[1])
+        count = 0
+    end
+    return count
+    """
+    
+    REAP_SCRIPT = """
+    local dead = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+    for _, worker in ipairs(dead) do
+        local key = ARGV[2] .. worker
+        local held = redis.call('HGETALL', key)
+        for i = 1, #held, 2 do
+            if redis.call('HINCRBY', KEYS[1], held[i], -tonumber(held[i + 1])) <= 0 then
+                redis.call('HDEL', KEYS[1], held[i])
+            end
+        end
+        redis.call('DEL', key)
+        redis.call('ZREM', KEYS[2], worker)
+    end
+    return #dead
+    """
+    
+    def __init__(self, url, prefix='presence:', heartbeat_ttl=60):
+        # Optional dependency, only needed for multi-worker deployments
+        import redis
+        
+        self.prefix = prefix
+        self.heartbeat_ttl = heartbeat_ttl
+        self._counts_key = f'{prefix}counts'
+        self._workers_key = f'{prefix}workers'
+        self._client = redis.Redis.from_url(url)
+        self._connect = self._client.register_script(self.CONNECT_SCRIPT)
+        self._disconnect = self._client.register_script(self.DISCONNECT_SCRIPT)
+        self._reap = self._client.register_script(self.REAP_SCRIPT)
+        self._worker = None
+        self._thread = None
+    
+    @property
+    def worker_id(self):
+        # Per process, as workers forked from a preloading master share this store
+        pid = os.getpid()
+        if self._worker is None or self._worker[0] != pid:
+            self._worker = (pid, f'{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}')
+        return self._worker[1]
+    
+    def _worker_key(self):
+        return f'{self.prefix}worker:{self.worker_id}'
+    
+    def connect(self, user_id):
+        self._start_heartbeat()
+        return int(self._connect(
+            keys=[self._counts_key, self._worker_key(), self._workers_key],
+            args=[user_id, time.time(), self.worker_id]
+        ))
+    
+    def disconnect(self, user_id):
+        return int(self._disconnect(keys=[self._counts_key, self._worker_key()], args=[user_id]))
+    
+    def heartbeat(self, now=None):
+        """Mark this worker alive and subtract the connections of workers that stopped; returns how many"""
+        now = time.time() if now is None else now
+        self._client.zadd(self._workers_key, {self.worker_id: now})
+        return int(self._reap(
+            keys=[self._counts_key, self._workers_key],
+            args=[now - self.heartbeat_ttl, f'{self.prefix}worker:']
+        ))
+    
+    def _start_heartbeat(self):
+        # Started lazily so a preloading master doesn't start it before forking
+        thread = self._thread
+        if thread is None or thread.pid != os.getpid() or not thread.is_alive():
+            thread = threading.Thread(
+                target=self._run_heartbeat, args=(current_app._get_current_object(),),
+                name='presence-heartbeat', daemon=True
+            )
+            thread.pid = os.getpid()
+            thread.start()
+            self._thread = thread
+    
+    def _run_heartbeat(self, app):
+        while True:
+            try:
+                self.heartbeat()
+            except Exception:
+                app.logger.exception('Error refreshing the presence heartbeat')
+            time.sleep(self.heartbeat_ttl / 3)
+    
+    def online(self, user_ids):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        counts = self._client.hmget(self._counts_key, user_ids)
+        return {user_id for user_id, count in zip(user_ids, counts) if count is not None}
+    
+    def counts(self, keys):
+        return [int(count or 0) for count in self._client.hmget(self._counts_key, list(keys))]
+    
+    def push_pending(self, user_id, event, payload, limit, ttl):
+        key = f'{self.prefix}pending:{user_id}'
+        pipe = self._client.pipeline()
+        pipe.rpush(key, json.dumps([event, payload]))
+        pipe.ltrim(key, -limit, -1)
+        pipe.expire(key, ttl)
+        pipe.execute()
+    
+    def pop_pending(self, user_id):
+        key = f'{self.prefix}pending:{user_id}'
+        pipe = self._client.pipeline()
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+        items, _ = pipe.execute()
+        return [tuple(json.loads(item)) for item in items]
+    
+    def reset(self):
+        for key in self._client.scan_iter(f'{self.prefix}*'):
+            self._client.delete(key)
+
+class Presence:
+    """Tracks which users have a live Socket.IO connection.
+    
+    Each user's connections are counted in a store shared by all workers
+    (``PRESENCE_STORAGE_URL``) so events are only built and sent for users
+    who can receive them. Events for offline users are kept in a short,
+    capped queue (``PRESENCE_QUEUE_LIMIT`` per user, ``PRESENCE_QUEUE_TTL``
+    seconds) and replayed when they reconnect.
+    
+    Connections that negotiated MessagePack are also counted under
+    ``"<user_id>:msgpack"``, so senders know which encodings to produce.
+    """
+    
+    def __init__(self, app=None):
+        self.store = None
+        self.queue_limit = 0
+        self.queue_ttl = 0
+        # Socket ids connected to this worker, so disconnects can be attributed
+        self._sids = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        storage_url = app.config['PRESENCE_STORAGE_URL']
+        if storage_url:
+            self.store = RedisPresenceStore(storage_url, heartbeat_ttl=app.config['PRESENCE_HEARTBEAT_TTL'])
+        else:
+            self.store = MemoryPresenceStore()
+        self.queue_limit = app.config['PRESENCE_QUEUE_LIMIT']
+        self.queue_ttl = app.config['PRESENCE_QUEUE_TTL']
+        with self._lock:
+            self._sids.clear()
+        app.extensions['presence'] = self
+    
+    def connect(self, sid, user_id, encoding='json'):
+        with self._lock:
+            self._sids[sid] = (user_id, encoding)
+        if encoding != 'json':
+            self.store.connect(f'{user_id}:{encoding}')
+        return self.store.connect(user_id)
+    
+    def disconnect(self, sid):
+        """Forget ``sid``; returns its user id, or None if it never authenticated"""
+        with self._lock:
+            user_id, encoding = self._sids.pop(sid, (None, None))
+        if user_id is not None:
+            if encoding != 'json':
+                self.store.disconnect(f'{user_id}:{encoding}')
+            self.store.disconnect(user_id)
+        return user_id
+    
+    def is_online(self, user_id):
+        return bool(self.store.online([user_id]))
+    
+    def online(self, user_ids):
+        return self.store.online(user_ids)
+    
+    def encodings(self, user_id):
+        """Set of payload encodings used by ``user_id``'s live connections"""
+        total, msgpack = self.store.counts([user_id, f'{user_id}:msgpack'])
+        encodings = set()
+        if total > msgpack:
+            encodings.add('json')
+        if msgpack:
+            encodings.add('msgpack')
+        return encodings
+    
+    def queue(self, user_id, event, payload):
+        if self.queue_limit > 0:
+            self.store.push_pending(user_id, event, payload, self.queue_limit, self.queue_ttl)
+    
+    def pending(self, user_id):
+        """Remove and return the ``(event, payload)`` pairs queued for ``user_id``"""
+        return self.store.pop_pending(user_id)
@@ -0,0 +1,288 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+import click
+from flask import current_app, g, request
+from flask.cli import AppGroup
+from itsdangerous import BadData, URLSafeTimedSerializer
+
+TOKEN_HEADER = 'X-Profile-Token'
+TOKEN_SALT = 'profiler'
+
+def _serializer(app):
+    return URLSafeTimedSerializer(app.config['SECRET_KEY'], salt=TOKEN_SALT)
+
+def make_token(app):
+    """A signed token granting profiler access until PROFILER_TOKEN_MAX_AGE expires"""
+    return _serializer(app).dumps('profiler')
+
+def verify_token(app, token):
+    try:
+        _serializer(app).loads(token, max_age=app.config['PROFILER_TOKEN_MAX_AGE'])
+    except BadData:
+        return False
+    return True
+
+def _threads_are_greenlets():
+    """Whether gevent has patched threading, so concurrent requests share one OS thread"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}"
+
+class StackSampler:
+    """Background thread counting the stacks of every thread in this process.
+    
+    Every ``interval`` seconds the current frame of each other thread is
+    recorded as a folded stack (``outer;...;inner``). The counts are written
+    to ``path`` every ``flush_every`` seconds in the format flamegraph.pl and
+    speedscope read.
+    """
+    
+    def __init__(self, path, interval, flush_every=30):
+        self.path = path
+        self.interval = interval
+        self.flush_every = flush_every
+        self.pid = os.getpid()
+        self.samples = 0
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+    
+    @property
+    def running(self):
+        return self._thread.is_alive() and not self._stop.is_set()
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+    
+    def sample(self):
+        own_id = threading.get_ident()
+        stacks = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            stacks.append(';'.join(reversed(names)))
+        with self._lock:
+            self._stacks.update(stacks)
+            self.samples += 1
+    
+    def folded(self):
+        with self._lock:
+            return ''.join(f'{stack} {count}\n' for stack, count in self._stacks.most_common())
+    
+    def flush(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.folded())
+        os.replace(tmp_path, self.path)
+    
+    def _run(self):
+        last_flush = time.monotonic()
+        while not self._stop.wait(self.interval):
+            self.sample()
+            if time.monotonic() - last_flush >= self.flush_every:
+                self.flush()
+                last_flush = time.monotonic()
+
+class Profiler:
+    """Admin-only request profiling and whole-process stack sampling.
+    
+    With ``PROFILER_ENABLED`` set, a request carrying a valid
+    ``X-Profile-Token`` header (see ``flask profiler token``), or one picked
+    at random at ``request_rate``, runs under cProfile and its stats are
+    saved in ``PROFILER_DIR`` (the newest ``PROFILER_KEEP`` are kept). The
+    stack sampler writes folded stacks for the whole worker to the same
+    directory. ``request_rate`` and the sampler can be changed at runtime
+    through ``/api/admin/profiler``; like everything else here they apply
+    to the worker that handles the call. Profiling stays off under gevent,
+    where requests are greenlets sharing one thread.
+    """
+    
+    def __init__(self, app=None):
+        self.enabled = False
+        self.directory = None
+        self.keep = 0
+        self.request_rate = 0.0
+        self.sample_interval = 0.0
+        self._sampler = None
+        self._sampler_wanted = False
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config['PROFILER_ENABLED']
+        if self.enabled and _threads_are_greenlets():
+            # cProfile and sys._current_frames() only see OS threads, which
+            # every greenlet of a gevent worker shares
+            app.logger.warning('PROFILER_ENABLED is ignored: profiling needs thread workers, not gevent')
+            self.enabled = False
+        self.directory = config['PROFILER_DIR']
+        self.keep = config['PROFILER_KEEP']
+        self.request_rate = config['PROFILER_REQUEST_RATE']
+        self.sample_interval = config['PROFILER_SAMPLE_INTERVAL_MS'] / 1000
+        self.set_sampler(False)
+        self._sampler_wanted = config['PROFILER_SAMPLER']
+        app.extensions['profiler'] = self
+        if self.enabled:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+            app.teardown_request(self._teardown_request)
+    
+    def _before_request(self):
+        # Started lazily so a preloading master doesn't start it before forking
+        if self._sampler_wanted and not self.sampler_running:
+            self.set_sampler(True)
+        
+        # The admin endpoints send a token too, but aren't worth profiling
+        if request.blueprint == 'profiler':
+            return None
+        
+        token = request.headers.get(TOKEN_HEADER)
+        if token:
+            if not verify_token(current_app, token):
+                return None
+        elif not (self.request_rate and random.random() < self.request_rate):
+            return None
+        
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already active in this thread
+            return None
+        g._profile = profile
+        g._profile_started = time.perf_counter()
+        return None
+    
+    def _after_request(self, response):
+        name = self._finish_profile()
+        if name is not None:
+            response.headers['X-Profile-Id'] = name
+        return response
+    
+    def _teardown_request(self, exc):
+        # after_request is skipped when the request raises, which would leave
+        # the profiler running on this thread for every later request
+        self._finish_profile()
+    
+    def _finish_profile(self):
+        """Stop and save the current request's profile; returns its name, or None if not profiled"""
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return None
+        profile.disable()
+        
+        elapsed_ms = (time.perf_counter() - g.pop('_profile_started')) * 1000
+        name = '{}-{}-{}-{:.0f}ms-{}.prof'.format(
+            datetime.utcnow().strftime('%Y%m%dT%H%M%S'), os.getpid(),
+            request.endpoint or 'unmatched', elapsed_ms, uuid.uuid4().hex[:6]
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        profile.dump_stats(os.path.join(self.directory, name))
+        self._prune()
+        return name
+    
+    def dumps(self):
+        """Saved request profiles, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.prof')]
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        return entries
+    
+    def _prune(self):
+        for entry in self.dumps()[self.keep:]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+    
+    def dump_path(self, name):
+        """Path of a saved profile, or None for names that aren't one"""
+        if os.path.basename(name) != name or not name.endswith('.prof'):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+    
+    @staticmethod
+    def summary(path, sort='cumulative', limit=40):
+        """pstats text report of a saved profile"""
+        stream = io.StringIO()
+        pstats.Stats(path, stream=stream).sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+    
+    @property
+    def sampler_running(self):
+        sampler = self._sampler
+        return sampler is not None and sampler.pid == os.getpid() and sampler.running
+    
+    @property
+    def stacks_path(self):
+        return os.path.join(self.directory, f'stacks-{os.getpid()}.folded')
+    
+    def set_sampler(self, running):
+        with self._lock:
+            self._sampler_wanted = running
+            if running and not self.sampler_running:
+                self._sampler = StackSampler(self.stacks_path, self.sample_interval)
+                self._sampler.start()
+            elif not running and self.sampler_running:
+                self._sampler.stop()
+    
+    def folded_stacks(self):
+        """Folded stacks sampled so far in this worker, or None if it never sampled"""
+        sampler = self._sampler
+        if sampler is None or sampler.pid != os.getpid():
+            return None
+        return sampler.folded()
+    
+    def status(self):
+        sampler = self._sampler if self.sampler_running else None
+        return {
+            'pid': os.getpid(),
+            'request_rate': self.request_rate,
+            'sampler': {
+                'running': sampler is not None,
+                'interval_ms': self.sample_interval * 1000,
+                'samples': sampler.samples if sampler else 0
+            },
+            'dumps': len(self.dumps())
+        }
+
+profiler_cli = AppGroup('profiler', help='Request profiling and stack sampling.')
+
+@profiler_cli.command('token')
+def profiler_token_command():
+    """Print a token for the X-Profile-Token header and the admin endpoints."""
+    click.echo(make_token(current_app))
+    max_age = current_app.config['PROFILER_TOKEN_MAX_AGE']
+    click.echo(f'Valid for {max_age // 60} minutes', err=True)
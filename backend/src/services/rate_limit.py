@@ -0,0 +1,163 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+class MemoryBucketStore:
+    """Token buckets held in this process, least recently used first"""
+    
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def consume(self, key, cost, rate, burst, now=None):
+        """Take ``cost`` tokens from ``key``'s bucket.
+        
+        Returns ``(allowed, retry_after)`` where ``retry_after`` is the number
+        of seconds until enough tokens will be available.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (cost - tokens) / rate
+            self._buckets.move_to_end(key)
+            
+            if len(self._buckets) > self.max_keys:
+                self._evict_idle(now, rate, burst)
+        return allowed, retry_after
+    
+    def _evict_idle(self, now, rate, burst):
+        # A bucket idle long enough to have refilled completely is
+        # indistinguishable from a new one, so it can be dropped. The idle
+        # ones are at the front, so this only looks at buckets it drops,
+        # plus one. Past max_keys the least recently used go regardless.
+        idle_after = burst / rate
+        while self._buckets:
+            _, updated_at = next(iter(self._buckets.values()))
+            if now - updated_at < idle_after and len(self._buckets) <= self.max_keys:
+                break
+            self._buckets.popitem(last=False)
+    
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+class RedisBucketStore:
+    """Token buckets shared by every worker through Redis"""
+    
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local now = tonumber(ARGV[4])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local retry_after = 0
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        retry_after = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(retry_after)}
+    """
+    
+    def __init__(self, url, prefix='ratelimit:'):
+        # Optional dependency, only needed for multi-worker deployments
+        import redis
+        
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+    
+    def consume(self, key, cost, rate, burst, now=None):
+        now = time.time() if now is None else now
+        allowed, retry_after = self._script(keys=[self.prefix + key], args=[rate, burst, cost, now])
+        return bool(allowed), float(retry_after)
+    
+    def reset(self):
+        for key in self._client.scan_iter(f'{self.prefix}*'):
+            self._client.delete(key)
+
+class RateLimiter:
+    """Per-client token-bucket rate limiting and global concurrency shedding.
+    
+    Clients are identified by JWT identity when a valid token is sent and by
+    IP address otherwise. Each endpoint costs ``RATE_LIMIT_COSTS[endpoint]``
+    tokens (``RATE_LIMIT_DEFAULT_COST`` if not listed). Requests over budget
+    get 429, and requests beyond ``MAX_CONCURRENT_REQUESTS`` in flight get 503
+    straight away instead of queueing.
+    """
+    
+    def __init__(self, app=None):
+        self.store = None
+        self._slots = None
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        storage_url = app.config['RATE_LIMIT_STORAGE_URL']
+        self.store = RedisBucketStore(storage_url) if storage_url else MemoryBucketStore()
+        
+        max_concurrent = app.config['MAX_CONCURRENT_REQUESTS']
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions['rate_limiter'] = self
+    
+    def _client_key(self):
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except Exception:
+            # Invalid or expired tokens are rejected by the view itself
+            identity = None
+        if identity is not None:
+            return f'user:{identity}'
+        return f'ip:{request.remote_addr}'
+    
+    def _before_request(self):
+        config = current_app.config
+        if not config['RATE_LIMIT_ENABLED'] or not request.path.startswith('/api/') \
+                or request.endpoint in config['RATE_LIMIT_EXEMPT'] or request.method == 'OPTIONS':
+            return None
+        
+        if self._slots is not None:
+            if not self._slots.acquire(blocking=False):
+                return self._reject('Server is busy, please retry', 503, 1)
+            g._rate_limit_slot = True
+        
+        burst = config['RATE_LIMIT_BURST']
+        cost = min(config['RATE_LIMIT_COSTS'].get(request.endpoint, config['RATE_LIMIT_DEFAULT_COST']), burst)
+        allowed, retry_after = self.store.consume(
+            self._client_key(), cost, config['RATE_LIMIT_PER_SECOND'], burst
+        )
+        if not allowed:
+            return self._reject('Too many requests', 429, retry_after)
+        return None
+    
+    def _teardown_request(self, exc):
+        if g.pop('_rate_limit_slot', False):
+            self._slots.release()
+    
+    def _reject(self, message, status, retry_after):
+        response = jsonify({'error': message})
+        response.status_code = status
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
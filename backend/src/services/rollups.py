@@ -0,0 +1,203 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src.models.task import Task, TaskStatus, db
+from src.models.task_archive import TaskArchive
+from src.models.task_stats import TaskDailyStats
+
+OPEN_STATUSES = (TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
+METRICS = ('created', 'entered', 'exited', 'completion_seconds')
+# Dialects whose INSERT has on_conflict_do_update
+UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def _owners(state):
+    if state is None:
+        return set()
+    return {state['created_by'], state['assigned_to']} - {None}
+
+def task_change_deltas(before, after, when):
+    """Rollup increments for one task going from ``before`` to ``after``.
+    
+    Both are dicts with ``status``, ``created_by``, ``assigned_to`` and
+    ``created_at``, or None for a create (``before``) or delete (``after``).
+    Returns a Counter keyed by ``(user_id, day, status, metric)``.
+    """
+    deltas = Counter()
+    day = when.date()
+    old_owners, new_owners = _owners(before), _owners(after)
+    status_changed = before is None or after is None or before['status'] != after['status']
+    
+    for user_id in old_owners:
+        if status_changed or user_id not in new_owners:
+            deltas[(user_id, day, before['status'], 'exited')] += 1
+    
+    for user_id in new_owners:
+        if status_changed or user_id not in old_owners:
+            deltas[(user_id, day, after['status'], 'entered')] += 1
+            if before is None:
+                deltas[(user_id, day, after['status'], 'created')] += 1
+            if after['status'] == TaskStatus.COMPLETED and after['created_at']:
+                deltas[(user_id, day, after['status'], 'completion_seconds')] += \
+                    max(0, int((when - after['created_at']).total_seconds()))
+    
+    return deltas
+
+def task_state(task):
+    """The fields of a Task, task row or dict of task values that rollups depend on"""
+    fields = ('status', 'created_by', 'assigned_to', 'created_at')
+    if isinstance(task, dict):
+        return {field: task.get(field) for field in fields}
+    return {field: getattr(task, field) for field in fields}
+
+def replay_deltas(task):
+    """Rollup increments for a task whose history isn't known.
+    
+    The task is treated as created pending on its ``created_at`` day and,
+    unless still pending, moved to its current status on its ``updated_at``
+    day.
+    """
+    state = task_state(task)
+    created = dict(state, status=TaskStatus.PENDING)
+    deltas = task_change_deltas(None, created, state['created_at'])
+    if state['status'] != TaskStatus.PENDING:
+        updated_at = task['updated_at'] if isinstance(task, dict) else task.updated_at
+        deltas.update(task_change_deltas(created, state, updated_at))
+    return deltas
+
+def record_task_change(before, after, when=None):
+    """Add one task change to ``task_daily_stats`` in the current transaction"""
+    apply_deltas(task_change_deltas(before, after, when or datetime.utcnow()))
+
+def delta_rows(deltas):
+    """Group a Counter from :func:`task_change_deltas` by ``(user_id, day, status)``"""
+    rows = {}
+    for (user_id, day, status, metric), amount in deltas.items():
+        if amount:
+            rows.setdefault((user_id, day, status), dict.fromkeys(METRICS, 0))[metric] += amount
+    return rows
+
+def upsert_statement(dialect_name):
+    """INSERT into ``task_daily_stats`` that adds to the row already there, or None if unsupported"""
+    insert = UPSERT_INSERTS.get(dialect_name)
+    if insert is None:
+        return None
+    stats = TaskDailyStats.__table__
+    statement = insert(stats)
+    return statement.on_conflict_do_update(
+        index_elements=[stats.c.user_id, stats.c.day, stats.c.status],
+        set_={metric: stats.c[metric] + statement.excluded[metric] for metric in METRICS}
+    )
+
+def apply_deltas(deltas):
+    """Fold a Counter from :func:`task_change_deltas` into ``task_daily_stats``.
+    
+    On PostgreSQL and SQLite this is one INSERT ... ON CONFLICT DO UPDATE,
+    so concurrent writers creating the same row add to it rather than
+    racing to insert it. Rows go in key order, so two transactions never
+    wait on each other's rows the other way round.
+    """
+    stats = TaskDailyStats.__table__
+    rows = sorted(
+        ({'user_id': user_id, 'day': day, 'status': status, **values}
+         for (user_id, day, status), values in delta_rows(deltas).items()),
+        key=lambda row: (row['user_id'], row['day'], row['status'].name)
+    )
+    if not rows:
+        return
+    
+    statement = upsert_statement(db.engine.dialect.name)
+    if statement is not None:
+        db.session.execute(statement, rows)
+        return
+    
+    for row in rows:
+        result = db.session.execute(
+            db.update(stats)
+            .where(stats.c.user_id == row['user_id'], stats.c.day == row['day'], stats.c.status == row['status'])
+            .values({metric: stats.c[metric] + row[metric] for metric in METRICS if row[metric]})
+        )
+        if result.rowcount == 0:
+            db.session.execute(db.insert(stats).values(row))
+
+def backfill_rollups(batch_size=1000):
+    """Rebuild ``task_daily_stats`` from the current and archived tasks.
+    
+    Past transitions aren't stored, so every task is replayed with
+    :func:`replay_deltas`. Returns the number of tasks replayed.
+    """
+    deltas = Counter()
+    replayed = 0
+    for table in (Task.__table__, TaskArchive.__table__):
+        query = db.select(
+            table.c.status, table.c.created_by, table.c.assigned_to, table.c.created_at, table.c.updated_at
+        )
+        for row in db.session.execute(query, execution_options={'yield_per': batch_size}):
+            deltas.update(replay_deltas(row))
+            replayed += 1
+    
+    try:
+        db.session.execute(db.delete(TaskDailyStats.__table__))
+        apply_deltas(deltas)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return replayed
+
+def task_analytics(user_id, start, end):
+    """Daily created/completed/open counts for ``user_id`` from ``start`` to ``end`` inclusive"""
+    stats = TaskDailyStats.__table__
+    
+    # Open tasks at the start of the range, carried forward for the burndown
+    open_tasks = db.session.execute(
+        db.select(db.func.coalesce(db.func.sum(stats.c.entered - stats.c.exited), 0))
+        .where(stats.c.user_id == user_id, stats.c.day < start, stats.c.status.in_(OPEN_STATUSES))
+    ).scalar()
+    
+    rows = db.session.execute(
+        db.select(stats)
+        .where(stats.c.user_id == user_id, stats.c.day >= start, stats.c.day <= end)
+    ).all()
+    by_day = {}
+    for row in rows:
+        by_day.setdefault(row.day, []).append(row)
+    
+    days = []
+    created_total = completed_total = completion_seconds = 0
+    day = start
+    while day <= end:
+        created = completed = 0
+        for row in by_day.get(day, ()):
+            created += row.created
+            if row.status in OPEN_STATUSES:
+                open_tasks += row.entered - row.exited
+            if row.status == TaskStatus.COMPLETED:
+                completed += row.entered
+                completion_seconds += row.completion_seconds
+        
+        days.append({'date': day.isoformat(), 'created': created, 'completed': completed, 'open': open_tasks})
+        created_total += created
+        completed_total += completed
+        day += timedelta(days=1)
+    
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days': days,
+        'created': created_total,
+        'completed': completed_total,
+        'average_completion_seconds': round(completion_seconds / completed_total) if completed_total else None
+    }
+
+rollups_cli = AppGroup('rollups', help='Maintain the daily task analytics rollups.')
+
+@rollups_cli.command('backfill')
+@click.option('--batch-size', type=int, default=1000, help='Tasks read per fetch.')
+def backfill_rollups_command(batch_size):
+    """Rebuild task_daily_stats from the tasks and archive tables."""
+    replayed = backfill_rollups(batch_size=batch_size)
+    click.echo(f'Rebuilt rollups from {replayed} tasks')
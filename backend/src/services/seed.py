@@ -0,0 +1,255 @@
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+import click
+from flask.cli import with_appcontext
+from werkzeug.security import generate_password_hash
+
+from src.models.task import Task, TaskPriority, TaskStatus
+from src.models.task_stats import TaskDailyStats
+from src.models.user import User, db
+from src.services.rollups import delta_rows, replay_deltas
+
+SEED_PASSWORD = 'seedpass123'
+
+# Relative frequencies of generated values
+STATUS_WEIGHTS = {
+    TaskStatus.PENDING: 30,
+    TaskStatus.IN_PROGRESS: 20,
+    TaskStatus.COMPLETED: 42,
+    TaskStatus.CANCELLED: 8
+}
+PRIORITY_WEIGHTS = {
+    TaskPriority.LOW: 25,
+    TaskPriority.MEDIUM: 45,
+    TaskPriority.HIGH: 22,
+    TaskPriority.URGENT: 8
+}
+# Tasks left unassigned and assigned to their creator; the rest go to someone else
+UNASSIGNED_SHARE = 0.35
+SELF_ASSIGNED_SHARE = 0.40
+DUE_DATE_SHARE = 0.6
+DESCRIPTION_SHARE = 0.5
+INACTIVE_SHARE = 0.03
+# Zipf exponent of tasks per user: a few users own most of the tasks
+OWNERSHIP_SKEW = 0.8
+# Seeded tasks replayed into the analytics rollups per pass, which bounds memory
+ROLLUP_CHUNK_TASKS = 200000
+# Mean time from creation to the last update of a task that has moved on from pending
+MEAN_UPDATE_DELAY = timedelta(days=3)
+
+FIRST_NAMES = (
+    'Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie',
+    'Avery', 'Quinn', 'Robin', 'Charlie', 'Drew', 'Emery', 'Hayden', 'Kai'
+)
+LAST_NAMES = (
+    'Smith', 'Garcia', 'Chen', 'Okafor', 'Novak', 'Silva', 'Kim', 'Patel',
+    'Müller', 'Rossi', 'Nguyen', 'Haddad', 'Larsen', 'Moreau', 'Tanaka', 'Walsh'
+)
+TITLE_VERBS = (
+    'Review', 'Update', 'Fix', 'Write', 'Plan', 'Draft', 'Test', 'Deploy',
+    'Migrate', 'Document', 'Prepare', 'Investigate', 'Clean up', 'Schedule'
+)
+TITLE_SUBJECTS = (
+    'onboarding flow', 'quarterly report', 'login page', 'billing export',
+    'release notes', 'API docs', 'search index', 'team offsite', 'invoice template',
+    'backup job', 'dashboard charts', 'customer feedback', 'hiring plan', 'budget'
+)
+
+def _user_rows(rng, first, last, now, days, password_hash):
+    span = days * 86400
+    rows = []
+    for n in range(first, last):
+        joined = now - timedelta(seconds=rng.randrange(span))
+        rows.append({
+            'username': f'seed{n}',
+            'email': f'seed{n}@example.com',
+            'password_hash': password_hash,
+            'first_name': rng.choice(FIRST_NAMES),
+            'last_name': rng.choice(LAST_NAMES),
+            'is_active': rng.random() >= INACTIVE_SHARE,
+            'created_at': joined,
+            'updated_at': joined
+        })
+    return rows
+
+def _task_rows(rng, count, user_ids, joined, cum_weights, now):
+    users = range(len(user_ids))
+    owners = rng.choices(users, cum_weights=cum_weights, k=count)
+    others = rng.choices(users, cum_weights=cum_weights, k=count)
+    statuses = rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()), k=count)
+    priorities = rng.choices(list(PRIORITY_WEIGHTS), weights=list(PRIORITY_WEIGHTS.values()), k=count)
+    update_rate = 1 / MEAN_UPDATE_DELAY.total_seconds()
+    
+    rows = []
+    for owner, other, status, priority in zip(owners, others, statuses, priorities):
+        created_by = user_ids[owner]
+        # Squaring bunches tasks towards the present, like a growing workload
+        created_at = (now - (now - joined[owner]) * rng.random() ** 2).replace(microsecond=0)
+        
+        if status == TaskStatus.PENDING:
+            updated_at, version = created_at, 1
+        else:
+            delay = timedelta(seconds=int(rng.expovariate(update_rate)))
+            updated_at, version = min(created_at + delay, now), rng.randint(2, 6)
+        
+        pick = rng.random()
+        if pick < UNASSIGNED_SHARE:
+            assigned_to = None
+        elif pick < UNASSIGNED_SHARE + SELF_ASSIGNED_SHARE:
+            assigned_to = created_by
+        else:
+            assigned_to = user_ids[other]
+        
+        due_date = None
+        if rng.random() < DUE_DATE_SHARE:
+            due_date = (created_at + timedelta(days=rng.randint(1, 30))).replace(hour=17, minute=0, second=0)
+        
+        title = f'{rng.choice(TITLE_VERBS)} {rng.choice(TITLE_SUBJECTS)}'
+        rows.append({
+            'title': title,
+            'description': f'{title} before the due date.' if rng.random() < DESCRIPTION_SHARE else None,
+            'status': status,
+            'priority': priority,
+            'due_date': due_date,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'version': version,
+            'assigned_to': assigned_to,
+            'created_by': created_by
+        })
+    return rows
+
+def _insert_rollups(last_id, user_ids, tasks, batch_size, progress):
+    """Write the ``task_daily_stats`` rows of the seeded tasks.
+    
+    Seeded tasks only belong to seeded users, whose rollup rows can't exist
+    yet, so they are bulk inserted rather than merged. Users are handled a
+    range of ids at a time so only one range's rows are held in memory.
+    """
+    tasks_table = Task.__table__
+    passes = max(1, -(-tasks // ROLLUP_CHUNK_TASKS))
+    step = max(1, -(-len(user_ids) // passes))
+    ids = sorted(user_ids)
+    inserted = 0
+    for offset in range(0, len(ids), step):
+        low, high = ids[offset], ids[min(offset + step, len(ids)) - 1]
+        query = db.select(
+            tasks_table.c.status, tasks_table.c.created_by, tasks_table.c.assigned_to,
+            tasks_table.c.created_at, tasks_table.c.updated_at
+        ).where(db.or_(
+            tasks_table.c.created_by.between(low, high),
+            tasks_table.c.assigned_to.between(low, high)
+        ), tasks_table.c.created_by > last_id)
+        
+        deltas = Counter()
+        for row in db.session.execute(query, execution_options={'yield_per': batch_size}):
+            for key, amount in replay_deltas(row).items():
+                if low <= key[0] <= high:
+                    deltas[key] += amount
+        
+        rows = [
+            dict(values, user_id=user_id, day=day, status=status)
+            for (user_id, day, status), values in delta_rows(deltas).items()
+        ]
+        for start in range(0, len(rows), batch_size):
+            db.session.execute(db.insert(TaskDailyStats.__table__), rows[start:start + batch_size])
+        inserted += len(rows)
+        if progress:
+            progress('rollups', min(offset + step, len(ids)), len(ids))
+    return inserted
+
+def seed_database(users, tasks, seed=0, days=365, batch_size=10000, password=SEED_PASSWORD,
+                  now=None, progress=None):
+    """Insert ``users`` synthetic users and ``tasks`` tasks owned by them.
+    
+    Everything is written with multi-row Core inserts of ``batch_size`` rows
+    in a single transaction, and every user shares one password hash, so
+    millions of rows take minutes rather than hours. The same ``seed``,
+    ``now`` and starting database give the same rows. Task ownership follows
+    a Zipf distribution, and the analytics rollups of the new tasks are
+    written the way ``flask rollups backfill`` would. ``progress(kind, done,
+    total)`` is called after each batch. Returns the number of users, tasks
+    and rollup rows inserted.
+    """
+    if tasks and not users:
+        raise ValueError('Tasks need at least one user')
+    
+    rng = random.Random(seed)
+    now = (now or datetime.utcnow()).replace(microsecond=0)
+    password_hash = generate_password_hash(password)
+    users_table, tasks_table = User.__table__, Task.__table__
+    
+    try:
+        # Numbered after the current users so seeding twice doesn't collide
+        last_id = db.session.execute(db.select(db.func.max(users_table.c.id))).scalar() or 0
+        usernames, joined = [], []
+        for offset in range(0, users, batch_size):
+            first = last_id + 1 + offset
+            rows = _user_rows(rng, first, first + min(batch_size, users - offset), now, days, password_hash)
+            db.session.execute(db.insert(users_table), rows)
+            usernames.extend(row['username'] for row in rows)
+            joined.extend(row['created_at'] for row in rows)
+            if progress:
+                progress('users', len(usernames), users)
+        
+        # RETURNING with the ids in parameter order is a round trip per row on
+        # SQLite, so the new ids are read back in one query instead
+        new_ids = dict(db.session.execute(
+            db.select(users_table.c.username, users_table.c.id).where(users_table.c.id > last_id)
+        ).all())
+        user_ids = [new_ids[username] for username in usernames]
+        
+        order = list(range(users))
+        rng.shuffle(order)
+        weights = [0.0] * users
+        for rank, index in enumerate(order, 1):
+            weights[index] = rank ** -OWNERSHIP_SKEW
+        cum_weights = list(accumulate(weights))
+        
+        for offset in range(0, tasks, batch_size):
+            rows = _task_rows(rng, min(batch_size, tasks - offset), user_ids, joined, cum_weights, now)
+            db.session.execute(db.insert(tasks_table), rows)
+            if progress:
+                progress('tasks', offset + len(rows), tasks)
+        
+        rollups = _insert_rollups(last_id, user_ids, tasks, batch_size, progress)
+        
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return {'users': users, 'tasks': tasks, 'rollups': rollups}
+
+@click.command('seed')
+@click.option('--users', type=click.IntRange(min=0), default=1000, show_default=True, help='Users to create.')
+@click.option('--tasks', type=click.IntRange(min=0), default=10000, show_default=True, help='Tasks to create.')
+@click.option('--seed', 'seed_value', type=int, default=0, show_default=True,
+              help='Random seed; the same seed gives the same data.')
+@click.option('--days', type=click.IntRange(min=1), default=365, show_default=True,
+              help='Spread sign-ups and tasks over this many days up to now.')
+@click.option('--batch-size', type=click.IntRange(min=1), default=10000, show_default=True,
+              help='Rows per INSERT.')
+@click.option('--password', default=SEED_PASSWORD, show_default=True, help='Password of every generated user.')
+@with_appcontext
+def seed_command(users, tasks, seed_value, days, batch_size, password):
+    """Fill the database with synthetic users and tasks."""
+    if tasks and not users:
+        raise click.BadParameter('tasks need at least one user', param_hint='--users')
+    
+    def progress(kind, done, total):
+        click.echo(f'{kind}: {done}/{total}', err=True)
+    
+    started = time.perf_counter()
+    counts = seed_database(users, tasks, seed=seed_value, days=days, batch_size=batch_size,
+                           password=password, progress=progress)
+    elapsed = time.perf_counter() - started
+    rate = (counts['users'] + counts['tasks']) / elapsed if elapsed else 0
+    click.echo(
+        f"Seeded {counts['users']} users and {counts['tasks']} tasks "
+        f"in {elapsed:.1f}s ({rate:,.0f} rows/s); every user's password is '{password}'"
+    )
@@ -0,0 +1,77 @@
+import threading
+from datetime import datetime
+from enum import Enum
+
+from socketio.packet import BINARY_EVENT, EVENT, Packet
+
+def msgpack_available():
+    # Optional dependency, only needed when clients ask for MessagePack
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def pack(payload):
+    """MessagePack-encode an event payload, sent as a binary attachment"""
+    import msgpack
+    
+    return msgpack.packb(payload, use_bin_type=True)
+
+def serialize_changes(changes):
+    """JSON-ready copy of a ``{column: new value}`` dict of task changes"""
+    values = {}
+    for field, value in changes.items():
+        if isinstance(value, Enum):
+            value = value.value
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        values[field] = value
+    return values
+
+class PayloadMetrics:
+    """Counts and sizes of Socket.IO events sent by this process"""
+    
+    def __init__(self):
+        self._events = {}
+        self._lock = threading.Lock()
+    
+    def record(self, event, encoding, size):
+        key = (event, encoding)
+        with self._lock:
+            count, total, largest = self._events.get(key, (0, 0, 0))
+            self._events[key] = (count + 1, total + size, max(largest, size))
+    
+    def snapshot(self):
+        with self._lock:
+            items = sorted(self._events.items())
+        return [{
+            'event': event,
+            'encoding': encoding,
+            'count': count,
+            'bytes': total,
+            'avg_bytes': round(total / count, 1),
+            'max_bytes': largest
+        } for (event, encoding), (count, total, largest) in items]
+    
+    def reset(self):
+        with self._lock:
+            self._events.clear()
+
+payload_metrics = PayloadMetrics()
+
+class MeteredPacket(Packet):
+    """Default Socket.IO packet that records the encoded size of each event.
+    
+    Passed to python-socketio as ``serializer``, so sizes are measured on the
+    bytes actually produced rather than by serializing payloads twice.
+    """
+    
+    def encode(self):
+        encoded = super().encode()
+        if self.packet_type in (EVENT, BINARY_EVENT) and self.data:
+            parts = encoded if isinstance(encoded, list) else [encoded]
+            size = sum(len(part.encode('utf-8')) if isinstance(part, str) else len(part) for part in parts)
+            encoding = 'msgpack' if self.packet_type == BINARY_EVENT else 'json'
+            payload_metrics.record(self.data[0], encoding, size)
+        return encoded
@@ -0,0 +1,56 @@
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import CacheStats
+
+class StatementCacheStats:
+    """Hit rate of SQLAlchemy's compiled statement cache in this worker.
+    
+    Each engine compiles a statement once per shape and keeps the SQL in an
+    LRU cache of ``query_cache_size`` entries; later executions of the same
+    shape only bind new values. A falling hit rate means the cache is too
+    small for the shapes in use, or that some query builds a new shape on
+    every request.
+    """
+    
+    def __init__(self, app=None):
+        self.hits = self.misses = self.uncached = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        with self._lock:
+            self.hits = self.misses = self.uncached = 0
+        # Every engine, including the one under the asyncio API
+        if not event.contains(Engine, 'after_execute', self._count):
+            event.listen(Engine, 'after_execute', self._count)
+        app.extensions['statement_cache'] = self
+    
+    def _count(self, connection, statement, multiparams, params, execution_options, result):
+        context = getattr(result, 'context', None)
+        if context is None:
+            return
+        with self._lock:
+            if context.cache_hit is CacheStats.CACHE_HIT:
+                self.hits += 1
+            elif context.cache_hit is CacheStats.CACHE_MISS:
+                self.misses += 1
+            else:
+                self.uncached += 1
+    
+    def snapshot(self, engine=None):
+        with self._lock:
+            hits, misses, uncached = self.hits, self.misses, self.uncached
+        stats = {
+            'hits': hits,
+            'misses': misses,
+            'uncached': uncached,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None
+        }
+        if engine is not None:
+            cache = engine._compiled_cache
+            stats['cached_statements'] = len(cache) if cache is not None else 0
+            stats['cache_size'] = cache.capacity if cache is not None else 0
+        return stats
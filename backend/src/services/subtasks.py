@@ -0,0 +1,160 @@
+from src.models.task import Task, TaskStatus, db
+from src.models.task_tree import TaskClosure
+
+def _is_completed(status):
+    return int(status == TaskStatus.COMPLETED)
+
+def ancestor_ids(task_id):
+    """SELECT of the ids of every task above ``task_id``"""
+    closure = TaskClosure.__table__
+    return db.select(closure.c.ancestor_id).where(closure.c.descendant_id == task_id)
+
+def descendant_ids(task_id):
+    """SELECT of the ids of every task below ``task_id``"""
+    closure = TaskClosure.__table__
+    return db.select(closure.c.descendant_id).where(closure.c.ancestor_id == task_id)
+
+def ancestor_user_ids(task_id, parent_id=None):
+    """Creators and assignees of the tasks above ``task_id``, and of ``parent_id`` and the tasks above it"""
+    above = Task.id.in_(ancestor_ids(task_id))
+    if parent_id is not None:
+        above = above | (Task.id == parent_id) | Task.id.in_(ancestor_ids(parent_id))
+    rows = db.session.execute(db.select(Task.created_by, Task.assigned_to).where(above)).all()
+    return {user_id for row in rows for user_id in row}
+
+def _with_self(task_id, query):
+    """``query``'s (id, depth) rows plus ``task_id`` itself at depth 0"""
+    return query.union_all(db.select(db.literal(task_id), db.literal(0)))
+
+def _adjust_counts(task_id, subtasks, completed):
+    """Add to the subtask counts of every ancestor of ``task_id`` in one UPDATE"""
+    if not subtasks and not completed:
+        return
+    db.session.execute(
+        db.update(Task)
+        .where(Task.id.in_(ancestor_ids(task_id)))
+        .values(
+            subtask_count=Task.subtask_count + subtasks,
+            completed_subtask_count=Task.completed_subtask_count + completed,
+            # Derived counts are not an edit of the parent
+            updated_at=Task.updated_at
+        )
+    )
+
+def attach_subtask(task):
+    """Link a newly inserted ``task`` under its parent and count it for every ancestor"""
+    if task.parent_id is None:
+        return
+    closure = TaskClosure.__table__
+    # The parent's own links, one level deeper, plus the link to the parent
+    links = db.select(closure.c.ancestor_id, db.literal(task.id), closure.c.depth + 1).where(
+        closure.c.descendant_id == task.parent_id
+    ).union_all(db.select(db.literal(task.parent_id), db.literal(task.id), db.literal(1)))
+    db.session.execute(
+        db.insert(closure).from_select(['ancestor_id', 'descendant_id', 'depth'], links)
+    )
+    _adjust_counts(task.id, 1, _is_completed(task.status))
+
+def is_in_subtree(task_id, other_id):
+    """Whether ``other_id`` is ``task_id`` or one of its subtasks"""
+    if other_id == task_id:
+        return True
+    closure = TaskClosure.__table__
+    return db.session.execute(
+        db.select(
+            db.select(closure.c.ancestor_id)
+            .where(closure.c.ancestor_id == task_id, closure.c.descendant_id == other_id)
+            .exists()
+        )
+    ).scalar()
+
+def move_subtree(task, parent_id):
+    """Put ``task``, and everything below it, under ``parent_id`` (None for top level).
+    
+    The links from the old ancestors to the subtree are deleted and the links
+    from the new ones inserted as a cross join, so a move takes the same few
+    statements whatever the size of the subtree. Raises ValueError if
+    ``parent_id`` is inside the subtree being moved.
+    """
+    if parent_id == task.parent_id:
+        return
+    if parent_id is not None and is_in_subtree(task.id, parent_id):
+        raise ValueError('A task cannot be moved under itself or one of its subtasks')
+    
+    closure = TaskClosure.__table__
+    size = task.subtask_count + 1
+    completed = task.completed_subtask_count + _is_completed(task.status)
+    
+    if task.parent_id is not None:
+        _adjust_counts(task.id, -size, -completed)
+        db.session.execute(
+            db.delete(closure).where(
+                closure.c.ancestor_id.in_(ancestor_ids(task.id)),
+                (closure.c.descendant_id == task.id) | closure.c.descendant_id.in_(descendant_ids(task.id))
+            )
+        )
+    
+    if parent_id is not None:
+        above = _with_self(
+            parent_id, db.select(closure.c.ancestor_id, closure.c.depth).where(closure.c.descendant_id == parent_id)
+        ).subquery()
+        below = _with_self(
+            task.id, db.select(closure.c.descendant_id, closure.c.depth).where(closure.c.ancestor_id == task.id)
+        ).subquery()
+        links = db.select(
+            above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1
+        ).select_from(above.join(below, db.true()))
+        db.session.execute(
+            db.insert(closure).from_select(['ancestor_id', 'descendant_id', 'depth'], links)
+        )
+    
+    task.parent_id = parent_id
+    db.session.flush()
+    _adjust_counts(task.id, size, completed)
+
+def detach_task(task):
+    """Unlink ``task`` ahead of its deletion, handing its subtasks to its parent"""
+    if task.parent_id is None and not task.subtask_count:
+        return
+    closure = TaskClosure.__table__
+    _adjust_counts(task.id, -1, -_is_completed(task.status))
+    
+    if task.subtask_count:
+        # Everything below moves up one level relative to everything above
+        if task.parent_id is not None:
+            db.session.execute(
+                db.update(closure)
+                .where(
+                    closure.c.ancestor_id.in_(ancestor_ids(task.id)),
+                    closure.c.descendant_id.in_(descendant_ids(task.id))
+                )
+                .values(depth=closure.c.depth - 1)
+            )
+        db.session.execute(
+            db.update(Task)
+            .where(Task.parent_id == task.id)
+            .values(parent_id=task.parent_id, updated_at=Task.updated_at)
+        )
+    
+    db.session.execute(
+        db.delete(closure).where((closure.c.ancestor_id == task.id) | (closure.c.descendant_id == task.id))
+    )
+
+def count_status_change(task_id, old_status, new_status):
+    """Keep the ancestors' completed counts current when a subtask changes status"""
+    _adjust_counts(task_id, 0, _is_completed(new_status) - _is_completed(old_status))
+
+def subtree_query(task_id, max_depth=None):
+    """SELECT of ``(Task, depth)`` for every task below ``task_id``, shallowest first.
+    
+    One join against the closure table's primary key, however deep the tree.
+    """
+    query = (
+        db.select(Task, TaskClosure.depth)
+        .join(TaskClosure, TaskClosure.descendant_id == Task.id)
+        .where(TaskClosure.ancestor_id == task_id)
+        .order_by(TaskClosure.depth, Task.id)
+    )
+    if max_depth is not None:
+        query = query.where(TaskClosure.depth <= max_depth)
+    return query
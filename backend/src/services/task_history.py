@@ -0,0 +1,338 @@
+import atexit
+import os
+import threading
+from datetime import datetime, timedelta
+from enum import Enum
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.models.task import db
+from src.models.task_event import TaskEvent
+
+TRACKED_FIELDS = ('title', 'description', 'status', 'priority', 'due_date', 'assigned_to', 'parent_id')
+# Session.info key for events waiting on their transaction to commit
+_PENDING = 'task_history_pending'
+
+def _json_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def task_snapshot(task):
+    """The tracked fields of a Task, task row or dict, as JSON values"""
+    if isinstance(task, dict):
+        return {field: _json_value(task.get(field)) for field in TRACKED_FIELDS}
+    return {field: _json_value(getattr(task, field)) for field in TRACKED_FIELDS}
+
+def task_diff(before, after):
+    """``{field: [old, new]}`` for the fields that differ between two snapshots (None for no task)"""
+    before = before or {}
+    after = after or {}
+    changes = {}
+    for field in dict.fromkeys([*before, *after]):
+        old, new = before.get(field), after.get(field)
+        if old != new:
+            changes[field] = [old, new]
+    return changes
+
+class TaskHistory:
+    """Append-only log of task changes, written in batches off the request path.
+    
+    :meth:`record` adds an event to the current transaction. With
+    ``TASK_HISTORY_FLUSH_INTERVAL_MS`` at 0 the event is inserted right away,
+    in that transaction. Otherwise it waits for the transaction to commit
+    (and is dropped if it rolls back), then joins an in-memory buffer that a
+    writer thread inserts ``TASK_HISTORY_BATCH_SIZE`` rows per statement,
+    at least once per interval. A crashed worker loses the events of at most
+    one interval; the buffer never holds more than
+    ``TASK_HISTORY_MAX_PENDING``, dropping the oldest if the database falls
+    behind.
+    """
+    
+    def __init__(self, app=None):
+        self.enabled = False
+        self.interval = 0.0
+        self.batch_size = 500
+        self.max_pending = 10000
+        self.written = self.batches = self.dropped = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._thread = None
+        self._stopping = False
+        atexit.register(self.stop)
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.stop()
+        self.enabled = app.config['TASK_HISTORY_ENABLED']
+        self.interval = app.config['TASK_HISTORY_FLUSH_INTERVAL_MS'] / 1000
+        self.batch_size = app.config['TASK_HISTORY_BATCH_SIZE']
+        self.max_pending = app.config['TASK_HISTORY_MAX_PENDING']
+        self.written = self.batches = self.dropped = 0
+        self._pending = []
+        app.extensions['task_history'] = self
+    
+    def record(self, task, user_id, action, changes):
+        """Log a change to ``task`` (a Task, task row or dict) made by ``user_id`` in the current transaction"""
+        self.record_many([(task, user_id, action, changes)])
+    
+    def record_many(self, events):
+        """Log ``(task, user_id, action, changes)`` events in the current transaction, in one INSERT"""
+        if not self.enabled:
+            return
+        now = datetime.utcnow()
+        rows = []
+        for task, user_id, action, changes in events:
+            if action == 'updated' and not changes:
+                continue
+            if not isinstance(task, dict):
+                task = {field: getattr(task, field) for field in ('id', 'version', 'created_at')}
+            rows.append({
+                'task_id': task['id'],
+                'task_created_at': task['created_at'],
+                'version': task['version'],
+                'action': action,
+                'changes': changes,
+                'user_id': user_id,
+                'created_at': now
+            })
+        if not rows:
+            return
+        if not self.interval:
+            db.session.execute(db.insert(TaskEvent.__table__), rows)
+            return
+        session = db.session()
+        if not session.in_transaction():
+            # So a rollback before any statement still discards the events
+            session.begin()
+        session.info.setdefault(_PENDING, []).extend((self, row) for row in rows)
+    
+    def _enqueue(self, rows):
+        with self._lock:
+            self._pending.extend(rows)
+            self._trim()
+            self._start_writer()
+            if len(self._pending) >= self.batch_size:
+                self._wake.notify()
+    
+    def _trim(self):
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+    
+    def _start_writer(self):
+        # Started lazily so a preloading master doesn't start it before forking
+        thread = self._thread
+        if thread is None or thread.pid != os.getpid() or not thread.is_alive():
+            thread = threading.Thread(
+                target=self._run, args=(current_app._get_current_object(),),
+                name='task-history', daemon=True
+            )
+            thread.pid = os.getpid()
+            thread.start()
+            self._thread = thread
+    
+    def _run(self, app):
+        with app.app_context():
+            while True:
+                with self._lock:
+                    if not self._stopping and len(self._pending) < self.batch_size:
+                        self._wake.wait(self.interval)
+                    stopping = self._stopping
+                self.flush()
+                if stopping:
+                    return
+    
+    def flush(self):
+        """Insert the buffered events now; returns how many were written"""
+        with self._lock:
+            rows, self._pending = self._pending, []
+        
+        written = 0
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(db.insert(TaskEvent.__table__), batch)
+            except Exception:
+                current_app.logger.exception('Error writing task history')
+                # Kept for the next flush, ahead of anything buffered since
+                with self._lock:
+                    self._pending[:0] = rows[start:]
+                    self._trim()
+                break
+            written += len(batch)
+            with self._lock:
+                self.written += len(batch)
+                self.batches += 1
+        return written
+    
+    def stop(self):
+        """Stop the writer thread after a last flush"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None or thread.pid != os.getpid() or not thread.is_alive():
+                return
+            self._stopping = True
+            self._wake.notify()
+        thread.join()
+        self._stopping = False
+    
+    def snapshot(self):
+        return {
+            'enabled': self.enabled,
+            'buffered': len(self._pending),
+            'written': self.written,
+            'batches': self.batches,
+            'dropped': self.dropped
+        }
+
+@event.listens_for(Session, 'after_commit')
+def _buffer_committed_events(session):
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        by_log = {}
+        for log, row in pending:
+            by_log.setdefault(log, []).append(row)
+        for log, rows in by_log.items():
+            log._enqueue(rows)
+
+@event.listens_for(Session, 'after_transaction_end')
+def _discard_uncommitted_events(session, transaction):
+    # after_commit has already taken the events of a committed transaction
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+def merge_changes(events):
+    """One ``{field: [old, new]}`` for a run of events, oldest first, dropping fields that changed back"""
+    merged = {}
+    for changes in events:
+        for field, (old, new) in changes.items():
+            merged[field] = [merged[field][0] if field in merged else old, new]
+    return {field: values for field, values in merged.items() if values[0] != values[1]}
+
+def compact_history(older_than_days=30, batch_size=500):
+    """Merge each task's runs of consecutive updates older than ``older_than_days`` into one event.
+    
+    The merged event keeps the sequence number, version, user and time of
+    the last update of its run. Tasks are processed ``batch_size`` at a
+    time, each batch in its own transaction. Returns the number of events
+    removed.
+    """
+    events = TaskEvent.__table__
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    removed = 0
+    last_task_id = None
+    
+    while True:
+        query = (
+            db.select(events.c.task_id)
+            .where(events.c.created_at < cutoff, events.c.action == 'updated')
+            .group_by(events.c.task_id)
+            .having(db.func.count() > 1)
+            .order_by(events.c.task_id)
+            .limit(batch_size)
+        )
+        if last_task_id is not None:
+            query = query.where(events.c.task_id > last_task_id)
+        task_ids = db.session.execute(query).scalars().all()
+        if not task_ids:
+            break
+        last_task_id = task_ids[-1]
+        
+        rows = db.session.execute(
+            db.select(events.c.id, events.c.task_id, events.c.action, events.c.changes, events.c.merged)
+            .where(events.c.task_id.in_(task_ids), events.c.created_at < cutoff)
+            .order_by(events.c.task_id, events.c.id)
+        ).all()
+        
+        runs, run = [], []
+        for row in rows:
+            if row.action == 'updated' and run and run[-1].task_id == row.task_id:
+                run.append(row)
+                continue
+            if len(run) > 1:
+                runs.append(run)
+            run = [row] if row.action == 'updated' else []
+        if len(run) > 1:
+            runs.append(run)
+        
+        try:
+            doomed = [row.id for run in runs for row in run[:-1]]
+            for start in range(0, len(doomed), 500):
+                db.session.execute(db.delete(events).where(events.c.id.in_(doomed[start:start + 500])))
+            for run in runs:
+                db.session.execute(
+                    db.update(events)
+                    .where(events.c.id == run[-1].id)
+                    .values(
+                        changes=merge_changes([row.changes for row in run]),
+                        merged=sum(row.merged for row in run)
+                    )
+                )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        removed += len(doomed)
+    
+    return removed
+
+def purge_history(older_than_days=365, batch_size=5000):
+    """Delete events older than ``older_than_days``, ``batch_size`` per transaction; returns how many"""
+    events = TaskEvent.__table__
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    purged = 0
+    while True:
+        try:
+            result = db.session.execute(
+                db.delete(events).where(events.c.id.in_(
+                    db.select(events.c.id)
+                    .where(events.c.created_at < cutoff)
+                    .order_by(events.c.id)
+                    .limit(batch_size)
+                ))
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            return purged
+
+history_cli = AppGroup('history', help='Compact and expire the task history.')
+
+@history_cli.command('compact')
+@click.option('--older-than-days', type=int, default=None,
+              help='Merge updates older than this (default: TASK_HISTORY_COMPACT_AFTER_DAYS).')
+@click.option('--batch-size', type=int, default=500, help='Tasks compacted per transaction.')
+def compact_history_command(older_than_days, batch_size):
+    """Merge each task's old consecutive updates into one event."""
+    if older_than_days is None:
+        older_than_days = current_app.config['TASK_HISTORY_COMPACT_AFTER_DAYS']
+    removed = compact_history(older_than_days=older_than_days, batch_size=batch_size)
+    click.echo(f'Merged away {removed} task events older than {older_than_days} days')
+
+@history_cli.command('purge')
+@click.option('--older-than-days', type=int, default=None,
+              help='Delete events older than this (default: TASK_HISTORY_RETENTION_DAYS).')
+@click.option('--batch-size', type=int, default=5000, help='Events deleted per transaction.')
+def purge_history_command(older_than_days, batch_size):
+    """Delete task events past the retention period."""
+    if older_than_days is None:
+        older_than_days = current_app.config['TASK_HISTORY_RETENTION_DAYS']
+    if not older_than_days:
+        click.echo('TASK_HISTORY_RETENTION_DAYS is 0; keeping all task events')
+        return
+    purged = purge_history(older_than_days=older_than_days, batch_size=batch_size)
+    click.echo(f'Deleted {purged} task events older than {older_than_days} days')
@@ -0,0 +1,267 @@
+import csv
+import io
+import json
+from collections import Counter
+from datetime import datetime, timezone
+
+import click
+from flask.cli import AppGroup
+
+from src.models.task import Task, TaskStatus, TaskPriority, db
+from src.models.task_archive import TaskArchive
+from src.models.user import User
+from src.extensions import task_history
+from src.routes.dashboard import invalidate_dashboards
+from src.services.normalize import iter_with_users
+from src.services.rollups import apply_deltas, replay_deltas
+from src.services.task_history import task_diff, task_snapshot
+
+EXPORT_FIELDS = [
+    'id', 'title', 'description', 'status', 'priority', 'due_date',
+    'created_at', 'updated_at', 'assigned_to', 'created_by'
+]
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+IMPORT_FIELDS = ['title', 'description', 'status', 'priority', 'due_date', 'assigned_to', 'created_at']
+
+def iter_export_rows(user_id=None, include_archived=False, batch_size=1000):
+    """Yield tasks visible to ``user_id`` (all tasks if None) as plain dicts.
+    
+    Rows are fetched ``batch_size`` at a time through a server-side cursor,
+    so memory use stays flat however many tasks are exported.
+    """
+    tables = [Task.__table__, TaskArchive.__table__] if include_archived else [Task.__table__]
+    for table in tables:
+        query = db.select(*[table.c[field] for field in EXPORT_FIELDS]).order_by(table.c.id)
+        if user_id is not None:
+            query = query.where((table.c.assigned_to == user_id) | (table.c.created_by == user_id))
+        
+        result = db.session.execute(query, execution_options={'yield_per': batch_size})
+        for row in result:
+            yield serialize_task_row(row)
+
+def serialize_task_row(row):
+    """JSON-ready dict for a row selected from ``tasks`` or ``tasks_archive``, or a dict of its values"""
+    record = dict(row if isinstance(row, dict) else row._mapping)
+    for field in ('status', 'priority'):
+        record[field] = record[field].value if record[field] else None
+    for field in ('due_date', 'created_at', 'updated_at'):
+        record[field] = record[field].isoformat() if record[field] else None
+    return record
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+def iter_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    # Header only, when there were no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def read_records(stream, fmt):
+    """Yield ``(line_number, record)`` pairs from a binary upload stream.
+    
+    ``record`` is a dict, or a ``ValueError`` when the line cannot be parsed
+    or is not valid UTF-8.
+    """
+    bad_lines = set()
+    text = _decode_lines(stream, bad_lines)
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        last_line = 1
+        for record in reader:
+            # A quoted value can span lines
+            if bad_lines.intersection(range(last_line + 1, reader.line_num + 1)):
+                record = ValueError('Invalid UTF-8')
+            last_line = reader.line_num
+            # Line numbers count the header, like a spreadsheet would
+            yield reader.line_num, record
+        return
+    
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        if line_number in bad_lines:
+            yield line_number, ValueError('Invalid UTF-8')
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError('Expected a JSON object')
+        except ValueError as e:
+            record = ValueError(f'Invalid JSON: {e}')
+        yield line_number, record
+
+def _decode_lines(stream, bad_lines):
+    """Decode a binary stream line by line, adding the numbers of lines that aren't UTF-8 to ``bad_lines``"""
+    for line_number, line in enumerate(stream, start=1):
+        try:
+            yield line.decode('utf-8')
+        except UnicodeDecodeError:
+            bad_lines.add(line_number)
+            yield line.decode('utf-8', errors='replace')
+
+def _parse_record(record):
+    """Validate one imported record and return insert values for ``tasks``"""
+    if isinstance(record, ValueError):
+        raise record
+    
+    # CSV leaves missing values as empty strings
+    record = {field: record.get(field) if record.get(field) != '' else None for field in IMPORT_FIELDS}
+    
+    if not record['title']:
+        raise ValueError('Title is required')
+    
+    try:
+        status = TaskStatus(record['status']) if record['status'] else TaskStatus.PENDING
+    except ValueError:
+        raise ValueError('Invalid status value')
+    
+    try:
+        priority = TaskPriority(record['priority']) if record['priority'] else TaskPriority.MEDIUM
+    except ValueError:
+        raise ValueError('Invalid priority value')
+    
+    dates = {}
+    for field in ('due_date', 'created_at'):
+        dates[field] = None
+        if record[field]:
+            try:
+                dates[field] = datetime.fromisoformat(str(record[field]).replace('Z', '+00:00'))
+            except ValueError:
+                raise ValueError(f'Invalid {field} format. Use ISO format.')
+            # Stored as naive UTC, like the times the app writes itself
+            if dates[field].tzinfo is not None:
+                dates[field] = dates[field].astimezone(timezone.utc).replace(tzinfo=None)
+    
+    try:
+        assigned_to = int(record['assigned_to']) if record['assigned_to'] is not None else None
+    except (TypeError, ValueError):
+        raise ValueError('Invalid assigned_to value')
+    
+    now = datetime.utcnow()
+    return {
+        'title': str(record['title']),
+        'description': record['description'],
+        'status': status,
+        'priority': priority,
+        'due_date': dates['due_date'],
+        'assigned_to': assigned_to,
+        'created_at': dates['created_at'] or now,
+        'updated_at': now
+    }
+
+def import_tasks(records, created_by, batch_size=1000, max_errors=100):
+    """Insert ``(line_number, record)`` pairs as tasks owned by ``created_by``.
+    
+    Valid rows are inserted with one ``executemany`` per batch and committed
+    batch by batch; invalid rows are skipped and reported by line number.
+    Like tasks created one at a time, each batch adds to the rollups, logs a
+    'created' event per task and drops the cached dashboards of the creator
+    and assignees.
+    """
+    summary = {'imported': 0, 'error_count': 0, 'errors': []}
+    
+    def add_error(line_number, message):
+        summary['error_count'] += 1
+        if len(summary['errors']) < max_errors:
+            summary['errors'].append({'line': line_number, 'error': message})
+    
+    batch = []
+    for line_number, record in records:
+        # User records from a normalized export
+        if isinstance(record, dict) and record.keys() == {'user'}:
+            continue
+        try:
+            batch.append((line_number, _parse_record(record)))
+        except ValueError as e:
+            add_error(line_number, str(e))
+        
+        if len(batch) >= batch_size:
+            summary['imported'] += _insert_batch(batch, created_by, add_error)
+            batch = []
+    
+    if batch:
+        summary['imported'] += _insert_batch(batch, created_by, add_error)
+    
+    return summary
+
+def _insert_batch(batch, created_by, add_error):
+    # Check every assignee in the batch with a single IN query
+    assignee_ids = {values['assigned_to'] for _, values in batch if values['assigned_to'] is not None}
+    known_users = set()
+    if assignee_ids:
+        known_users = set(db.session.execute(
+            db.select(User.id).where(User.id.in_(assignee_ids))
+        ).scalars())
+    
+    rows = []
+    for line_number, values in batch:
+        if values['assigned_to'] is not None and values['assigned_to'] not in known_users:
+            add_error(line_number, 'Assigned user not found')
+            continue
+        rows.append(dict(values, created_by=created_by))
+    
+    if rows:
+        try:
+            task_ids = db.session.execute(
+                db.insert(Task.__table__).returning(Task.__table__.c.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+            deltas = Counter()
+            for row in rows:
+                deltas.update(replay_deltas(row))
+            apply_deltas(deltas)
+            task_history.record_many(
+                (dict(row, id=task_id, version=1), created_by, 'created', task_diff(None, task_snapshot(row)))
+                for task_id, row in zip(task_ids, rows)
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        invalidate_dashboards(created_by, *(row['assigned_to'] for row in rows))
+    return len(rows)
+
+tasks_cli = AppGroup('tasks', help='Bulk task export and import.')
+
+@tasks_cli.command('export')
+@click.option('--user-id', type=int, default=None, help='Only export tasks created by or assigned to this user.')
+@click.option('--format', 'fmt', type=click.Choice(list(EXPORT_FORMATS)), default='ndjson')
+@click.option('--include-archived', is_flag=True, help='Also export archived tasks.')
+@click.option('--normalize', is_flag=True, help='Write each referenced user once as a {"user": ...} line (ndjson only).')
+@click.option('--output', type=click.File('w'), default='-', help='Output file (default: stdout).')
+def export_tasks_command(user_id, fmt, include_archived, normalize, output):
+    """Stream tasks as NDJSON or CSV."""
+    if normalize and fmt != 'ndjson':
+        raise click.BadParameter('only supported for ndjson', param_hint='--normalize')
+    
+    rows = iter_export_rows(user_id, include_archived=include_archived)
+    if normalize:
+        rows = iter_with_users(rows)
+    for chunk in (iter_ndjson(rows) if fmt == 'ndjson' else iter_csv(rows)):
+        output.write(chunk)
+
+@tasks_cli.command('import')
+@click.argument('source', type=click.File('rb'))
+@click.option('--user-id', type=int, required=True, help='User recorded as creator of the imported tasks.')
+@click.option('--format', 'fmt', type=click.Choice(list(EXPORT_FORMATS)), default='ndjson')
+@click.option('--batch-size', type=int, default=1000, help='Rows inserted per transaction.')
+def import_tasks_command(source, user_id, fmt, batch_size):
+    """Import tasks from an NDJSON or CSV file."""
+    if not db.session.get(User, user_id):
+        raise click.BadParameter('User not found', param_hint='--user-id')
+    
+    summary = import_tasks(read_records(source, fmt), user_id, batch_size=batch_size)
+    click.echo(f"Imported {summary['imported']} tasks, {summary['error_count']} errors")
+    for error in summary['errors']:
+        click.echo(f"  line {error['line']}: {error['error']}", err=True)
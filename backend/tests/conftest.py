@@ -1,32 +1,66 @@
 import pytest
-import tempfile
 import os
 import sys
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from src.main import app
+from src.main import create_app
+from src.config import TestingConfig
 from src.models.user import db, User
 from src.models.task import Task
+from src.routes.dashboard import dashboard_cache
+from query_budget import QueryCounter, QueryReport, RequestQueryTracker
+
+query_report = QueryReport()
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--query-report', default='query-report.json',
+        help='Where to write per-endpoint SQL query counts (empty to skip).'
+    )
+
+def pytest_sessionfinish(session, exitstatus):
+    path = session.config.getoption('--query-report')
+    if path and query_report.endpoints:
+        query_report.write(path)
 
 @pytest.fixture
-def client():
-    """Create a test client for the Flask application."""
-    # Create a temporary database
-    db_fd, app.config['DATABASE'] = tempfile.mkstemp()
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-    app.config['WTF_CSRF_ENABLED'] = False
-    app.config['JWT_SECRET_KEY'] = 'test-secret-key'
+def app():
+    """Create a fresh application with an empty in-memory database."""
+    app = create_app(TestingConfig)
+    # Module-level caches outlive the app, and ids repeat between tests
+    dashboard_cache.clear()
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture(autouse=True)
+def query_budgets(request):
+    """Fail the test if any request it makes exceeds its endpoint's query budget."""
+    if 'app' not in request.fixturenames:
+        yield
+        return
     
+    app = request.getfixturevalue('app')
+    with RequestQueryTracker(app, db.engine, query_report) as tracker:
+        yield
+    if tracker.violations:
+        pytest.fail('Query budget exceeded:\n' + '\n'.join(tracker.violations), pytrace=False)
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager factory counting SQL statements run inside it."""
+    return lambda: QueryCounter(db.engine)
+
+@pytest.fixture
+def client(app):
+    """Create a test client for the Flask application."""
     with app.test_client() as client:
-        with app.app_context():
-            db.create_all()
-            yield client
-            
-    os.close(db_fd)
-    os.unlink(app.config['DATABASE'])
+        yield client
 
 @pytest.fixture
 def auth_headers(client):
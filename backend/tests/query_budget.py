@@ -0,0 +1,167 @@
+"""Per-request SQL statement counting for the test suite.
+
+Every request made through the Flask test client is attributed to its
+endpoint. The statements it runs (and the ORM rows it loads) are checked
+against ``QUERY_BUDGETS``, and the worst case per endpoint is written to a
+JSON report at the end of the run.
+"""
+import json
+import threading
+from collections import namedtuple
+
+from flask import request, request_finished, request_started
+from sqlalchemy import event
+from sqlalchemy.orm import Mapper
+
+Budget = namedtuple('Budget', ['queries', 'rows'], defaults=[None])
+
+# Most SQL statements (and, where given, ORM rows loaded) a single request
+# to each endpoint may use in the test suite. Raise a budget only when the
+# extra queries are intended; an N+1 shows up here first.
+QUERY_BUDGETS = {
+    'auth.register': Budget(4),
+    'auth.login': Budget(1, rows=1),
+    'auth.get_current_user': Budget(1, rows=1),
+    'auth.refresh_token': Budget(1, rows=1),
+    'tasks.get_tasks': Budget(5),
+    'tasks.create_task': Budget(9),
+    'tasks.get_task': Budget(4),
+    'tasks.update_task': Budget(10),
+    'tasks.patch_task': Budget(6),
+    'tasks.delete_task': Budget(10),
+    'tasks.get_subtree': Budget(3),
+    'tasks.move_task': Budget(11),
+    'tasks.update_task_labels': Budget(8),
+    'tasks.get_task_history': Budget(3),
+    'tasks.get_task_stats': Budget(2),
+    'tasks.get_task_analytics': Budget(2),
+    'tasks.export_tasks': Budget(2),
+    'tasks.import_tasks': Budget(6),
+    'tasks.stream_tasks': Budget(0),
+    'user.get_users': Budget(1),
+    'user.search_users': Budget(1),
+    'user.create_user': Budget(1),
+    'user.get_user': Budget(1, rows=1),
+    'user.update_user': Budget(2),
+    'user.delete_user': Budget(4),
+    'dashboard.get_dashboard': Budget(4),
+}
+# Every endpoint of these blueprints must have a budget
+BUDGETED_BLUEPRINTS = ('auth', 'tasks', 'user', 'dashboard')
+
+class QueryCounter:
+    """Records SQL statements run on ``engine`` and ORM rows loaded while active"""
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self.rows = 0
+    
+    @property
+    def count(self):
+        return len(self.statements)
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def _on_load(self, target, context):
+        self.rows += 1
+    
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(Mapper, 'load', self._on_load)
+        return self
+    
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.remove(Mapper, 'load', self._on_load)
+
+class QueryReport:
+    """Worst-case statement and row counts per endpoint across the test run"""
+    
+    def __init__(self):
+        self.endpoints = {}
+        self._lock = threading.Lock()
+    
+    def add(self, endpoint, queries, rows):
+        with self._lock:
+            entry = self.endpoints.setdefault(endpoint, {'requests': 0, 'max_queries': 0, 'max_rows': 0})
+            entry['requests'] += 1
+            entry['max_queries'] = max(entry['max_queries'], queries)
+            entry['max_rows'] = max(entry['max_rows'], rows)
+    
+    def write(self, path):
+        report = {}
+        for endpoint, entry in sorted(self.endpoints.items()):
+            budget = QUERY_BUDGETS.get(endpoint)
+            report[endpoint] = dict(
+                entry,
+                query_budget=budget.queries if budget else None,
+                row_budget=budget.rows if budget else None
+            )
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+class RequestQueryTracker:
+    """Counts queries per request on ``app`` and collects budget violations.
+    
+    Streamed responses keep counting until the response is closed (or the
+    next request starts), so queries run by the generator are included.
+    """
+    
+    def __init__(self, app, engine, report, budgets=QUERY_BUDGETS):
+        self.app = app
+        self.engine = engine
+        self.report = report
+        self.budgets = budgets
+        self.violations = []
+        self._active = None
+    
+    def _request_started(self, sender, **extra):
+        self._finish()
+        self._active = (QueryCounter(self.engine).__enter__(), None)
+    
+    def _request_finished(self, sender, response, **extra):
+        if self._active is None:
+            return
+        counter, _ = self._active
+        self._active = (counter, (request.endpoint, request.method, request.path))
+        if response.is_streamed:
+            response.call_on_close(self._finish)
+        else:
+            self._finish()
+    
+    def _finish(self):
+        if self._active is None:
+            return
+        (counter, target), self._active = self._active, None
+        counter.__exit__(None, None, None)
+        if target is None or target[0] is None:
+            return
+        
+        endpoint, method, path = target
+        self.report.add(endpoint, counter.count, counter.rows)
+        
+        budget = self.budgets.get(endpoint)
+        if budget is None:
+            return
+        if counter.count > budget.queries:
+            self.violations.append(
+                f'{method} {path} ({endpoint}) ran {counter.count} queries, '
+                f'budget is {budget.queries}:\n  ' + '\n  '.join(counter.statements)
+            )
+        if budget.rows is not None and counter.rows > budget.rows:
+            self.violations.append(
+                f'{method} {path} ({endpoint}) loaded {counter.rows} rows, budget is {budget.rows}'
+            )
+    
+    def __enter__(self):
+        request_started.connect(self._request_started, self.app)
+        request_finished.connect(self._request_finished, self.app)
+        return self
+    
+    def __exit__(self, *exc_info):
+        request_started.disconnect(self._request_started, self.app)
+        request_finished.disconnect(self._request_finished, self.app)
+        self._finish()
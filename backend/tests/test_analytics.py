@@ -0,0 +1,152 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from src.config import TestingConfig
+from src.main import create_app
+from src.models.task import Task, TaskStatus
+from src.models.task_stats import TaskDailyStats
+from src.models.user import User, db
+from src.services.rollups import backfill_rollups, record_task_change, upsert_statement
+
+def rollup_rows():
+    """task_daily_stats summed over days as {(user_id, status): (created, entered, exited)}."""
+    totals = {}
+    for row in TaskDailyStats.query.all():
+        created, entered, exited = totals.get((row.user_id, row.status.value), (0, 0, 0))
+        totals[(row.user_id, row.status.value)] = (created + row.created, entered + row.entered, exited + row.exited)
+    return totals
+
+def test_rollups_follow_status_transitions(client, auth_headers, test_user):
+    """Test that create, update and delete keep the rollups in step."""
+    task_id = client.post('/api/tasks/', json={'title': 'Tracked'}, headers=auth_headers).get_json()['task']['id']
+    creator_id = Task.query.get(task_id).created_by
+    assert rollup_rows() == {(creator_id, 'pending'): (1, 1, 0)}
+    
+    client.patch(f'/api/tasks/{task_id}', json={'status': 'in_progress'}, headers=auth_headers)
+    client.put(f'/api/tasks/{task_id}', json={'status': 'completed', 'assigned_to': test_user.id}, headers=auth_headers)
+    assert rollup_rows() == {
+        (creator_id, 'pending'): (1, 1, 1),
+        (creator_id, 'in_progress'): (0, 1, 1),
+        (creator_id, 'completed'): (0, 1, 0),
+        (test_user.id, 'completed'): (0, 1, 0),
+    }
+    
+    # Edits that don't touch status or ownership leave the rollups alone
+    client.patch(f'/api/tasks/{task_id}', json={'title': 'Renamed'}, headers=auth_headers)
+    client.delete(f'/api/tasks/{task_id}', headers=auth_headers)
+    rows = rollup_rows()
+    assert rows[(creator_id, 'completed')] == (0, 1, 1)
+    assert rows[(test_user.id, 'completed')] == (0, 1, 1)
+
+def test_analytics_endpoint(client, auth_headers):
+    """Test daily created/completed/open counts and completion time."""
+    for title in ('One', 'Two', 'Three'):
+        client.post('/api/tasks/', json={'title': title}, headers=auth_headers)
+    tasks = client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']
+    client.patch(f"/api/tasks/{tasks[0]['id']}", json={'status': 'completed'}, headers=auth_headers)
+    
+    today = datetime.utcnow().date()
+    response = client.get(
+        f'/api/tasks/analytics?start={today - timedelta(days=2)}&end={today}', headers=auth_headers
+    )
+    data = response.get_json()
+    
+    assert response.status_code == 200
+    assert [day['date'] for day in data['days']] == [str(today - timedelta(days=n)) for n in (2, 1, 0)]
+    assert data['days'][-1] == {'date': str(today), 'created': 3, 'completed': 1, 'open': 2}
+    assert data['days'][0]['open'] == 0
+    assert data['created'] == 3
+    assert data['completed'] == 1
+    assert data['average_completion_seconds'] is not None
+    
+    # Open tasks from before the range carry into it
+    response = client.get(f'/api/tasks/analytics?start={today + timedelta(days=1)}&end={today + timedelta(days=1)}', headers=auth_headers)
+    assert response.get_json()['days'][0]['open'] == 2
+
+def test_analytics_invalid_range(client, auth_headers):
+    """Test rejected analytics ranges."""
+    assert client.get('/api/tasks/analytics?start=yesterday', headers=auth_headers).status_code == 400
+    assert client.get('/api/tasks/analytics?start=2024-02-01&end=2024-01-01', headers=auth_headers).status_code == 400
+    assert client.get('/api/tasks/analytics?start=2020-01-01&end=2024-01-01', headers=auth_headers).status_code == 400
+
+def test_backfill_rollups(app, test_user):
+    """Test rebuilding rollups from existing tasks."""
+    created_at = datetime(2024, 3, 1, 9, 0)
+    db.session.add_all([
+        Task(title='Open', created_by=test_user.id, created_at=created_at, updated_at=created_at),
+        Task(title='Done', status=TaskStatus.COMPLETED, created_by=test_user.id,
+             created_at=created_at, updated_at=created_at + timedelta(days=2)),
+    ])
+    db.session.commit()
+    
+    assert backfill_rollups() == 2
+    assert rollup_rows() == {
+        (test_user.id, 'pending'): (2, 2, 1),
+        (test_user.id, 'completed'): (0, 1, 0),
+    }
+    completed = TaskDailyStats.query.filter_by(status=TaskStatus.COMPLETED).one()
+    assert completed.day == (created_at + timedelta(days=2)).date()
+    assert completed.completion_seconds == 2 * 86400
+    
+    result = app.test_cli_runner().invoke(args=['rollups', 'backfill'])
+    assert 'Rebuilt rollups from 2 tasks' in result.output
+
+def test_rollup_upsert_on_postgresql():
+    """Test that PostgreSQL adds to an existing rollup row in the same statement that inserts it."""
+    sql = str(upsert_statement('postgresql').compile(dialect=postgresql.dialect()))
+    
+    assert 'ON CONFLICT (user_id, day, status) DO UPDATE' in sql
+    assert 'entered = (task_daily_stats.entered + excluded.entered)' in sql
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def shared_database_url(request, tmp_path):
+    """A database concurrent writers can share: a SQLite file, or TEST_POSTGRES_URL when set."""
+    if request.param == 'sqlite':
+        return f"sqlite:///{tmp_path / 'app.db'}"
+    url = os.getenv('TEST_POSTGRES_URL')
+    if not url:
+        pytest.skip('TEST_POSTGRES_URL is not set')
+    return url
+
+def test_concurrent_rollup_writers(shared_database_url):
+    """Test that concurrent changes landing on the same new rollup row are all counted."""
+    class SharedConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = shared_database_url
+    
+    app = create_app(SharedConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(username='busy', email='busy@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    
+    writers = 8
+    barrier = threading.Barrier(writers)
+    errors = []
+    
+    def write():
+        with app.app_context():
+            try:
+                state = {'status': TaskStatus.PENDING, 'created_by': user_id, 'assigned_to': None,
+                         'created_at': datetime.utcnow()}
+                barrier.wait()
+                record_task_change(None, state)
+                db.session.commit()
+            except Exception as e:
+                errors.append(e)
+    
+    threads = [threading.Thread(target=write) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    with app.app_context():
+        assert errors == []
+        assert rollup_rows() == {(user_id, 'pending'): (writers, writers, 0)}
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,157 @@
+import pytest
+import os
+import runpy
+import subprocess
+import sys
+import types
+
+from sqlalchemy import event
+
+from src.main import create_app
+from src.config import TestingConfig
+from src.models.base import db
+from src.models.task import Task, db as task_db
+from src.models.user import User, db as user_db
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..')
+GUNICORN_ENV = ('GUNICORN_WORKER_CLASS', 'GUNICORN_WORKER_CONNECTIONS', 'GUNICORN_THREADS',
+                'SOCKETIO_ASYNC_MODE', 'SSE_MAX_STREAMS', 'SOCKETIO_MAX_CLIENTS', 'MAX_CONCURRENT_REQUESTS')
+
+def load_gunicorn_config(monkeypatch, **env):
+    """Run gunicorn.conf.py with ``env`` and return its settings and the environment it leaves."""
+    environ = {name: value for name, value in os.environ.items() if name not in GUNICORN_ENV}
+    environ.update(env)
+    monkeypatch.setattr(os, 'environ', environ)
+    # Keep a .env from supplying any of the variables under test
+    monkeypatch.setattr('dotenv.load_dotenv', lambda *args, **kwargs: False)
+    return runpy.run_path(os.path.join(BACKEND_DIR, 'gunicorn.conf.py')), environ
+
+def test_health_check(client):
+    """Test the health check endpoint."""
+    response = client.get('/api/health')
+    
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'healthy'
+
+def test_create_app_applies_overrides():
+    """Test that dict overrides are applied on top of the default config."""
+    app = create_app({'TESTING': True, 'ARCHIVE_AFTER_DAYS': 7})
+    
+    assert app.config['TESTING'] is True
+    assert app.config['ARCHIVE_AFTER_DAYS'] == 7
+    assert app.config['JWT_ACCESS_TOKEN_EXPIRES'].days == 7
+
+def test_create_app_returns_independent_apps():
+    """Test that each call builds a separate application."""
+    first = create_app(TestingConfig)
+    second = create_app(TestingConfig)
+    
+    assert first is not second
+    assert 'tasks' in first.blueprints and 'tasks' in second.blueprints
+
+def test_models_share_one_db():
+    """Test that every model is registered on the one SQLAlchemy instance."""
+    assert task_db is db and user_db is db
+    assert Task.metadata is User.metadata is db.metadata
+    assert {'users', 'tasks', 'task_labels', 'task_events'} <= set(db.metadata.tables)
+
+def test_request_uses_one_connection_and_transaction(tmp_path):
+    """Test that a request reading tasks and their users checks out one connection for one transaction."""
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+    
+    app = create_app(FileConfig)
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        response = client.post('/api/auth/register', json={
+            'username': 'pooled', 'email': 'pooled@example.com', 'password': 'testpass123'
+        })
+        user_id = response.get_json()['user']['id']
+        headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+        client.post('/api/tasks/', json={'title': 'Shared', 'assigned_to': user_id}, headers=headers)
+        
+        checkouts, transactions = [], []
+        event.listen(db.engine, 'checkout', lambda *args: checkouts.append(args))
+        event.listen(db.engine, 'begin', lambda connection: transactions.append(connection))
+        
+        response = client.get('/api/tasks/', headers=headers)
+        assert response.status_code == 200
+        task = response.get_json()['tasks'][0]
+        assert task['creator']['username'] == task['assignee']['username'] == 'pooled'
+        assert len(checkouts) == 1
+        assert len(transactions) == 1
+        
+        db.session.remove()
+        db.drop_all()
+
+def test_optional_subsystems_disabled(client):
+    """Test that docs and frontend routes are not registered when disabled."""
+    assert client.get('/api/swagger.yaml').status_code == 404
+    assert client.get('/api/docs/').status_code == 404
+
+def test_optional_subsystems_enabled():
+    """Test that docs and frontend routes are registered when enabled."""
+    app = create_app({'ENABLE_API_DOCS': True, 'SERVE_FRONTEND': True,
+                      'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    client = app.test_client()
+    
+    assert client.get('/api/swagger.yaml').status_code == 200
+    assert client.get('/api/docs/').status_code == 200
+
+def test_import_has_no_side_effects():
+    """Test that importing the app module neither builds an app nor loads optional subsystems."""
+    code = (
+        'import sys\n'
+        'import src.main\n'
+        'from src.config import TestingConfig\n'
+        'assert not hasattr(src.main, "app")\n'
+        'src.main.create_app(TestingConfig)\n'
+        'print("flask_swagger_ui" in sys.modules)\n'
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR,
+                            capture_output=True, text=True)
+    
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'False'
+
+def test_gunicorn_defaults_to_async_workers(monkeypatch):
+    """Test that realtime clients get greenlets by default and at most half of a worker's connections."""
+    # Record the monkey-patching instead of patching the test process
+    patched = []
+    gevent = types.ModuleType('gevent')
+    gevent.monkey = types.SimpleNamespace(patch_all=lambda: patched.append(True))
+    monkeypatch.setitem(sys.modules, 'gevent', gevent)
+    monkeypatch.setitem(sys.modules, 'gevent.monkey', gevent.monkey)
+    settings, environ = load_gunicorn_config(monkeypatch)
+    
+    assert settings['worker_class'] == 'gevent'
+    # Patched in the master, so the app can be preloaded there
+    assert patched == [True]
+    assert settings['preload_app'] is True
+    assert environ['SOCKETIO_ASYNC_MODE'] == 'gevent'
+    assert int(environ['SSE_MAX_STREAMS']) + int(environ['SOCKETIO_MAX_CLIENTS']) <= settings['worker_connections'] // 2
+    assert environ['MAX_CONCURRENT_REQUESTS'] == '499'
+
+def test_gunicorn_thread_workers_keep_threads_for_requests(monkeypatch):
+    """Test that thread workers cap realtime clients and shed load below their thread count."""
+    settings, environ = load_gunicorn_config(monkeypatch, GUNICORN_WORKER_CLASS='gthread')
+    
+    assert settings['preload_app'] is True
+    assert environ['SOCKETIO_ASYNC_MODE'] == 'threading'
+    assert environ['SSE_MAX_STREAMS'] == environ['SOCKETIO_MAX_CLIENTS'] == '2'
+    # 8 threads, 4 for realtime clients and 1 to answer 503s with
+    assert environ['MAX_CONCURRENT_REQUESTS'] == '3'
+    
+    for env in ({'SSE_MAX_STREAMS': '8'}, {'SSE_MAX_STREAMS': '4', 'SOCKETIO_MAX_CLIENTS': '4'},
+                {'SOCKETIO_MAX_CLIENTS': '0'}):
+        with pytest.raises(RuntimeError, match='below the 8 connections'):
+            load_gunicorn_config(monkeypatch, GUNICORN_WORKER_CLASS='gthread', **env)
+    
+    for value in ('4', '64', '-1'):
+        with pytest.raises(RuntimeError, match='load is never shed'):
+            load_gunicorn_config(monkeypatch, GUNICORN_WORKER_CLASS='gthread', MAX_CONCURRENT_REQUESTS=value)
+    load_gunicorn_config(monkeypatch, GUNICORN_WORKER_CLASS='gthread', MAX_CONCURRENT_REQUESTS='0')
+    
+    with pytest.raises(RuntimeError, match='gevent or gthread'):
+        load_gunicorn_config(monkeypatch, GUNICORN_WORKER_CLASS='sync')
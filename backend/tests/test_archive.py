@@ -0,0 +1,102 @@
+import pytest
+from datetime import datetime, timedelta
+
+from src.models.user import db
+from src.models.task import Task, TaskStatus
+from src.models.task_archive import TaskArchive, TaskArchiveCount
+from src.services.archive import archive_tasks
+
+def _create_task(client, auth_headers, **fields):
+    response = client.post('/api/tasks/', json=fields, headers=auth_headers)
+    assert response.status_code == 201
+    return response.get_json()['task']['id']
+
+def _age_task(task_id, days):
+    task = db.session.get(Task, task_id)
+    task.updated_at = datetime.utcnow() - timedelta(days=days)
+    db.session.commit()
+
+def test_archive_moves_only_old_closed_tasks(client, auth_headers):
+    """Test that only old completed/cancelled tasks are archived."""
+    old_done = _create_task(client, auth_headers, title='Old done', status='completed')
+    old_cancelled = _create_task(client, auth_headers, title='Old cancelled', status='cancelled')
+    old_pending = _create_task(client, auth_headers, title='Old pending')
+    new_done = _create_task(client, auth_headers, title='New done', status='completed')
+    for task_id in (old_done, old_cancelled, old_pending):
+        _age_task(task_id, 60)
+    
+    archived = archive_tasks(older_than_days=30, batch_size=1)
+    
+    assert archived == 2
+    assert {task.id for task in Task.query.all()} == {old_pending, new_done}
+    assert {task.id for task in TaskArchive.query.all()} == {old_done, old_cancelled}
+
+def test_archive_updates_precomputed_counts(client, auth_headers):
+    """Test that archived tasks are folded into the per-user counts."""
+    for title in ('A', 'B'):
+        _age_task(_create_task(client, auth_headers, title=title, status='completed', priority='high'), 60)
+    
+    archive_tasks(older_than_days=30)
+    
+    counts = TaskArchiveCount.query.all()
+    assert len(counts) == 1
+    assert counts[0].status == TaskStatus.COMPLETED
+    assert counts[0].count == 2
+
+def test_list_tasks_include_archived(client, auth_headers):
+    """Test that archived tasks are only listed when requested."""
+    archived_id = _create_task(client, auth_headers, title='Archived', status='completed')
+    _create_task(client, auth_headers, title='Active')
+    _age_task(archived_id, 60)
+    archive_tasks(older_than_days=30)
+    
+    response = client.get('/api/tasks/', headers=auth_headers)
+    assert response.get_json()['count'] == 1
+    
+    response = client.get('/api/tasks/?include_archived=true', headers=auth_headers)
+    data = response.get_json()
+    assert data['count'] == 2
+    assert [task for task in data['tasks'] if task.get('archived')][0]['id'] == archived_id
+
+def test_get_archived_task(client, auth_headers):
+    """Test fetching an archived task by id."""
+    task_id = _create_task(client, auth_headers, title='Archived', status='cancelled')
+    _age_task(task_id, 60)
+    archive_tasks(older_than_days=30)
+    
+    response = client.get(f'/api/tasks/{task_id}', headers=auth_headers)
+    assert response.status_code == 404
+    
+    response = client.get(f'/api/tasks/{task_id}?include_archived=true', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['task']['archived'] is True
+
+def test_stats_combine_hot_and_archived(client, auth_headers):
+    """Test that stats add archive counts to live task counts."""
+    _age_task(_create_task(client, auth_headers, title='Archived', status='completed'), 60)
+    _create_task(client, auth_headers, title='Active', status='completed')
+    archive_tasks(older_than_days=30)
+    
+    data = client.get('/api/tasks/stats', headers=auth_headers).get_json()
+    assert data['total_tasks'] == 2
+    assert data['archived_tasks'] == 1
+    assert data['status_counts']['completed'] == 2
+    
+    data = client.get('/api/tasks/stats?include_archived=false', headers=auth_headers).get_json()
+    assert data['total_tasks'] == 1
+
+def test_task_ids_are_not_reused_after_archiving(client, auth_headers):
+    """Test that a new task never takes the id of the archived task with the highest id."""
+    _create_task(client, auth_headers, title='Active')
+    archived_id = _create_task(client, auth_headers, title='Secret', status='completed', labels=['secret'])
+    _age_task(archived_id, 60)
+    assert archive_tasks(older_than_days=30) == 1
+    
+    response = client.post('/api/tasks/', json={'title': 'New'}, headers=auth_headers)
+    task = response.get_json()['task']
+    assert task['id'] > archived_id
+    assert task['labels'] == []
+    
+    data = client.get('/api/tasks/?include_archived=true', headers=auth_headers).get_json()
+    ids = [task['id'] for task in data['tasks']]
+    assert len(ids) == len(set(ids)) == 3
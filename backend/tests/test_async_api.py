@@ -0,0 +1,181 @@
+import asyncio
+import json
+from urllib.parse import urlsplit
+
+import pytest
+from flask_jwt_extended import create_refresh_token
+
+from src.config import TestingConfig
+from src.models.user import db
+
+pytest.importorskip('aiosqlite')
+
+@pytest.fixture
+def async_api(tmp_path):
+    """Create the async API over a file database, which both engines can open."""
+    from src.async_api import create_async_api
+    
+    class AsyncTestingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        ASYNC_CHANGES_PAGE_SIZE = 2
+    
+    api = create_async_api(AsyncTestingConfig)
+    loop = asyncio.new_event_loop()
+    api.loop = loop
+    with api.flask_app.app_context():
+        db.create_all()
+    yield api
+    loop.run_until_complete(api.engine.dispose())
+    loop.close()
+    with api.flask_app.app_context():
+        db.engine.dispose()
+
+@pytest.fixture
+def sync_client(async_api):
+    """Flask test client sharing the async API's database."""
+    return async_api.flask_app.test_client()
+
+def register(sync_client, username):
+    response = sync_client.post('/api/auth/register', json={
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': 'testpass123'
+    })
+    data = response.get_json()
+    return {'Authorization': f"Bearer {data['access_token']}"}, data
+
+def call(api, url, headers=None, method='GET'):
+    """Send one request through the ASGI app; returns (status, headers, JSON body)"""
+    parts = urlsplit(url)
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': parts.path,
+        'query_string': parts.query.encode(),
+        'headers': [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    }
+    messages = []
+    
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+    
+    async def send(message):
+        messages.append(message)
+    
+    api.loop.run_until_complete(api(scope, receive, send))
+    start, body = messages
+    return start['status'], dict(start['headers']), json.loads(body['body'])
+
+def test_async_list_matches_sync(async_api, sync_client):
+    """Test that the async task list returns what the Flask endpoint does."""
+    headers, _ = register(sync_client, 'asyncuser')
+    for title, priority in [('One', 'low'), ('Two', 'high'), ('Three', 'high')]:
+        sync_client.post('/api/tasks/', json={'title': title, 'priority': priority}, headers=headers)
+    
+    for query in ['', '?priority=high', '?created_by_me=true&status=pending']:
+        status, _, data = call(async_api, f'/api/async/tasks{query}', headers)
+        assert status == 200
+        assert data == sync_client.get(f'/api/tasks/{query}', headers=headers).get_json()
+    
+    status, _, data = call(async_api, '/api/async/tasks?status=bogus', headers)
+    assert status == 400
+    assert data['error'] == 'Invalid status value'
+
+def test_async_label_filters_match_sync(async_api, sync_client):
+    """Test that label filters, labels and label counts match the Flask list."""
+    headers, _ = register(sync_client, 'labeller')
+    for title, labels in [('One', ['bug', 'ui']), ('Two', ['bug']), ('Three', [])]:
+        sync_client.post('/api/tasks/', json={'title': title, 'labels': labels}, headers=headers)
+    
+    for query in ['', '?labels=bug', '?labels=bug,ui', '?exclude_labels=ui']:
+        status, _, data = call(async_api, f'/api/async/tasks{query}', headers)
+        assert status == 200
+        assert data == sync_client.get(f'/api/tasks/{query}', headers=headers).get_json()
+    assert data['label_counts'] == {'bug': 1}
+
+def test_async_list_normalized(async_api, sync_client):
+    """Test that the async list and changes feed support ?normalize=true like the Flask list."""
+    headers, _ = register(sync_client, 'normalizer')
+    _, helper = register(sync_client, 'helper')
+    for n in range(3):
+        sync_client.post('/api/tasks/', json={'title': f'Task {n}', 'assigned_to': helper['user']['id']}, headers=headers)
+    
+    status, _, data = call(async_api, '/api/async/tasks?normalize=true', headers)
+    assert status == 200
+    assert data == sync_client.get('/api/tasks/?normalize=true', headers=headers).get_json()
+    assert len(data['users']) == 2
+    
+    status, _, data = call(async_api, '/api/async/tasks/changes?normalize=true', headers)
+    assert status == 200
+    assert 'creator' not in data['tasks'][0]
+    assert str(helper['user']['id']) in data['users']
+
+def test_async_task_detail(async_api, sync_client):
+    """Test task detail, its ETag and the access checks."""
+    headers, _ = register(sync_client, 'owner')
+    other_headers, _ = register(sync_client, 'other')
+    task = sync_client.post('/api/tasks/', json={'title': 'Mine'}, headers=headers).get_json()['task']
+    
+    status, response_headers, data = call(async_api, f"/api/async/tasks/{task['id']}", headers)
+    assert status == 200
+    assert data['task'] == task
+    assert response_headers[b'etag'] == b'"1"'
+    
+    status, _, _ = call(async_api, f"/api/async/tasks/{task['id']}", other_headers)
+    assert status == 403
+    
+    status, _, _ = call(async_api, '/api/async/tasks/9999', headers)
+    assert status == 404
+
+def test_async_stats_match_sync(async_api, sync_client):
+    """Test that the async stats equal the Flask stats."""
+    headers, _ = register(sync_client, 'statsuser')
+    sync_client.post('/api/tasks/', json={'title': 'Open'}, headers=headers)
+    task_id = sync_client.post('/api/tasks/', json={'title': 'Done'}, headers=headers).get_json()['task']['id']
+    sync_client.patch(f'/api/tasks/{task_id}', json={'status': 'completed'}, headers=headers)
+    
+    status, _, data = call(async_api, '/api/async/tasks/stats', headers)
+    assert status == 200
+    assert data == sync_client.get('/api/tasks/stats', headers=headers).get_json()
+
+def test_async_changes_pages_by_cursor(async_api, sync_client):
+    """Test that the changes feed pages through tasks in update order."""
+    headers, _ = register(sync_client, 'feeduser')
+    ids = [
+        sync_client.post('/api/tasks/', json={'title': f'Task {i}'}, headers=headers).get_json()['task']['id']
+        for i in range(3)
+    ]
+    sync_client.patch(f'/api/tasks/{ids[0]}', json={'title': 'Renamed'}, headers=headers)
+    
+    status, _, page = call(async_api, '/api/async/tasks/changes', headers)
+    assert status == 200
+    assert [task['id'] for task in page['tasks']] == [ids[1], ids[2]]
+    assert page['has_more'] is True
+    
+    cursor = page['next']
+    status, _, page = call(async_api, f"/api/async/tasks/changes?since={cursor['since']}&after_id={cursor['after_id']}", headers)
+    assert [task['id'] for task in page['tasks']] == [ids[0]]
+    assert page['tasks'][0]['title'] == 'Renamed'
+    assert page['has_more'] is False
+
+def test_async_api_auth_and_read_only(async_api, sync_client):
+    """Test that the async API validates tokens like the Flask app and rejects writes."""
+    headers, data = register(sync_client, 'authuser')
+    
+    status, _, body = call(async_api, '/api/async/tasks')
+    assert status == 401
+    assert body['msg'] == 'Missing Authorization Header'
+    
+    with async_api.flask_app.app_context():
+        refresh_token = create_refresh_token(identity=data['user']['id'])
+    status, _, _ = call(async_api, '/api/async/tasks', {'Authorization': f'Bearer {refresh_token}'})
+    assert status == 401
+    
+    status, _, _ = call(async_api, '/api/async/tasks', {'Authorization': 'Bearer not-a-token'})
+    assert status == 401
+    
+    status, _, _ = call(async_api, '/api/async/tasks', headers, method='POST')
+    assert status == 405
+    
+    status, _, _ = call(async_api, '/api/async/users', headers)
+    assert status == 404
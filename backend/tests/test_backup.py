@@ -0,0 +1,126 @@
+import pytest
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from src.services.backup import BackupStore, create_backup, find_backup, prune_backups, restore_backup
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """Create a small SQLite database file and return its URI and path."""
+    path = tmp_path / 'app.db'
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, payload TEXT)')
+    connection.executemany(
+        'INSERT INTO items (payload) VALUES (?)',
+        [(f'row {i} ' * 20,) for i in range(5000)]
+    )
+    connection.commit()
+    connection.close()
+    return f'sqlite:///{path}', path
+
+@pytest.fixture
+def store(tmp_path):
+    return BackupStore(str(tmp_path / 'backups'))
+
+def _count_rows(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+    finally:
+        connection.close()
+
+def test_backup_and_restore_roundtrip(sqlite_db, store):
+    """Test that a restored backup matches the database at backup time."""
+    uri, path = sqlite_db
+    manifest = create_backup(uri, store, chunk_size=64 * 1024)
+    
+    connection = sqlite3.connect(path)
+    connection.execute('DELETE FROM items WHERE id > 100')
+    connection.commit()
+    connection.close()
+    assert _count_rows(path) == 100
+    
+    restore_backup(uri, store, find_backup(store))
+    
+    assert manifest['size'] > 0
+    assert _count_rows(path) == 5000
+
+def test_unchanged_chunks_are_deduplicated(sqlite_db, store):
+    """Test that a second backup only stores the chunks that changed."""
+    uri, path = sqlite_db
+    first = create_backup(uri, store, chunk_size=64 * 1024)
+    
+    connection = sqlite3.connect(path)
+    connection.execute("UPDATE items SET payload = 'changed' WHERE id = 1")
+    connection.commit()
+    connection.close()
+    second = create_backup(uri, store, chunk_size=64 * 1024)
+    
+    assert first['new_chunks'] == len(first['chunks'])
+    assert 0 < second['new_chunks'] < len(second['chunks'])
+    assert second['stored_bytes'] < first['stored_bytes']
+
+def test_backup_finishes_under_constant_writes(sqlite_db, store):
+    """Test that a backup of a database written to all the time completes, and is consistent."""
+    uri, path = sqlite_db
+    connection = sqlite3.connect(path)
+    connection.executemany('INSERT INTO items (payload) VALUES (?)', [('x' * 200,)] * 40000)
+    connection.commit()
+    connection.close()
+    stop = threading.Event()
+    
+    def write():
+        connection = sqlite3.connect(path, timeout=30)
+        # Gives up after a while, so a backup that keeps restarting fails
+        # the test instead of hanging it
+        deadline = time.monotonic() + 10
+        while not stop.is_set() and time.monotonic() < deadline:
+            connection.execute("INSERT INTO items (payload) VALUES ('busy')")
+            connection.commit()
+        connection.close()
+    
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        manifest = create_backup(uri, store, chunk_size=64 * 1024)
+        assert writer.is_alive()
+    finally:
+        stop.set()
+        writer.join()
+    
+    restore_backup(uri, store, manifest)
+    assert _count_rows(path) >= 45000
+
+def test_find_backup_point_in_time(sqlite_db, store):
+    """Test selecting the latest backup taken before a point in time."""
+    uri, _ = sqlite_db
+    first = create_backup(uri, store)
+    second = create_backup(uri, store)
+    
+    assert find_backup(store)['id'] == second['id']
+    at = datetime.fromisoformat(first['created_at'])
+    assert find_backup(store, at=at)['id'] == first['id']
+    with pytest.raises(LookupError):
+        find_backup(store, at=at - timedelta(days=1))
+
+def test_prune_removes_old_backups_and_chunks(sqlite_db, store):
+    """Test retention pruning and garbage collection of orphaned chunks."""
+    uri, path = sqlite_db
+    create_backup(uri, store, chunk_size=64 * 1024)
+    
+    connection = sqlite3.connect(path)
+    connection.execute('DELETE FROM items')
+    connection.commit()
+    connection.execute('VACUUM')
+    connection.close()
+    latest = create_backup(uri, store, chunk_size=64 * 1024)
+    
+    removed_backups, removed_chunks = prune_backups(store, keep_last=1, keep_daily=0)
+    
+    assert removed_backups == 1
+    assert removed_chunks > 0
+    assert [m['id'] for m in store.list_manifests()] == [latest['id']]
+    restore_backup(uri, store, latest)
+    assert _count_rows(path) == 0
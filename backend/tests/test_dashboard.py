@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+
+from src.models.task import Task
+from src.models.user import db
+from src.services.archive import archive_tasks
+
+def test_dashboard(client, auth_headers):
+    """Test the composite dashboard payload."""
+    soon = (datetime.utcnow() + timedelta(days=2)).isoformat()
+    later = (datetime.utcnow() + timedelta(days=30)).isoformat()
+    past = (datetime.utcnow() - timedelta(days=1)).isoformat()
+    
+    tasks = [
+        {'title': 'Due soon', 'due_date': soon, 'priority': 'high'},
+        {'title': 'Due later', 'due_date': later},
+        {'title': 'Overdue', 'due_date': past},
+        {'title': 'Done', 'status': 'completed', 'due_date': soon},
+    ]
+    for task_data in tasks:
+        client.post('/api/tasks/', json=task_data, headers=auth_headers)
+    
+    response = client.get('/api/dashboard/', headers=auth_headers)
+    data = response.get_json()
+    
+    assert response.status_code == 200
+    assert data['stats']['total_tasks'] == 4
+    assert data['stats']['status_counts'] == {'pending': 3, 'completed': 1}
+    assert data['stats']['priority_counts'] == {'high': 1, 'medium': 3}
+    assert data['stats']['overdue_tasks'] == 1
+    assert data['stats']['archived_tasks'] == 0
+    assert data['assigned_to_me'] == 0
+    assert [task['title'] for task in data['recent_tasks']] == ['Done', 'Overdue', 'Due later', 'Due soon']
+    assert [task['title'] for task in data['due_soon']] == ['Due soon']
+    assert data['recent_tasks'][0]['creator']['username'] == 'testuser'
+
+def test_dashboard_matches_stats(client, auth_headers):
+    """Test that dashboard stats agree with the stats endpoint."""
+    for status in ('pending', 'in_progress', 'completed'):
+        client.post('/api/tasks/', json={'title': status, 'status': status}, headers=auth_headers)
+    
+    stats = client.get('/api/tasks/stats', headers=auth_headers).get_json()
+    dashboard = client.get('/api/dashboard/', headers=auth_headers).get_json()
+    
+    assert dashboard['stats'] == stats
+
+def test_dashboard_query_count_and_cache(client, auth_headers, count_queries):
+    """Test that the dashboard uses a fixed number of queries and is cached."""
+    for i in range(10):
+        client.post('/api/tasks/', json={'title': f'Task {i}'}, headers=auth_headers)
+    
+    with count_queries() as queries:
+        response = client.get('/api/dashboard/', headers=auth_headers)
+    assert response.status_code == 200
+    assert queries.count == 4
+    
+    with count_queries() as queries:
+        response = client.get('/api/dashboard/', headers=auth_headers)
+    assert response.status_code == 200
+    assert queries.count == 0
+
+def test_dashboard_invalidated_on_task_changes(client, auth_headers):
+    """Test that creating, updating and deleting tasks refreshes the dashboard."""
+    def total():
+        return client.get('/api/dashboard/', headers=auth_headers).get_json()['stats']['total_tasks']
+    
+    assert total() == 0
+    
+    task_id = client.post('/api/tasks/', json={'title': 'New'}, headers=auth_headers).get_json()['task']['id']
+    assert total() == 1
+    
+    client.patch(f'/api/tasks/{task_id}', json={'status': 'completed'}, headers=auth_headers)
+    dashboard = client.get('/api/dashboard/', headers=auth_headers).get_json()
+    assert dashboard['stats']['status_counts'] == {'completed': 1}
+    
+    client.delete(f'/api/tasks/{task_id}', headers=auth_headers)
+    assert total() == 0
+
+def test_dashboard_invalidated_for_assignee(client, auth_headers):
+    """Test that assigning a task refreshes the assignee's dashboard."""
+    response = client.post('/api/auth/register', json={
+        'username': 'assignee',
+        'email': 'assignee@example.com',
+        'password': 'testpass123'
+    })
+    assignee = response.get_json()
+    assignee_headers = {'Authorization': f"Bearer {assignee['access_token']}"}
+    
+    assert client.get('/api/dashboard/', headers=assignee_headers).get_json()['assigned_to_me'] == 0
+    
+    task_id = client.post('/api/tasks/', json={'title': 'Unassigned'}, headers=auth_headers).get_json()['task']['id']
+    client.put(f'/api/tasks/{task_id}', json={'assigned_to': assignee['user']['id']}, headers=auth_headers)
+    
+    assert client.get('/api/dashboard/', headers=assignee_headers).get_json()['assigned_to_me'] == 1
+
+def test_dashboard_invalidated_on_moves_labels_and_archiving(client, auth_headers):
+    """Test that moving, relabelling and archiving tasks refreshes the dashboard."""
+    def recent():
+        dashboard = client.get('/api/dashboard/', headers=auth_headers).get_json()
+        return {task['id']: task for task in dashboard['recent_tasks']}
+    
+    parent_id = client.post('/api/tasks/', json={'title': 'Parent'}, headers=auth_headers).get_json()['task']['id']
+    child_id = client.post('/api/tasks/', json={'title': 'Child'}, headers=auth_headers).get_json()['task']['id']
+    assert recent()[parent_id]['subtask_count'] == 0
+    
+    client.post(f'/api/tasks/{child_id}/move', json={'parent_id': parent_id}, headers=auth_headers)
+    tasks = recent()
+    assert tasks[parent_id]['subtask_count'] == 1
+    assert tasks[child_id]['parent_id'] == parent_id
+    
+    version = tasks[child_id]['version']
+    client.put(f'/api/tasks/{child_id}/labels', json={'labels': ['bug']}, headers=auth_headers)
+    assert recent()[child_id]['version'] == version + 1
+    
+    done_id = client.post('/api/tasks/', json={'title': 'Done', 'status': 'completed'}, headers=auth_headers).get_json()['task']['id']
+    assert done_id in recent()
+    task = db.session.get(Task, done_id)
+    task.updated_at = datetime.utcnow() - timedelta(days=60)
+    db.session.commit()
+    archive_tasks(older_than_days=30)
+    assert done_id not in recent()
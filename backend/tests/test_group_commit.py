@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+from src.config import TestingConfig
+from src.extensions import group_commit
+from src.main import create_app
+from src.models.task import Task
+from src.models.user import User, db
+
+@pytest.fixture
+def grouped_app(tmp_path):
+    """Create an application with group commit on and a database file under tmp_path."""
+    class GroupCommitConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        GROUP_COMMIT_ENABLED = True
+        GROUP_COMMIT_WINDOW_MS = 100
+    
+    app = create_app(GroupCommitConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        group_commit.stop()
+        db.session.remove()
+        db.drop_all()
+
+def register(app):
+    response = app.test_client().post('/api/auth/register', json={
+        'username': 'writer',
+        'email': 'writer@example.com',
+        'password': 'testpass123'
+    })
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+def run_concurrently(targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def test_concurrent_creates_share_a_commit(grouped_app):
+    """Test that concurrent task creations are committed in fewer transactions."""
+    headers = register(grouped_app)
+    responses = []
+    
+    def create(n):
+        client = grouped_app.test_client()
+        responses.append(client.post('/api/tasks/', json={'title': f'Task {n}'}, headers=headers))
+    
+    run_concurrently([lambda n=n: create(n) for n in range(8)])
+    
+    assert [response.status_code for response in responses] == [201] * 8
+    ids = {response.get_json()['task']['id'] for response in responses}
+    assert len(ids) == 8
+    assert db.session.query(Task).count() == 8
+    
+    stats = group_commit.snapshot()
+    assert stats['writes'] == 8
+    assert stats['groups'] < 8
+
+def test_failed_write_only_fails_its_request(grouped_app):
+    """Test that one failing write is rolled back without failing the rest of its group."""
+    results = {}
+    
+    def write(name, fail):
+        def work():
+            db.session.add(User(username=name, email=f'{name}@example.com', password_hash='x'))
+            if fail:
+                raise ValueError('rejected')
+            return name
+        
+        with grouped_app.app_context():
+            try:
+                results[name] = group_commit.commit(work)
+            except ValueError as e:
+                results[name] = e
+    
+    run_concurrently([
+        lambda: write('first', False),
+        lambda: write('broken', True),
+        lambda: write('last', False)
+    ])
+    
+    assert results['first'] == 'first' and results['last'] == 'last'
+    assert isinstance(results['broken'], ValueError)
+    assert {user.username for user in User.query.all()} == {'first', 'last'}
+
+def test_update_through_group_commit(grouped_app):
+    """Test that updates committed by the coordinator return the new task state."""
+    headers = register(grouped_app)
+    client = grouped_app.test_client()
+    task = client.post('/api/tasks/', json={'title': 'Before'}, headers=headers).get_json()['task']
+    
+    response = client.put(f"/api/tasks/{task['id']}", json={'title': 'After', 'status': 'completed'}, headers=headers)
+    assert response.status_code == 200
+    updated = response.get_json()['task']
+    assert updated['title'] == 'After'
+    assert updated['version'] == 2
+    assert updated['creator']['username'] == 'writer'
+    assert response.headers['ETag'] == '"2"'
+    
+    fetched = client.get(f"/api/tasks/{task['id']}", headers=headers).get_json()['task']
+    assert fetched == updated
+
+def test_group_commit_off_by_default(app, client, auth_headers):
+    """Test that writes commit in the request thread unless group commit is enabled."""
+    response = client.post('/api/tasks/', json={'title': 'Direct'}, headers=auth_headers)
+    assert response.status_code == 201
+    assert group_commit.snapshot()['groups'] == 0
@@ -0,0 +1,48 @@
+from src.extensions import broadcaster, health
+
+def test_liveness(client):
+    """Test that the liveness probe answers without touching the database."""
+    response = client.get('/api/health/live')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'alive'
+
+def test_readiness(client):
+    """Test that a healthy worker reports every check as ready."""
+    response = client.get('/api/health/ready')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['status'] == 'ready'
+    assert set(data['checks']) == {'database', 'pool', 'queues', 'socketio'}
+    assert all(check['ok'] for check in data['checks'].values())
+    assert data['checks']['database']['latency_ms'] >= 0
+
+def test_readiness_is_cached(client, count_queries):
+    """Test that probes within the cache interval reuse the last result."""
+    with count_queries() as queries:
+        first = client.get('/api/health/ready').get_json()
+        second = client.get('/api/health/ready').get_json()
+    assert queries.count == 1
+    assert first['checked_at'] == second['checked_at']
+
+def test_slow_database_is_not_ready(client):
+    """Test that a database round trip over the latency budget fails readiness."""
+    health.db_latency_ms = 0
+    response = client.get('/api/health/ready')
+    assert response.status_code == 503
+    data = response.get_json()
+    assert data['status'] == 'not_ready'
+    assert data['checks']['database']['ok'] is False
+    assert data['checks']['pool']['ok'] is True
+
+def test_deep_queue_is_not_ready(client):
+    """Test that a backlog of undelivered stream events fails readiness."""
+    health.max_queue_depth = 2
+    broadcaster.buffer_limit = 10
+    subscriber, _ = broadcaster.subscribe(1)
+    for n in range(3):
+        broadcaster.publish(1, 'task_updated', lambda: {'n': n})
+    
+    response = client.get('/api/health/ready')
+    assert response.status_code == 503
+    assert response.get_json()['checks']['queues']['streams'] == 3
+    broadcaster.unsubscribe(subscriber)
@@ -0,0 +1,92 @@
+from src.models.label import Label, TaskLabel
+from src.models.user import db
+
+def _create_task(client, auth_headers, title, labels=(), **fields):
+    response = client.post('/api/tasks/', json={'title': title, 'labels': list(labels), **fields}, headers=auth_headers)
+    assert response.status_code == 201
+    return response.get_json()['task']
+
+def _titles(client, auth_headers, query):
+    response = client.get(f'/api/tasks/?{query}', headers=auth_headers)
+    assert response.status_code == 200
+    return sorted(task['title'] for task in response.get_json()['tasks'])
+
+def test_create_task_with_labels(client, auth_headers):
+    """Test that labels given on creation are normalized and stored once."""
+    task = _create_task(client, auth_headers, 'Labelled', labels=['Bug', ' backend ', 'bug'])
+    assert task['labels'] == ['backend', 'bug']
+    _create_task(client, auth_headers, 'Also labelled', labels=['bug'])
+    
+    assert sorted(label.name for label in Label.query.all()) == ['backend', 'bug']
+    assert db.session.query(TaskLabel).count() == 3
+    
+    fetched = client.get(f"/api/tasks/{task['id']}", headers=auth_headers).get_json()['task']
+    assert fetched['labels'] == ['backend', 'bug']
+
+def test_invalid_labels(client, auth_headers):
+    """Test that label lists are validated."""
+    response = client.post('/api/tasks/', json={'title': 'Bad', 'labels': 'a' * 51}, headers=auth_headers)
+    assert response.status_code == 400
+    
+    response = client.post('/api/tasks/', json={'title': 'Bad', 'labels': [1]}, headers=auth_headers)
+    assert response.status_code == 400
+
+def test_filter_by_labels(client, auth_headers):
+    """Test AND and NOT label filters combined with the other filters."""
+    _create_task(client, auth_headers, 'A', labels=['bug', 'backend'])
+    _create_task(client, auth_headers, 'B', labels=['bug', 'backend', 'urgent'])
+    _create_task(client, auth_headers, 'C', labels=['bug'], priority='high')
+    _create_task(client, auth_headers, 'D', labels=['backend'])
+    _create_task(client, auth_headers, 'E')
+    
+    assert _titles(client, auth_headers, 'labels=bug') == ['A', 'B', 'C']
+    assert _titles(client, auth_headers, 'labels=bug,backend') == ['A', 'B']
+    assert _titles(client, auth_headers, 'labels=bug,backend&exclude_labels=urgent') == ['A']
+    assert _titles(client, auth_headers, 'exclude_labels=bug') == ['D', 'E']
+    assert _titles(client, auth_headers, 'labels=bug&priority=high') == ['C']
+    assert _titles(client, auth_headers, 'labels=missing') == []
+
+def test_list_returns_labels_and_counts(client, auth_headers):
+    """Test that listings carry each task's labels and the label counts of the results."""
+    _create_task(client, auth_headers, 'A', labels=['bug', 'backend'])
+    _create_task(client, auth_headers, 'B', labels=['bug'])
+    _create_task(client, auth_headers, 'C')
+    
+    data = client.get('/api/tasks/', headers=auth_headers).get_json()
+    assert {task['title']: task['labels'] for task in data['tasks']} == {
+        'A': ['backend', 'bug'], 'B': ['bug'], 'C': []
+    }
+    assert data['label_counts'] == {'bug': 2, 'backend': 1}
+    
+    data = client.get('/api/tasks/?exclude_labels=backend&normalize=true', headers=auth_headers).get_json()
+    assert data['label_counts'] == {'bug': 1}
+    assert {task['title']: task['labels'] for task in data['tasks']} == {'B': ['bug'], 'C': []}
+
+def test_update_task_labels(client, auth_headers):
+    """Test replacing a task's labels."""
+    task = _create_task(client, auth_headers, 'Relabel', labels=['bug'])
+    
+    response = client.put(f"/api/tasks/{task['id']}/labels", json={'labels': ['feature', 'ui']}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['labels'] == ['feature', 'ui']
+    assert response.headers['ETag'] == '"2"'
+    assert _titles(client, auth_headers, 'labels=bug') == []
+    assert _titles(client, auth_headers, 'labels=ui') == ['Relabel']
+    
+    response = client.put(f"/api/tasks/{task['id']}/labels", json={'labels': []}, headers=auth_headers)
+    assert response.get_json()['labels'] == []
+    assert db.session.query(TaskLabel).count() == 0
+    
+    response = client.put(f"/api/tasks/{task['id']}/labels", json={}, headers=auth_headers)
+    assert response.status_code == 400
+
+def test_update_labels_requires_creator(client, auth_headers, test_task):
+    """Test that only the creator can change a task's labels."""
+    response = client.put(f'/api/tasks/{test_task.id}/labels', json={'labels': ['x']}, headers=auth_headers)
+    assert response.status_code == 403
+
+def test_delete_task_removes_labels(client, auth_headers):
+    """Test that deleting a task takes its labels off."""
+    task = _create_task(client, auth_headers, 'Doomed', labels=['bug'])
+    assert client.delete(f"/api/tasks/{task['id']}", headers=auth_headers).status_code == 200
+    assert db.session.query(TaskLabel).count() == 0
@@ -0,0 +1,157 @@
+import os
+import time
+
+import pytest
+from src.extensions import presence, socketio
+from src.services.presence import MemoryPresenceStore, RedisPresenceStore
+
+def register(client, username):
+    """Register a user and return (user_id, token)."""
+    response = client.post('/api/auth/register', json={
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': 'testpass123'
+    })
+    data = response.get_json()
+    return data['user']['id'], data['access_token']
+
+def test_memory_store_counts_connections():
+    """Test that a user stays online until their last connection closes."""
+    store = MemoryPresenceStore()
+    
+    assert store.connect(1) == 1
+    assert store.connect(1) == 2
+    assert store.online([1, 2]) == {1}
+    
+    assert store.disconnect(1) == 1
+    assert store.online([1]) == {1}
+    assert store.disconnect(1) == 0
+    assert store.online([1]) == set()
+    
+    # Extra disconnects never go negative
+    assert store.disconnect(1) == 0
+
+def test_memory_store_pending_queue():
+    """Test that pending events are capped, expire and are drained once."""
+    store = MemoryPresenceStore()
+    
+    for i in range(5):
+        store.push_pending(1, 'task_updated', {'n': i}, limit=3, ttl=60)
+    
+    assert store.pop_pending(1) == [('task_updated', {'n': 2}), ('task_updated', {'n': 3}), ('task_updated', {'n': 4})]
+    assert store.pop_pending(1) == []
+    
+    store.push_pending(2, 'task_updated', {}, limit=3, ttl=-1)
+    assert store.pop_pending(2) == []
+
+@pytest.fixture
+def redis_store_factory(app, monkeypatch):
+    """Build Redis presence stores on TEST_REDIS_URL, one per simulated worker, without heartbeat threads."""
+    pytest.importorskip('redis')
+    url = os.getenv('TEST_REDIS_URL')
+    if not url:
+        pytest.skip('TEST_REDIS_URL is not set')
+    monkeypatch.setattr(RedisPresenceStore, '_start_heartbeat', lambda self: None)
+    stores = []
+    
+    def make(worker_id):
+        store = RedisPresenceStore(url, prefix='test-presence:', heartbeat_ttl=60)
+        store._worker = (os.getpid(), worker_id)
+        stores.append(store)
+        return store
+    
+    yield make
+    if stores:
+        stores[0].reset()
+
+def test_redis_store_forgets_crashed_workers(redis_store_factory):
+    """Test that users of a worker that stops heartbeating go offline, once."""
+    live, crashed = redis_store_factory('live'), redis_store_factory('crashed')
+    live.reset()
+    
+    live.connect(1)
+    crashed.connect(1)
+    crashed.connect(2)
+    assert live.online([1, 2]) == {1, 2}
+    
+    # The crashed worker never disconnects; the live one outlasts its heartbeat
+    assert live.heartbeat(now=time.time() + 120) == 1
+    assert live.online([1, 2]) == {1}
+    assert live.counts([1]) == [1]
+    
+    # A worker taken for dead that disconnects later can't subtract twice
+    assert crashed.disconnect(2) == 0
+    assert live.disconnect(1) == 0
+    assert live.online([1, 2]) == set()
+
+def test_presence_endpoint(app, client, auth_headers):
+    """Test bulk online status for connected and disconnected users."""
+    user_id, token = register(client, 'presenceuser')
+    
+    socket_client = socketio.test_client(app, auth={'token': token})
+    assert socket_client.is_connected()
+    
+    response = client.get(f'/api/presence/?user_ids={user_id},999', headers=auth_headers)
+    data = response.get_json()
+    
+    assert response.status_code == 200
+    assert data['presence'] == {str(user_id): True, '999': False}
+    assert data['online'] == [user_id]
+    
+    socket_client.disconnect()
+    
+    response = client.get(f'/api/presence/?user_ids={user_id}', headers=auth_headers)
+    assert response.get_json()['presence'] == {str(user_id): False}
+
+@pytest.mark.parametrize('query', ['', '?user_ids=abc', '?user_ids=' + ','.join(['1'] * 201)])
+def test_presence_endpoint_invalid(client, auth_headers, query):
+    """Test presence lookups with missing, malformed or too many ids."""
+    response = client.get(f'/api/presence/{query}', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_events_for_offline_users_are_queued(app, client, auth_headers):
+    """Test that events for offline users are delivered on reconnect."""
+    assignee_id, token = register(client, 'assignee')
+    
+    client.post('/api/tasks/', json={'title': 'While you were away', 'assigned_to': assignee_id}, headers=auth_headers)
+    
+    socket_client = socketio.test_client(app, auth={'token': token})
+    received = socket_client.get_received()
+    
+    assert [event['name'] for event in received] == ['session', 'task_assigned']
+    assert received[1]['args'][0]['task']['title'] == 'While you were away'
+    
+    # Online now, so the next event is sent live and not queued
+    client.post('/api/tasks/', json={'title': 'Live', 'assigned_to': assignee_id}, headers=auth_headers)
+    received = socket_client.get_received()
+    assert [event['name'] for event in received] == ['task_assigned']
+    assert presence.pending(assignee_id) == []
+    
+    socket_client.disconnect()
+
+def test_offline_events_dropped_when_queue_disabled(app, client, auth_headers):
+    """Test that nothing is queued when PRESENCE_QUEUE_LIMIT is 0."""
+    assignee_id, token = register(client, 'assignee')
+    presence.queue_limit = 0
+    
+    client.post('/api/tasks/', json={'title': 'Nobody listening', 'assigned_to': assignee_id}, headers=auth_headers)
+    
+    assert presence.pending(assignee_id) == []
+
+def test_socket_clients_limited_per_worker(app, client):
+    """Test that connections beyond SOCKETIO_MAX_CLIENTS are refused until a client leaves."""
+    _, token = register(client, 'crowded')
+    app.config['SOCKETIO_MAX_CLIENTS'] = 2
+    
+    first = socketio.test_client(app, auth={'token': token})
+    second = socketio.test_client(app, auth={'token': token})
+    third = socketio.test_client(app, auth={'token': token})
+    assert first.is_connected() and second.is_connected()
+    assert not third.is_connected()
+    
+    first.disconnect()
+    fourth = socketio.test_client(app, auth={'token': token})
+    assert fourth.is_connected()
+    
+    second.disconnect()
+    fourth.disconnect()
@@ -0,0 +1,161 @@
+import os
+import pstats
+import sys
+import time
+
+import pytest
+from src.config import TestingConfig
+from src.extensions import profiler
+from src.main import create_app
+from src.models.user import db
+from src.services.profiler import TOKEN_HEADER, make_token
+
+@pytest.fixture
+def profiled_app(tmp_path):
+    """Create an application with profiling enabled and dumps under tmp_path."""
+    class ProfilingConfig(TestingConfig):
+        PROFILER_ENABLED = True
+        PROFILER_DIR = str(tmp_path / 'profiles')
+        PROFILER_KEEP = 2
+        PROFILER_SAMPLE_INTERVAL_MS = 1
+    
+    app = create_app(ProfilingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        profiler.set_sampler(False)
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_headers(profiled_app):
+    return {TOKEN_HEADER: make_token(profiled_app)}
+
+def test_profiles_requests_with_a_valid_token(profiled_app, admin_headers):
+    """Test that only requests with a valid token are profiled, and old dumps are pruned."""
+    client = profiled_app.test_client()
+    
+    assert 'X-Profile-Id' not in client.get('/api/health').headers
+    assert 'X-Profile-Id' not in client.get('/api/health', headers={TOKEN_HEADER: 'forged'}).headers
+    
+    names = [client.get('/api/health', headers=admin_headers).headers['X-Profile-Id'] for _ in range(3)]
+    assert all(name.endswith('.prof') and '-health_check-' in name for name in names)
+    
+    kept = {entry.name for entry in profiler.dumps()}
+    assert len(kept) == 2
+    assert names[-1] in kept
+    
+    stats = pstats.Stats(os.path.join(profiler.directory, names[-1]))
+    assert any(func[2] == 'health_check' for func in stats.stats)
+
+def test_profile_stopped_when_a_request_raises(profiled_app, admin_headers):
+    """Test that a request ending in an unhandled exception still stops and saves its profile."""
+    @profiled_app.route('/api/_explode')
+    def explode():
+        raise RuntimeError('boom')
+    
+    client = profiled_app.test_client()
+    with pytest.raises(RuntimeError):
+        client.get('/api/_explode', headers=admin_headers)
+    
+    assert sys.getprofile() is None
+    [dump] = profiler.dumps()
+    assert '-explode-' in dump.name
+    assert 'X-Profile-Id' in client.get('/api/health', headers=admin_headers).headers
+
+def test_admin_endpoints_require_token(profiled_app):
+    """Test that the profiler endpoints reject requests without a valid token."""
+    client = profiled_app.test_client()
+    
+    assert client.get('/api/admin/profiler').status_code == 403
+    assert client.get('/api/admin/profiler', headers={TOKEN_HEADER: 'forged'}).status_code == 403
+    assert client.put('/api/admin/profiler', json={'request_rate': 1}).status_code == 403
+
+def test_download_dumps(profiled_app, admin_headers):
+    """Test listing, downloading and summarizing saved profiles."""
+    client = profiled_app.test_client()
+    name = client.get('/api/health', headers=admin_headers).headers['X-Profile-Id']
+    
+    listing = client.get('/api/admin/profiler', headers=admin_headers).get_json()
+    assert [dump['name'] for dump in listing['dumps']] == [name]
+    
+    response = client.get(f'/api/admin/profiler/dumps/{name}', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'].startswith('attachment')
+    
+    response = client.get(f'/api/admin/profiler/dumps/{name}?format=text&sort=tottime', headers=admin_headers)
+    assert response.mimetype == 'text/plain'
+    assert 'health_check' in response.get_data(as_text=True)
+    
+    assert client.get('/api/admin/profiler/dumps/missing.prof', headers=admin_headers).status_code == 404
+    assert client.get('/api/admin/profiler/dumps/..%2Fsecret.prof', headers=admin_headers).status_code == 404
+
+def test_runtime_request_rate(profiled_app, admin_headers):
+    """Test that the sampling rate for requests without a token changes at runtime."""
+    client = profiled_app.test_client()
+    
+    response = client.put('/api/admin/profiler', json={'request_rate': 2}, headers=admin_headers)
+    assert response.status_code == 400
+    
+    response = client.put('/api/admin/profiler', json={'request_rate': 1}, headers=admin_headers)
+    assert response.get_json()['request_rate'] == 1.0
+    assert 'X-Profile-Id' in client.get('/api/health').headers
+    
+    client.put('/api/admin/profiler', json={'request_rate': 0}, headers=admin_headers)
+    assert 'X-Profile-Id' not in client.get('/api/health').headers
+
+def test_stack_sampler(profiled_app, admin_headers):
+    """Test starting the stack sampler at runtime and downloading folded stacks."""
+    client = profiled_app.test_client()
+    assert client.get('/api/admin/profiler/stacks', headers=admin_headers).status_code == 404
+    
+    status = client.put('/api/admin/profiler', json={'sampler': True}, headers=admin_headers).get_json()
+    assert status['sampler']['running'] is True
+    
+    deadline = time.monotonic() + 5
+    while profiler.status()['sampler']['samples'] < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    
+    response = client.get('/api/admin/profiler/stacks', headers=admin_headers)
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0
+    assert ';' in stack
+    
+    status = client.put('/api/admin/profiler', json={'sampler': False}, headers=admin_headers).get_json()
+    assert status['sampler']['running'] is False
+    assert os.path.exists(profiler.stacks_path)
+
+def test_profiler_disabled_by_default(app, client):
+    """Test that nothing is profiled or exposed unless PROFILER_ENABLED is set."""
+    headers = {TOKEN_HEADER: make_token(app)}
+    
+    assert 'X-Profile-Id' not in client.get('/api/health', headers=headers).headers
+    assert client.get('/api/admin/profiler', headers=headers).status_code == 404
+
+def test_profiler_off_under_gevent(monkeypatch, tmp_path, caplog):
+    """Test that gevent workers, whose requests share one OS thread, are never profiled."""
+    monkeypatch.setattr('src.services.profiler._threads_are_greenlets', lambda: True)
+    class GeventProfilingConfig(TestingConfig):
+        PROFILER_ENABLED = True
+        PROFILER_DIR = str(tmp_path / 'profiles')
+    
+    app = create_app(GeventProfilingConfig)
+    headers = {TOKEN_HEADER: make_token(app)}
+    client = app.test_client()
+    
+    assert profiler.enabled is False
+    assert 'profiling needs thread workers' in caplog.text
+    assert 'X-Profile-Id' not in client.get('/api/health', headers=headers).headers
+    assert client.get('/api/admin/profiler', headers=headers).status_code == 404
+
+def test_token_command(profiled_app):
+    """Test that the CLI prints a token the admin endpoints accept."""
+    result = profiled_app.test_cli_runner().invoke(args=['profiler', 'token'])
+    assert result.exit_code == 0
+    
+    token = result.output.splitlines()[0]
+    response = profiled_app.test_client().get('/api/admin/profiler', headers={TOKEN_HEADER: token})
+    assert response.status_code == 200
@@ -0,0 +1,62 @@
+from flask import jsonify
+from query_budget import BUDGETED_BLUEPRINTS, QUERY_BUDGETS, Budget, QueryReport, RequestQueryTracker
+from src.models.task import Task
+from src.models.user import db, User
+
+def test_every_endpoint_has_a_budget(app):
+    """Test that each endpoint of the budgeted blueprints declares a query budget."""
+    endpoints = {
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if rule.endpoint.split('.')[0] in BUDGETED_BLUEPRINTS
+    }
+    
+    assert endpoints - set(QUERY_BUDGETS) == set()
+    assert set(QUERY_BUDGETS) - endpoints == set()
+
+def test_tracker_reports_budget_violations(app):
+    """Test that a request over its budget is reported with its statements."""
+    @app.route('/api/_budget_probe')
+    def budget_probe():
+        db.session.execute(db.select(User.id)).all()
+        db.session.execute(db.select(User.id)).all()
+        return jsonify({})
+    
+    report = QueryReport()
+    with RequestQueryTracker(app, db.engine, report, budgets={'budget_probe': Budget(1)}) as tracker:
+        app.test_client().get('/api/_budget_probe')
+    
+    assert report.endpoints['budget_probe'] == {'requests': 1, 'max_queries': 2, 'max_rows': 0}
+    assert len(tracker.violations) == 1
+    assert 'ran 2 queries, budget is 1' in tracker.violations[0]
+
+def test_streamed_responses_are_counted(client, auth_headers):
+    """Test that queries run while streaming count toward the request."""
+    report = QueryReport()
+    with RequestQueryTracker(client.application, db.engine, report):
+        response = client.get('/api/tasks/export', headers=auth_headers)
+        response.get_data()
+        response.close()
+    
+    assert report.endpoints['tasks.export_tasks']['max_queries'] >= 1
+
+def test_task_reads_within_budget_across_many_users(client, auth_headers):
+    """Test that task reads stay within budget when their tasks involve many different users."""
+    me = User.query.filter_by(username='testuser').one()
+    others = [User(username=f'member{n}', email=f'member{n}@example.com', password_hash='x') for n in range(6)]
+    db.session.add_all(others)
+    db.session.commit()
+    for other in others:
+        client.post('/api/tasks/', json={'title': f'For {other.username}', 'assigned_to': other.id}, headers=auth_headers)
+        db.session.add(Task(title=f'From {other.username}', created_by=other.id, assigned_to=me.id))
+    db.session.commit()
+    db.session.expire_all()
+    
+    report = QueryReport()
+    with RequestQueryTracker(client.application, db.engine, report) as tracker:
+        for url in ('/api/tasks/', '/api/tasks/?include_archived=true', '/api/tasks/?normalize=true', '/api/dashboard/'):
+            response = client.get(url, headers=auth_headers)
+            assert response.status_code == 200, url
+    
+    assert tracker.violations == []
+    tasks = client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']
+    assert {task['creator']['username'] for task in tasks} == {'testuser'} | {other.username for other in others}
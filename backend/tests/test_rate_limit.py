@@ -0,0 +1,110 @@
+import pytest
+import threading
+
+from src.config import TestingConfig
+from src.extensions import limiter
+from src.main import create_app
+from src.models.user import db
+from src.services.rate_limit import MemoryBucketStore
+
+@pytest.fixture
+def limited_app(app):
+    """Enable rate limiting with a small budget."""
+    app.config.update(
+        RATE_LIMIT_ENABLED=True,
+        RATE_LIMIT_PER_SECOND=1,
+        RATE_LIMIT_BURST=5,
+        RATE_LIMIT_COSTS={'tasks.get_task_stats': 5}
+    )
+    limiter.store.reset()
+    return app
+
+@pytest.fixture
+def proxied_app():
+    """Create a rate limited application behind one trusted proxy."""
+    class ProxiedConfig(TestingConfig):
+        PROXY_FIX_HOPS = 1
+        RATE_LIMIT_ENABLED = True
+        RATE_LIMIT_PER_SECOND = 1
+        RATE_LIMIT_BURST = 2
+    
+    app = create_app(ProxiedConfig)
+    limiter.store.reset()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_bucket_refills_over_time():
+    """Test token consumption and refill of a single bucket."""
+    store = MemoryBucketStore()
+    
+    assert store.consume('k', 3, rate=1, burst=5, now=0) == (True, 0.0)
+    allowed, retry_after = store.consume('k', 3, rate=1, burst=5, now=0)
+    assert not allowed
+    assert retry_after == pytest.approx(1.0)
+    assert store.consume('k', 3, rate=1, burst=5, now=1)[0]
+
+def test_bucket_evicts_idle_keys():
+    """Test that fully refilled buckets are dropped once the store is full."""
+    store = MemoryBucketStore(max_keys=2)
+    for i in range(3):
+        store.consume(f'k{i}', 1, rate=1, burst=5, now=i * 10)
+    
+    assert len(store._buckets) == 1
+
+def test_bucket_store_stays_bounded_under_key_churn():
+    """Test that busy buckets past max_keys are evicted least recently used first."""
+    store = MemoryBucketStore(max_keys=3)
+    for i in range(4):
+        store.consume(f'k{i}', 1, rate=1, burst=5, now=i)
+    store.consume('k0', 1, rate=1, burst=5, now=4)
+    store.consume('k4', 1, rate=1, burst=5, now=4)
+    
+    # None had refilled, so the least recently used made room
+    assert list(store._buckets) == ['k3', 'k0', 'k4']
+
+def test_requests_over_budget_get_429(client, auth_headers, limited_app):
+    """Test that a client exceeding its budget is told when to retry."""
+    statuses = [client.get('/api/tasks/', headers=auth_headers).status_code for _ in range(6)]
+    
+    assert statuses[:5] == [200] * 5
+    assert statuses[5] == 429
+    response = client.get('/api/tasks/', headers=auth_headers)
+    assert int(response.headers['Retry-After']) >= 1
+
+def test_endpoint_cost_weights(client, auth_headers, limited_app):
+    """Test that expensive endpoints use up the budget faster."""
+    assert client.get('/api/tasks/stats', headers=auth_headers).status_code == 200
+    assert client.get('/api/tasks/stats', headers=auth_headers).status_code == 429
+
+def test_health_check_is_exempt(client, limited_app):
+    """Test that health checks are never rate limited."""
+    for _ in range(10):
+        assert client.get('/api/health').status_code == 200
+
+def test_concurrency_limit_sheds_load(client, auth_headers, limited_app):
+    """Test that requests beyond the concurrency limit are rejected with 503."""
+    limiter._slots = threading.BoundedSemaphore(1)
+    limiter._slots.acquire()
+    try:
+        response = client.get('/api/tasks/', headers=auth_headers)
+    finally:
+        limiter._slots.release()
+    
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert client.get('/api/tasks/', headers=auth_headers).status_code == 200
+
+def test_proxied_clients_get_their_own_buckets(proxied_app):
+    """Test that anonymous clients behind the proxy are keyed by X-Forwarded-For, not the proxy's address."""
+    client = proxied_app.test_client()
+    
+    def status(forwarded_for):
+        return client.get('/api/auth/me', headers={'X-Forwarded-For': forwarded_for}).status_code
+    
+    assert [status('203.0.113.1') for _ in range(3)] == [401, 401, 429]
+    assert status('203.0.113.2') == 401
+    # Only the address the trusted proxy appended counts, not one the client sent
+    assert status('198.51.100.7, 203.0.113.1') == 429
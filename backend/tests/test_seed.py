@@ -0,0 +1,92 @@
+from collections import Counter
+from datetime import datetime
+
+from src.models.task import Task, TaskStatus
+from src.models.task_stats import TaskDailyStats
+from src.models.user import User, db
+from src.services.rollups import backfill_rollups
+from src.services.seed import SEED_PASSWORD, seed_database
+
+NOW = datetime(2025, 6, 1, 12, 0)
+
+def table_rows(model, exclude=()):
+    table = model.__table__
+    columns = [column for column in table.columns if column.name not in exclude]
+    return db.session.execute(db.select(*columns).order_by(*table.primary_key.columns)).all()
+
+def test_seed_database(app):
+    """Test that seeding inserts users and tasks with realistic distributions."""
+    counts = seed_database(users=200, tasks=5000, seed=1, batch_size=700, now=NOW)
+    assert counts['users'] == 200 and counts['tasks'] == 5000
+    assert db.session.query(User).count() == 200
+    
+    tasks = db.session.execute(db.select(Task.__table__)).all()
+    assert len(tasks) == 5000
+    
+    # Ownership is skewed: the busiest fifth of the users own most tasks
+    owners = Counter(task.created_by for task in tasks)
+    busiest = sum(count for _, count in owners.most_common(40))
+    assert busiest > 2500
+    
+    statuses = Counter(task.status for task in tasks)
+    assert set(statuses) == set(TaskStatus)
+    assert statuses[TaskStatus.COMPLETED] > statuses[TaskStatus.CANCELLED]
+    
+    unassigned = sum(task.assigned_to is None for task in tasks)
+    self_assigned = sum(task.assigned_to == task.created_by for task in tasks)
+    assert 0.25 < unassigned / 5000 < 0.45
+    assert 0.3 < self_assigned / 5000 < 0.5
+    
+    for task in tasks:
+        assert task.created_at <= task.updated_at <= NOW
+        assert task.due_date is None or task.due_date > task.created_at
+
+def test_seeded_users_can_log_in(app, client):
+    """Test that every seeded user shares the precomputed password hash."""
+    seed_database(users=20, tasks=0, now=NOW)
+    hashes = {user.password_hash for user in User.query.all()}
+    assert len(hashes) == 1
+    
+    user = User.query.filter_by(is_active=True).first()
+    response = client.post('/api/auth/login', json={'username': user.username, 'password': SEED_PASSWORD})
+    assert response.status_code == 200
+
+def test_seed_is_deterministic(app):
+    """Test that the same seed produces the same rows."""
+    # The shared hash still gets a fresh salt on every run
+    seed_database(users=50, tasks=500, seed=3, now=NOW)
+    first = (table_rows(User, exclude=['password_hash']), table_rows(Task))
+    
+    db.drop_all()
+    db.create_all()
+    seed_database(users=50, tasks=500, seed=3, now=NOW)
+    assert (table_rows(User, exclude=['password_hash']), table_rows(Task)) == first
+    
+    db.drop_all()
+    db.create_all()
+    seed_database(users=50, tasks=500, seed=4, now=NOW)
+    assert table_rows(Task) != first[1]
+
+def test_seed_writes_rollups(app, monkeypatch):
+    """Test that the rollups written while seeding match a backfill."""
+    monkeypatch.setattr('src.services.seed.ROLLUP_CHUNK_TASKS', 300)
+    counts = seed_database(users=60, tasks=1000, seed=5, batch_size=250, now=NOW)
+    seeded = table_rows(TaskDailyStats)
+    assert len(seeded) == counts['rollups']
+    
+    backfill_rollups()
+    assert table_rows(TaskDailyStats) == seeded
+
+def test_seed_command(app):
+    """Test that the CLI seeds and can run again without colliding."""
+    runner = app.test_cli_runner()
+    for _ in range(2):
+        result = runner.invoke(args=['seed', '--users', '30', '--tasks', '100', '--batch-size', '40'])
+        assert result.exit_code == 0, result.output
+        assert 'Seeded 30 users and 100 tasks' in result.output
+    
+    assert db.session.query(User).count() == 60
+    assert db.session.query(Task).count() == 200
+    
+    result = runner.invoke(args=['seed', '--users', '0', '--tasks', '10'])
+    assert result.exit_code != 0
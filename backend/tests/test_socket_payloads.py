@@ -0,0 +1,92 @@
+import pytest
+from src.extensions import socketio
+from src.services.socket_payloads import payload_metrics
+
+def register(client, username):
+    """Register a user and return (user_id, token)."""
+    response = client.post('/api/auth/register', json={
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': 'testpass123'
+    })
+    data = response.get_json()
+    return data['user']['id'], data['access_token']
+
+def events(socket_client, name):
+    """Payloads of the received events called ``name``."""
+    return [event['args'][0] for event in socket_client.get_received() if event['name'] == name]
+
+def test_update_events_carry_only_changes(app, client):
+    """Test that task_updated sends the changed fields and the version."""
+    user_id, token = register(client, 'editor')
+    headers = {'Authorization': f'Bearer {token}'}
+    task_id = client.post('/api/tasks/', json={'title': 'Diffed'}, headers=headers).get_json()['task']['id']
+    
+    socket_client = socketio.test_client(app, auth={'token': token})
+    socket_client.get_received()
+    
+    client.put(f'/api/tasks/{task_id}', json={'title': 'Diffed', 'priority': 'high'}, headers=headers)
+    
+    [payload] = events(socket_client, 'task_updated')
+    assert payload['changed'] == ['priority']
+    assert set(payload['task']) == {'id', 'title', 'version', 'updated_at', 'priority'}
+    assert payload['task']['priority'] == 'high'
+    assert payload['task']['version'] == 2
+    
+    socket_client.disconnect()
+
+def test_status_change_event(app, client):
+    """Test that a status change reports the old and new status."""
+    user_id, token = register(client, 'editor')
+    headers = {'Authorization': f'Bearer {token}'}
+    task_id = client.post('/api/tasks/', json={'title': 'Status'}, headers=headers).get_json()['task']['id']
+    
+    socket_client = socketio.test_client(app, auth={'token': token})
+    socket_client.get_received()
+    
+    client.put(f'/api/tasks/{task_id}', json={'status': 'completed'}, headers=headers)
+    received = socket_client.get_received()
+    
+    [payload] = [event['args'][0] for event in received if event['name'] == 'task_status_changed']
+    assert payload['old_status'] == 'pending'
+    assert payload['new_status'] == 'completed'
+    assert payload['task'] == {'id': task_id, 'title': 'Status', 'version': 2, 'status': 'completed'}
+    
+    socket_client.disconnect()
+
+def test_msgpack_negotiation(app, client):
+    """Test that a connection asking for MessagePack gets packed payloads."""
+    msgpack = pytest.importorskip('msgpack')
+    user_id, token = register(client, 'packer')
+    headers = {'Authorization': f'Bearer {token}'}
+    
+    socket_client = socketio.test_client(app, auth={'token': token, 'encoding': 'msgpack'})
+    assert events(socket_client, 'session') == [{'user_id': user_id, 'encoding': 'msgpack'}]
+    
+    client.post('/api/tasks/', json={'title': 'Packed'}, headers=headers)
+    
+    [payload] = events(socket_client, 'task_created')
+    assert msgpack.unpackb(payload)['task']['title'] == 'Packed'
+    
+    socket_client.disconnect()
+
+def test_payload_metrics(app, client):
+    """Test that sent events are counted and sized per encoding."""
+    user_id, token = register(client, 'metered')
+    headers = {'Authorization': f'Bearer {token}'}
+    payload_metrics.reset()
+    
+    socket_client = socketio.test_client(app, auth={'token': token})
+    client.post('/api/tasks/', json={'title': 'Counted'}, headers=headers)
+    
+    response = client.get('/api/metrics/socket', headers=headers)
+    data = response.get_json()
+    
+    assert response.status_code == 200
+    created = [event for event in data['events'] if event['event'] == 'task_created']
+    assert created[0]['encoding'] == 'json'
+    assert created[0]['count'] == 1
+    assert created[0]['bytes'] > len('Counted')
+    assert data['total_events'] >= 2
+    
+    socket_client.disconnect()
@@ -0,0 +1,45 @@
+from src.extensions import statement_cache
+
+HOT_QUERIES = [
+    '/api/tasks/',
+    '/api/tasks/?status={status}',
+    '/api/tasks/?status={status}&priority=high',
+    '/api/tasks/?assigned_to_me=true&labels=bug&exclude_labels=ui',
+    '/api/tasks/?normalize=true',
+    '/api/tasks/{task_id}',
+    '/api/tasks/stats',
+    '/api/auth/me',
+]
+
+def _request_all(client, auth_headers, task_id, status):
+    for url in HOT_QUERIES:
+        response = client.get(url.format(task_id=task_id, status=status), headers=auth_headers)
+        assert response.status_code == 200, url
+
+def test_hot_reads_compile_once(client, auth_headers):
+    """Test that the hot read paths only bind new values once each shape has been compiled."""
+    task_id = client.post(
+        '/api/tasks/', json={'title': 'Cached', 'labels': ['bug']}, headers=auth_headers
+    ).get_json()['task']['id']
+    client.post('/api/tasks/', json={'title': 'Other', 'priority': 'high'}, headers=auth_headers)
+    
+    _request_all(client, auth_headers, task_id, 'pending')
+    before = statement_cache.snapshot()
+    _request_all(client, auth_headers, task_id, 'completed')
+    after = statement_cache.snapshot()
+    
+    assert after['misses'] == before['misses']
+    assert after['hits'] > before['hits']
+
+def test_statement_metrics(client, auth_headers):
+    """Test the compiled statement cache metrics endpoint."""
+    client.get('/api/tasks/', headers=auth_headers)
+    client.get('/api/tasks/', headers=auth_headers)
+    
+    response = client.get('/api/metrics/statements', headers=auth_headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['hits'] > 0
+    assert 0 < data['hit_rate'] <= 1
+    assert data['cache_size'] == 500
+    assert 0 < data['cached_statements'] <= data['cache_size']
@@ -0,0 +1,146 @@
+import json
+
+from src.services.broadcaster import ChangeBroadcaster
+
+def make_broadcaster(**config):
+    broadcaster = ChangeBroadcaster()
+    broadcaster.buffer_limit = config.get('buffer', 10)
+    broadcaster.replay_limit = config.get('replay', 10)
+    broadcaster.history_users = config.get('history_users', 100)
+    broadcaster.max_streams = config.get('max_streams', 0)
+    return broadcaster
+
+def register(client, username):
+    """Register a user and return (user_id, token)."""
+    response = client.post('/api/auth/register', json={
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': 'testpass123'
+    })
+    data = response.get_json()
+    return data['user']['id'], data['access_token']
+
+def parse_events(chunks):
+    """Split SSE text into (id, event, data) tuples, skipping comments and retry."""
+    events = []
+    for block in ''.join(chunks).split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if line and not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields.get('id'), fields['event'], json.loads(fields['data'])))
+    return events
+
+def test_broadcaster_fans_out_and_resumes():
+    """Test that events reach every stream of a user and are replayed after Last-Event-ID."""
+    broadcaster = make_broadcaster()
+    built = []
+    
+    # Nobody has streamed yet, so the payload isn't even built
+    broadcaster.publish(1, 'task_created', lambda: built.append(1) or {})
+    assert built == []
+    
+    first, _ = broadcaster.subscribe(1)
+    second, _ = broadcaster.subscribe(1)
+    for n in range(3):
+        broadcaster.publish(1, 'task_updated', lambda: {'n': n})
+    broadcaster.publish(2, 'task_updated', lambda: {'n': 'other user'})
+    
+    events = [first.get(0) for _ in range(3)]
+    assert [json.loads(data)['n'] for _, _, data in events] == [0, 1, 2]
+    assert [second.get(0) for _ in range(3)] == events
+    assert first.get(0) is None
+    
+    broadcaster.unsubscribe(first)
+    broadcaster.unsubscribe(second)
+    
+    # Resuming after the first event replays the other two
+    subscriber, backlog = broadcaster.subscribe(1, last_event_id=events[0][0])
+    assert backlog == events[1:]
+    
+    # Unknown ids can't be resumed from
+    assert broadcaster.subscribe(1, last_event_id='stale-1')[1] is None
+
+def test_broadcaster_reports_gaps_in_history():
+    """Test that resuming from an event no longer buffered asks for a reset."""
+    broadcaster = make_broadcaster(replay=2)
+    subscriber, _ = broadcaster.subscribe(1)
+    for n in range(4):
+        broadcaster.publish(1, 'task_updated', lambda: {'n': n})
+    first_id = subscriber.get(0)[0]
+    
+    assert broadcaster.subscribe(1, last_event_id=first_id)[1] is None
+
+def test_broadcaster_drops_slow_consumers():
+    """Test that a stream whose buffer fills up is closed and counted."""
+    broadcaster = make_broadcaster(buffer=2)
+    slow, _ = broadcaster.subscribe(1)
+    fast, _ = broadcaster.subscribe(1)
+    
+    for n in range(3):
+        broadcaster.publish(1, 'task_updated', lambda: {'n': n})
+        fast.get(0)
+    
+    assert slow.closed and slow.dropped
+    assert slow.get(0) is None
+    assert not fast.closed
+    
+    broadcaster.unsubscribe(slow)
+    broadcaster.unsubscribe(slow)
+    assert broadcaster.snapshot()['dropped_streams'] == 1
+
+def test_broadcaster_limits_streams():
+    """Test that subscribing beyond the stream limit is refused."""
+    broadcaster = make_broadcaster(max_streams=1)
+    subscriber, _ = broadcaster.subscribe(1)
+    
+    assert broadcaster.subscribe(2) is None
+    broadcaster.unsubscribe(subscriber)
+    assert broadcaster.subscribe(2) is not None
+
+def test_stream_endpoint(app, client):
+    """Test that committed task changes arrive on the SSE stream and can be resumed."""
+    app.config['SSE_MAX_STREAM_SECONDS'] = 0.2
+    user_id, token = register(client, 'streamer')
+    headers = {'Authorization': f'Bearer {token}'}
+    
+    response = client.get(f'/api/tasks/stream?jwt={token}', buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    stream = (chunk.decode() for chunk in response.response)
+    assert next(stream) == 'retry: 3000\n\n'
+    
+    task_id = client.post('/api/tasks/', json={'title': 'Streamed'}, headers=headers).get_json()['task']['id']
+    client.patch(f'/api/tasks/{task_id}', json={'status': 'completed'}, headers=headers)
+    events = parse_events(stream)
+    response.close()
+    
+    assert [event for _, event, _ in events] == ['task_created', 'task_updated', 'task_status_changed']
+    assert events[0][2]['task']['id'] == task_id
+    assert events[2][2]['new_status'] == 'completed'
+    
+    # Reconnecting with the first event id replays the rest
+    response = client.get('/api/tasks/stream', headers={**headers, 'Last-Event-ID': events[0][0]}, buffered=False)
+    replayed = parse_events(chunk.decode() for chunk in response.response)
+    response.close()
+    assert replayed == events[1:]
+
+def test_stream_requires_token(client):
+    """Test that the stream rejects unauthenticated requests."""
+    response = client.get('/api/tasks/stream')
+    assert response.status_code == 401
+
+def test_stream_limit(app, client):
+    """Test that the stream endpoint sheds load beyond SSE_MAX_STREAMS."""
+    from src.extensions import broadcaster
+    
+    _, token = register(client, 'limited')
+    broadcaster.max_streams = 1
+    first = client.get(f'/api/tasks/stream?jwt={token}', buffered=False)
+    
+    response = client.get(f'/api/tasks/stream?jwt={token}')
+    assert response.status_code == 503
+    assert 'Retry-After' in response.headers
+    
+    first.close()
+    metrics = client.get('/api/metrics/stream', headers={'Authorization': f'Bearer {token}'}).get_json()
+    assert metrics['streams'] == 0
@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta
+
+from src.models.user import db
+from src.models.task import Task
+from src.models.task_tree import TaskClosure
+from src.services.archive import archive_tasks
+
+def _create_task(client, auth_headers, **fields):
+    response = client.post('/api/tasks/', json={'title': 'Task', **fields}, headers=auth_headers)
+    assert response.status_code == 201
+    return response.get_json()['task']['id']
+
+def _move(client, auth_headers, task_id, parent_id):
+    return client.post(f'/api/tasks/{task_id}/move', json={'parent_id': parent_id}, headers=auth_headers)
+
+def assert_tree_consistent():
+    """Check the closure table and subtask counts against the parent_id links."""
+    db.session.expire_all()
+    tasks = {task.id: task for task in Task.query.all()}
+    
+    expected = set()
+    for task in tasks.values():
+        depth, parent_id = 1, task.parent_id
+        while parent_id is not None:
+            expected.add((parent_id, task.id, depth))
+            depth, parent_id = depth + 1, tasks[parent_id].parent_id
+    links = {(link.ancestor_id, link.descendant_id, link.depth) for link in TaskClosure.query.all()}
+    assert links == expected
+    
+    for task in tasks.values():
+        below = [tasks[descendant] for ancestor, descendant, _ in expected if ancestor == task.id]
+        assert task.subtask_count == len(below)
+        assert task.completed_subtask_count == sum(subtask.status.value == 'completed' for subtask in below)
+
+def test_create_subtasks(client, auth_headers):
+    """Test that creating subtasks links them under every ancestor and counts them."""
+    root = _create_task(client, auth_headers, title='Root')
+    child = _create_task(client, auth_headers, title='Child', parent_id=root)
+    grandchild = _create_task(client, auth_headers, title='Grandchild', parent_id=child, status='completed')
+    _create_task(client, auth_headers, title='Sibling', parent_id=root)
+    
+    assert_tree_consistent()
+    task = client.get(f'/api/tasks/{root}', headers=auth_headers).get_json()['task']
+    assert task['subtask_count'] == 3
+    assert task['completed_subtask_count'] == 1
+    assert task['parent_id'] is None
+    assert db.session.get(Task, grandchild).parent_id == child
+
+def test_create_subtask_invalid_parent(client, auth_headers, test_task):
+    """Test that subtasks need a parent the user can see."""
+    response = client.post('/api/tasks/', json={'title': 'Orphan', 'parent_id': 999}, headers=auth_headers)
+    assert response.status_code == 404
+    
+    response = client.post('/api/tasks/', json={'title': 'Orphan', 'parent_id': 'one'}, headers=auth_headers)
+    assert response.status_code == 400
+    
+    # test_task belongs to another user
+    response = client.post('/api/tasks/', json={'title': 'Orphan', 'parent_id': test_task.id}, headers=auth_headers)
+    assert response.status_code == 403
+
+def test_get_subtree(client, auth_headers, count_queries):
+    """Test that a subtree is returned shallowest first from one query."""
+    root = _create_task(client, auth_headers, title='Root')
+    child = _create_task(client, auth_headers, title='Child', parent_id=root)
+    grandchild = _create_task(client, auth_headers, title='Grandchild', parent_id=child)
+    _create_task(client, auth_headers, title='Unrelated')
+    
+    with count_queries() as queries:
+        response = client.get(f'/api/tasks/{root}/subtree', headers=auth_headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['task']['id'] == root
+    assert [(task['id'], task['depth']) for task in data['subtasks']] == [(child, 1), (grandchild, 2)]
+    assert data['count'] == 2
+    assert data['subtasks'][0]['creator']['username'] == 'testuser'
+    # The root task, then the subtree with its users joined in
+    assert queries.count == 2
+    
+    data = client.get(f'/api/tasks/{root}/subtree?max_depth=1', headers=auth_headers).get_json()
+    assert [task['id'] for task in data['subtasks']] == [child]
+    
+    data = client.get(f'/api/tasks/{root}/subtree?normalize=true', headers=auth_headers).get_json()
+    assert 'creator' not in data['subtasks'][0]
+    assert data['users'][str(data['task']['created_by'])]['username'] == 'testuser'
+
+def test_status_changes_update_ancestor_counts(client, auth_headers):
+    """Test that completing and reopening a subtask updates every ancestor."""
+    root = _create_task(client, auth_headers, title='Root')
+    child = _create_task(client, auth_headers, title='Child', parent_id=root)
+    grandchild = _create_task(client, auth_headers, title='Grandchild', parent_id=child)
+    
+    response = client.put(f'/api/tasks/{grandchild}', json={'status': 'completed'}, headers=auth_headers)
+    assert response.status_code == 200
+    assert_tree_consistent()
+    assert db.session.get(Task, root).completed_subtask_count == 1
+    
+    response = client.patch(f'/api/tasks/{child}', json={'status': 'completed'}, headers=auth_headers)
+    assert response.status_code == 200
+    assert_tree_consistent()
+    assert db.session.get(Task, root).completed_subtask_count == 2
+    
+    response = client.patch(f'/api/tasks/{grandchild}', json={'status': 'in_progress'}, headers=auth_headers)
+    assert response.status_code == 200
+    assert_tree_consistent()
+    assert db.session.get(Task, root).completed_subtask_count == 1
+
+def test_move_subtree(client, auth_headers):
+    """Test that moving a task takes its subtasks along and keeps the counts right."""
+    first = _create_task(client, auth_headers, title='First')
+    second = _create_task(client, auth_headers, title='Second')
+    branch = _create_task(client, auth_headers, title='Branch', parent_id=first)
+    leaf = _create_task(client, auth_headers, title='Leaf', parent_id=branch, status='completed')
+    _create_task(client, auth_headers, title='Leaf 2', parent_id=leaf)
+    
+    response = _move(client, auth_headers, branch, second)
+    assert response.status_code == 200
+    task = response.get_json()['task']
+    assert task['parent_id'] == second
+    assert task['version'] == 2
+    assert_tree_consistent()
+    assert db.session.get(Task, first).subtask_count == 0
+    assert db.session.get(Task, second).subtask_count == 3
+    
+    # Into a deeper spot, then out to the top level
+    assert _move(client, auth_headers, leaf, first).status_code == 200
+    assert_tree_consistent()
+    assert _move(client, auth_headers, first, second).status_code == 200
+    assert_tree_consistent()
+    assert _move(client, auth_headers, first, None).status_code == 200
+    assert_tree_consistent()
+    assert db.session.get(Task, second).subtask_count == 1
+
+def test_move_rejects_cycles(client, auth_headers):
+    """Test that a task cannot be moved under itself or its own subtasks."""
+    root = _create_task(client, auth_headers, title='Root')
+    child = _create_task(client, auth_headers, title='Child', parent_id=root)
+    
+    assert _move(client, auth_headers, root, child).status_code == 400
+    assert _move(client, auth_headers, root, root).status_code == 400
+    assert client.post(f'/api/tasks/{root}/move', json={}, headers=auth_headers).status_code == 400
+    assert_tree_consistent()
+
+def test_move_is_bulk(client, auth_headers, count_queries):
+    """Test that moving a subtree runs the same statements however large it is."""
+    target = _create_task(client, auth_headers, title='Target')
+    counts = []
+    for size in (2, 20):
+        root = _create_task(client, auth_headers, title='Root')
+        parent = root
+        for _ in range(size):
+            parent = _create_task(client, auth_headers, parent_id=parent)
+        
+        with count_queries() as queries:
+            assert _move(client, auth_headers, root, target).status_code == 200
+        counts.append(queries.count)
+    
+    assert counts[0] == counts[1]
+    assert_tree_consistent()
+
+def test_delete_hands_subtasks_to_parent(client, auth_headers):
+    """Test that deleting a task moves its subtasks up a level."""
+    root = _create_task(client, auth_headers, title='Root')
+    middle = _create_task(client, auth_headers, title='Middle', parent_id=root, status='completed')
+    child = _create_task(client, auth_headers, title='Child', parent_id=middle)
+    _create_task(client, auth_headers, title='Grandchild', parent_id=child)
+    
+    assert client.delete(f'/api/tasks/{middle}', headers=auth_headers).status_code == 200
+    assert_tree_consistent()
+    assert db.session.get(Task, child).parent_id == root
+    assert db.session.get(Task, root).subtask_count == 2
+    assert db.session.get(Task, root).completed_subtask_count == 0
+    
+    assert client.delete(f'/api/tasks/{root}', headers=auth_headers).status_code == 200
+    assert_tree_consistent()
+    assert db.session.get(Task, child).parent_id is None
+
+def test_archive_skips_task_hierarchies(client, auth_headers):
+    """Test that the archiver leaves tasks with a parent or subtasks alone."""
+    root = _create_task(client, auth_headers, title='Root', status='completed')
+    child = _create_task(client, auth_headers, title='Child', parent_id=root, status='completed')
+    loose = _create_task(client, auth_headers, title='Loose', status='completed')
+    for task_id in (root, child, loose):
+        db.session.get(Task, task_id).updated_at = datetime.utcnow() - timedelta(days=60)
+    db.session.commit()
+    
+    assert archive_tasks(older_than_days=30) == 1
+    assert {task.id for task in Task.query.all()} == {root, child}
@@ -0,0 +1,257 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from src.config import TestingConfig
+from src.extensions import task_history
+from src.main import create_app
+from src.models.task import Task
+from src.models.task_event import TaskEvent
+from src.models.user import db
+from src.routes.dashboard import dashboard_cache
+from src.services.task_history import compact_history, merge_changes, purge_history
+
+@pytest.fixture
+def app():
+    """Create an application that writes task history in the transaction of each change."""
+    class HistoryConfig(TestingConfig):
+        TASK_HISTORY_ENABLED = True
+        TASK_HISTORY_FLUSH_INTERVAL_MS = 0
+    
+    app = create_app(HistoryConfig)
+    dashboard_cache.clear()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def buffered_app(tmp_path):
+    """Create an application with buffered history and a database file under tmp_path."""
+    class BufferedHistoryConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        TASK_HISTORY_ENABLED = True
+        TASK_HISTORY_FLUSH_INTERVAL_MS = 20
+    
+    app = create_app(BufferedHistoryConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        task_history.stop()
+        db.session.remove()
+        db.drop_all()
+
+def history(client, auth_headers, task_id, query=''):
+    response = client.get(f'/api/tasks/{task_id}/history{query}', headers=auth_headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+def add_events(task_id, actions, days_ago):
+    """Insert events for ``task_id`` directly, one per action, ``days_ago`` old."""
+    when = datetime.utcnow() - timedelta(days=days_ago)
+    for version, (action, changes) in enumerate(actions, start=1):
+        db.session.add(TaskEvent(
+            task_id=task_id, task_created_at=when, version=version, action=action, changes=changes,
+            user_id=1, created_at=when
+        ))
+    db.session.commit()
+
+def test_history_records_field_diffs(client, auth_headers):
+    """Test that creates, updates, moves, label changes and deletes are logged as diffs."""
+    parent = client.post('/api/tasks/', json={'title': 'Parent'}, headers=auth_headers).get_json()['task']
+    task = client.post('/api/tasks/', json={'title': 'Draft', 'labels': ['bug']}, headers=auth_headers).get_json()['task']
+    task_id = task['id']
+    
+    client.put(f'/api/tasks/{task_id}', json={'status': 'in_progress', 'priority': 'high'}, headers=auth_headers)
+    client.patch(f'/api/tasks/{task_id}', json={'title': 'Final'}, headers=auth_headers)
+    client.patch(f'/api/tasks/{task_id}', json={'title': 'Final'}, headers=auth_headers)
+    client.post(f'/api/tasks/{task_id}/move', json={'parent_id': parent['id']}, headers=auth_headers)
+    client.put(f'/api/tasks/{task_id}/labels', json={'labels': ['bug', 'ui']}, headers=auth_headers)
+    
+    events = history(client, auth_headers, task_id)['events']
+    assert [event['action'] for event in events] == ['created'] + ['updated'] * 4
+    created = events[0]['changes']
+    assert created['title'] == [None, 'Draft']
+    assert created['status'] == [None, 'pending']
+    assert created['labels'] == [None, ['bug']]
+    assert 'due_date' not in created
+    
+    assert events[1]['changes'] == {'status': ['pending', 'in_progress'], 'priority': ['medium', 'high']}
+    assert events[2]['changes'] == {'title': ['Draft', 'Final']}
+    # The repeated PATCH changed nothing and left no event
+    assert events[3]['changes'] == {'parent_id': [None, parent['id']]}
+    assert events[4]['changes'] == {'labels': [['bug'], ['bug', 'ui']]}
+    assert [event['version'] for event in events] == [1, 2, 3, 5, 6]
+    assert all(event['user_id'] == task['created_by'] for event in events)
+    
+    assert client.delete(f'/api/tasks/{task_id}', headers=auth_headers).status_code == 200
+    deleted = TaskEvent.query.filter_by(task_id=task_id, action='deleted').one()
+    assert deleted.changes['title'] == ['Final', None]
+    assert deleted.task_created_at.isoformat() == task['created_at']
+
+def test_history_records_imports(client, auth_headers):
+    """Test that imported tasks get a created event like tasks created one at a time."""
+    body = '\n'.join(json.dumps({'title': f'Imported {n}', 'status': 'completed'}) for n in range(3))
+    response = client.post('/api/tasks/import', data=body, headers=auth_headers,
+                           content_type='application/x-ndjson')
+    assert response.get_json()['imported'] == 3
+    
+    for task in client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']:
+        events = history(client, auth_headers, task['id'])['events']
+        assert [event['action'] for event in events] == ['created']
+        assert events[0]['version'] == 1
+        assert events[0]['user_id'] == task['created_by']
+        assert events[0]['changes'] == {
+            'title': [None, task['title']], 'status': [None, 'completed'], 'priority': [None, 'medium']
+        }
+
+def test_history_pagination(client, auth_headers):
+    """Test that history pages follow the sequence number."""
+    task_id = client.post('/api/tasks/', json={'title': 'Busy'}, headers=auth_headers).get_json()['task']['id']
+    for n in range(4):
+        client.patch(f'/api/tasks/{task_id}', json={'title': f'Busy {n}'}, headers=auth_headers)
+    
+    page = history(client, auth_headers, task_id, '?limit=2')
+    assert page['count'] == 2
+    sequences = [event['sequence'] for event in page['events']]
+    while page['next_after']:
+        page = history(client, auth_headers, task_id, f"?limit=2&after={page['next_after']}")
+        sequences += [event['sequence'] for event in page['events']]
+    assert len(sequences) == 5
+    assert sequences == sorted(sequences)
+    
+    response = client.get(f'/api/tasks/{task_id}/history?limit=zero', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_history_access(client, auth_headers, test_task):
+    """Test that only the creator and assignee can read a task's history."""
+    response = client.get(f'/api/tasks/{test_task.id}/history', headers=auth_headers)
+    assert response.status_code == 403
+    
+    response = client.get('/api/tasks/999/history', headers=auth_headers)
+    assert response.status_code == 404
+
+def test_history_not_shared_by_reused_ids(client, auth_headers, test_user):
+    """Test that a task given the id of a deleted task starts with an empty history."""
+    task = client.post('/api/tasks/', json={'title': 'Secret plans'}, headers=auth_headers).get_json()['task']
+    task_id = task['id']
+    client.patch(f'/api/tasks/{task_id}', json={'description': 'Do not share'}, headers=auth_headers)
+    assert client.delete(f'/api/tasks/{task_id}', headers=auth_headers).status_code == 200
+    # The deleted task's events stay in the log
+    assert TaskEvent.query.filter_by(task_id=task_id).count() == 3
+    
+    # Force the old id onto a task of another user
+    db.session.add(Task(id=task_id, title='Mine', created_by=test_user.id))
+    db.session.commit()
+    
+    response = client.post('/api/auth/login', json={'username': 'testuser2', 'password': 'testpass123'})
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    assert history(client, headers, task_id)['events'] == []
+
+def test_history_off_by_default():
+    """Test that the test configuration leaves the history off, keeping PATCH a single statement."""
+    assert TestingConfig.TASK_HISTORY_ENABLED is False
+
+def test_merge_changes():
+    """Test that merged diffs keep the first old and last new value of each field."""
+    merged = merge_changes([
+        {'status': ['pending', 'in_progress'], 'title': ['A', 'B']},
+        {'status': ['in_progress', 'completed']},
+        {'title': ['B', 'A']}
+    ])
+    assert merged == {'status': ['pending', 'completed']}
+
+def test_compact_history(app):
+    """Test that old runs of updates are merged and recent events left alone."""
+    add_events(1, [
+        ('created', {'title': [None, 'A']}),
+        ('updated', {'status': ['pending', 'in_progress']}),
+        ('updated', {'status': ['in_progress', 'completed']}),
+        ('updated', {'title': ['A', 'B']}),
+    ], days_ago=60)
+    add_events(2, [('updated', {'title': ['X', 'Y']})] * 3, days_ago=1)
+    add_events(3, [('updated', {'title': ['X', 'Y']})], days_ago=60)
+    
+    assert compact_history(older_than_days=30, batch_size=1) == 2
+    
+    events = TaskEvent.query.filter_by(task_id=1).order_by(TaskEvent.id).all()
+    assert [event.action for event in events] == ['created', 'updated']
+    assert events[1].changes == {'status': ['pending', 'completed'], 'title': ['A', 'B']}
+    assert events[1].merged == 3
+    assert events[1].version == 4
+    assert TaskEvent.query.filter_by(task_id=2).count() == 3
+    assert TaskEvent.query.filter_by(task_id=3).count() == 1
+    
+    assert compact_history(older_than_days=30) == 0
+
+def test_purge_history(app):
+    """Test that events past the retention period are deleted in batches."""
+    add_events(1, [('updated', {'title': ['A', 'B']})] * 5, days_ago=400)
+    add_events(2, [('created', {'title': [None, 'A']})], days_ago=10)
+    
+    assert purge_history(older_than_days=365, batch_size=2) == 5
+    assert [event.task_id for event in TaskEvent.query.all()] == [2]
+
+def test_history_commands(app):
+    """Test the compact and purge CLI commands."""
+    add_events(1, [('updated', {'title': ['A', 'B']}), ('updated', {'title': ['B', 'C']})], days_ago=400)
+    runner = app.test_cli_runner()
+    
+    result = runner.invoke(args=['history', 'compact'])
+    assert result.exit_code == 0, result.output
+    assert 'Merged away 1 task events' in result.output
+    
+    result = runner.invoke(args=['history', 'purge'])
+    assert result.exit_code == 0, result.output
+    assert 'Deleted 1 task events' in result.output
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+def test_buffered_history(buffered_app):
+    """Test that buffered events are written after commit by the writer thread."""
+    client = buffered_app.test_client()
+    response = client.post('/api/auth/register', json={
+        'username': 'historian', 'email': 'historian@example.com', 'password': 'testpass123'
+    })
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    
+    task_id = client.post('/api/tasks/', json={'title': 'Logged'}, headers=headers).get_json()['task']['id']
+    client.patch(f'/api/tasks/{task_id}', json={'status': 'completed'}, headers=headers)
+    
+    wait_for(lambda: task_history.snapshot()['written'] == 2)
+    events = client.get(f'/api/tasks/{task_id}/history', headers=headers).get_json()['events']
+    assert [event['action'] for event in events] == ['created', 'updated']
+    assert task_history.snapshot()['buffered'] == 0
+
+def test_buffered_history_dropped_on_rollback(buffered_app):
+    """Test that events recorded in a rolled back transaction are never written."""
+    now = datetime.utcnow()
+    task_history.record({'id': 1, 'version': 1, 'created_at': now}, None, 'created', {'title': [None, 'Gone']})
+    db.session.rollback()
+    task_history.record({'id': 2, 'version': 1, 'created_at': now}, None, 'created', {'title': [None, 'Kept']})
+    db.session.commit()
+    
+    wait_for(lambda: task_history.snapshot()['written'] == 1)
+    assert [event.task_id for event in TaskEvent.query.all()] == [2]
+
+def test_failed_flush_logged_and_retried(app, caplog):
+    """Test that events the database refuses are logged as an error and kept for the next flush."""
+    task_history._pending = [{
+        'task_id': 1, 'task_created_at': datetime.utcnow(), 'version': 1, 'action': 'created',
+        'changes': {}, 'user_id': None, 'created_at': datetime.utcnow()
+    }]
+    TaskEvent.__table__.drop(db.engine)
+    
+    assert task_history.flush() == 0
+    assert 'Error writing task history' in caplog.text
+    assert caplog.records[-1].exc_info is not None
+    assert task_history.snapshot()['buffered'] == 1
+    
+    TaskEvent.__table__.create(db.engine)
+    assert task_history.flush() == 1
@@ -2,6 +2,12 @@ import pytest
 import json
 from datetime import datetime, timedelta
 
+from sqlalchemy.dialects import postgresql
+
+from src.models.task import Task, TaskStatus
+from src.models.user import User, db
+from src.routes.tasks import returning_previous
+
 def test_get_tasks_empty(client, auth_headers):
     """Test getting tasks when none exist."""
     response = client.get('/api/tasks/', headers=auth_headers)
@@ -69,6 +75,10 @@ def test_create_task_invalid_priority(client, auth_headers):
 
 def test_get_task_success(client, auth_headers, test_task):
     """Test getting a specific task."""
+    # test_task is created by another user; assign it to the requesting one
+    test_task.assigned_to = User.query.filter_by(username='testuser').one().id
+    db.session.commit()
+    
     response = client.get(f'/api/tasks/{test_task.id}', headers=auth_headers)
     data = response.get_json()
     
@@ -131,6 +141,144 @@ def test_update_task_empty_title(client, auth_headers):
     assert response.status_code == 400
     assert 'Title cannot be empty' in data['error']
 
+def test_update_task_bumps_version(client, auth_headers):
+    """Test that a full update increments the task version."""
+    create_response = client.post('/api/tasks/', json={'title': 'Versioned Task'}, headers=auth_headers)
+    task = create_response.get_json()['task']
+    assert task['version'] == 1
+    
+    response = client.put(f"/api/tasks/{task['id']}", json={'title': 'Renamed'}, headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert response.get_json()['task']['version'] == 2
+    assert response.headers['ETag'] == '"2"'
+
+def test_patch_task_success(client, auth_headers):
+    """Test partially updating a task with If-Match."""
+    create_response = client.post('/api/tasks/', json={'title': 'Patch Me', 'priority': 'low'}, headers=auth_headers)
+    task_id = create_response.get_json()['task']['id']
+    
+    get_response = client.get(f'/api/tasks/{task_id}', headers=auth_headers)
+    etag = get_response.headers['ETag']
+    
+    response = client.patch(
+        f'/api/tasks/{task_id}',
+        json={'status': 'in_progress'},
+        headers={**auth_headers, 'If-Match': etag}
+    )
+    data = response.get_json()
+    
+    assert response.status_code == 200
+    assert data['task']['status'] == 'in_progress'
+    assert data['task']['priority'] == 'low'
+    assert data['task']['title'] == 'Patch Me'
+    assert data['task']['version'] == 2
+    assert response.headers['ETag'] == '"2"'
+
+def test_patch_task_version_conflict(client, auth_headers):
+    """Test that a stale If-Match is rejected with 412."""
+    create_response = client.post('/api/tasks/', json={'title': 'Contended Task'}, headers=auth_headers)
+    task_id = create_response.get_json()['task']['id']
+    
+    # Two editors read version 1; the first write wins
+    first = client.patch(f'/api/tasks/{task_id}', json={'title': 'First'}, headers={**auth_headers, 'If-Match': '"1"'})
+    assert first.status_code == 200
+    
+    second = client.patch(f'/api/tasks/{task_id}', json={'title': 'Second'}, headers={**auth_headers, 'If-Match': '"1"'})
+    data = second.get_json()
+    
+    assert second.status_code == 412
+    assert data['version'] == 2
+    assert second.headers['ETag'] == '"2"'
+    
+    get_response = client.get(f'/api/tasks/{task_id}', headers=auth_headers)
+    assert get_response.get_json()['task']['title'] == 'First'
+
+def test_patch_task_version_in_body(client, auth_headers):
+    """Test that the expected version can be sent in the body."""
+    create_response = client.post('/api/tasks/', json={'title': 'Body Version'}, headers=auth_headers)
+    task_id = create_response.get_json()['task']['id']
+    
+    response = client.patch(f'/api/tasks/{task_id}', json={'title': 'Stale', 'version': 5}, headers=auth_headers)
+    
+    assert response.status_code == 412
+
+def test_patch_task_errors(client, auth_headers, test_task):
+    """Test PATCH error responses."""
+    create_response = client.post('/api/tasks/', json={'title': 'Mine'}, headers=auth_headers)
+    task_id = create_response.get_json()['task']['id']
+    
+    response = client.patch('/api/tasks/999', json={'title': 'Nope'}, headers=auth_headers)
+    assert response.status_code == 404
+    
+    # test_task belongs to another user
+    response = client.patch(f'/api/tasks/{test_task.id}', json={'title': 'Nope'}, headers=auth_headers)
+    assert response.status_code == 403
+    
+    response = client.patch(f'/api/tasks/{task_id}', json={'assigned_to': 999}, headers=auth_headers)
+    assert response.status_code == 404
+    assert 'Assigned user not found' in response.get_json()['error']
+    
+    response = client.patch(f'/api/tasks/{task_id}', json={'status': 'bogus'}, headers=auth_headers)
+    assert response.status_code == 400
+    
+    response = client.patch(f'/api/tasks/{task_id}', json={'title': 'x'}, headers={**auth_headers, 'If-Match': 'abc'})
+    assert response.status_code == 400
+
+def test_patch_task_single_statement(client, auth_headers, count_queries):
+    """Test that a successful PATCH runs a single SQL statement."""
+    create_response = client.post('/api/tasks/', json={'title': 'One Round Trip'}, headers=auth_headers)
+    task_id = create_response.get_json()['task']['id']
+    
+    with count_queries() as queries:
+        response = client.patch(f'/api/tasks/{task_id}', json={'priority': 'urgent'}, headers={**auth_headers, 'If-Match': '"1"'})
+    
+    assert response.status_code == 200
+    assert queries.count == 1
+    assert queries.statements[0].startswith('UPDATE tasks')
+
+def test_patch_task_returns_previous_values_on_postgresql():
+    """Test that on PostgreSQL a PATCH reads the previous values it needs in its own UPDATE."""
+    statement = db.update(Task.__table__).where(Task.id == 1).values(status=TaskStatus.COMPLETED)
+    sql = str(returning_previous(statement, 1, ['status', 'assigned_to']).compile(dialect=postgresql.dialect()))
+    
+    assert sql.count('UPDATE tasks') == 1
+    assert 'FROM (SELECT tasks.id AS id, tasks.status AS previous_status' in sql
+    assert 'FOR UPDATE) AS previous' in sql
+    assert 'AS previous WHERE tasks.id = %(id_2)s AND tasks.id = previous.id RETURNING' in sql
+    assert sql.endswith('previous.previous_status, previous.previous_assigned_to')
+
+def test_get_tasks_normalized(client, auth_headers, count_queries):
+    """Test that ?normalize=true lists users once in a side table instead of in every task."""
+    response = client.post('/api/auth/register', json={
+        'username': 'helper',
+        'email': 'helper@example.com',
+        'password': 'testpass123'
+    })
+    helper_id = response.get_json()['user']['id']
+    for n in range(3):
+        client.post('/api/tasks/', json={'title': f'Task {n}', 'assigned_to': helper_id}, headers=auth_headers)
+    client.post('/api/tasks/', json={'title': 'Unassigned'}, headers=auth_headers)
+    
+    with count_queries() as queries:
+        response = client.get('/api/tasks/?normalize=true', headers=auth_headers)
+    data = response.get_json()
+    
+    assert response.status_code == 200
+    assert data['count'] == 4
+    # The tasks, their labels and the users they reference
+    assert queries.count == 3
+    assert all('assignee' not in task and 'creator' not in task for task in data['tasks'])
+    
+    creator_id = data['tasks'][0]['created_by']
+    assert set(data['users']) == {str(creator_id), str(helper_id)}
+    assert data['users'][str(helper_id)]['username'] == 'helper'
+    
+    nested = client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']
+    for task, full in zip(data['tasks'], nested):
+        assert full['creator'] == data['users'][str(task['created_by'])]
+        assert full['title'] == task['title']
+
 def test_delete_task_success(client, auth_headers):
     """Test successful task deletion."""
     # First create a task
@@ -191,6 +339,7 @@ def test_tasks_require_authentication(client):
         ('POST', '/api/tasks/'),
         ('GET', '/api/tasks/1'),
         ('PUT', '/api/tasks/1'),
+        ('PATCH', '/api/tasks/1'),
         ('DELETE', '/api/tasks/1'),
         ('GET', '/api/tasks/stats'),
     ]
@@ -202,6 +351,8 @@ def test_tasks_require_authentication(client):
             response = client.post(endpoint, json={})
         elif method == 'PUT':
             response = client.put(endpoint, json={})
+        elif method == 'PATCH':
+            response = client.patch(endpoint, json={})
         elif method == 'DELETE':
             response = client.delete(endpoint)
         
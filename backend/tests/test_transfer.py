@@ -0,0 +1,147 @@
+import pytest
+import csv
+import io
+import json
+
+from src.routes.dashboard import dashboard_cache
+
+def test_export_ndjson(client, auth_headers):
+    """Test streaming the user's tasks as NDJSON."""
+    for title in ('Task 1', 'Task 2'):
+        client.post('/api/tasks/', json={'title': title, 'priority': 'high'}, headers=auth_headers)
+    
+    response = client.get('/api/tasks/export', headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['title'] for row in rows] == ['Task 1', 'Task 2']
+    assert rows[0]['priority'] == 'high'
+    assert 'assignee' not in rows[0]
+
+def test_export_ndjson_normalized(client, auth_headers):
+    """Test that a normalized export writes each referenced user once, before their first task."""
+    for title in ('Task 1', 'Task 2'):
+        client.post('/api/tasks/', json={'title': title}, headers=auth_headers)
+    
+    response = client.get('/api/tasks/export?normalize=true', headers=auth_headers)
+    lines = response.get_data(as_text=True)
+    rows = [json.loads(line) for line in lines.splitlines()]
+    
+    assert response.status_code == 200
+    assert list(rows[0]) == ['user']
+    assert rows[0]['user']['username'] == 'testuser'
+    assert [row['title'] for row in rows[1:]] == ['Task 1', 'Task 2']
+    
+    # Importing it back skips the user records
+    response = client.post('/api/tasks/import', data=lines, headers=auth_headers,
+                           content_type='application/x-ndjson')
+    assert response.get_json()['imported'] == 2
+    assert response.get_json()['error_count'] == 0
+    
+    response = client.get('/api/tasks/export?format=csv&normalize=true', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_export_csv(client, auth_headers):
+    """Test streaming the user's tasks as CSV."""
+    client.post('/api/tasks/', json={'title': 'CSV Task'}, headers=auth_headers)
+    
+    response = client.get('/api/tasks/export?format=csv', headers=auth_headers)
+    
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 1
+    assert rows[0]['title'] == 'CSV Task'
+    assert rows[0]['status'] == 'pending'
+
+def test_export_invalid_format(client, auth_headers):
+    """Test export with an unknown format."""
+    response = client.get('/api/tasks/export?format=xml', headers=auth_headers)
+    
+    assert response.status_code == 400
+
+def test_import_ndjson_reports_row_errors(client, auth_headers):
+    """Test importing NDJSON with per-row error reporting."""
+    body = '\n'.join([
+        json.dumps({'title': 'Imported 1', 'status': 'in_progress'}),
+        json.dumps({'description': 'no title'}),
+        'not json',
+        json.dumps({'title': 'Imported 2', 'assigned_to': 999}),
+        json.dumps({'title': 'Imported 3', 'priority': 'urgent'}),
+    ])
+    
+    response = client.post('/api/tasks/import', data=body, headers=auth_headers,
+                           content_type='application/x-ndjson')
+    data = response.get_json()
+    
+    assert response.status_code == 200
+    assert data['imported'] == 2
+    assert data['error_count'] == 3
+    assert [error['line'] for error in data['errors']] == [2, 3, 4]
+    assert 'Title is required' in data['errors'][0]['error']
+    assert 'Assigned user not found' in data['errors'][2]['error']
+    
+    tasks = client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']
+    assert sorted(task['title'] for task in tasks) == ['Imported 1', 'Imported 3']
+
+def test_import_csv_roundtrip(client, auth_headers):
+    """Test that an exported CSV can be imported again."""
+    client.post('/api/tasks/', json={'title': 'Roundtrip', 'priority': 'low'}, headers=auth_headers)
+    exported = client.get('/api/tasks/export?format=csv', headers=auth_headers).get_data()
+    
+    response = client.post('/api/tasks/import', data=exported, headers=auth_headers,
+                           content_type='text/csv')
+    
+    assert response.get_json()['imported'] == 1
+    tasks = client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']
+    assert [task['priority'] for task in tasks] == ['low', 'low']
+
+def test_import_refreshes_dashboards(client, auth_headers, test_user):
+    """Test that importing drops the cached dashboards of the creator and assignees."""
+    assert client.get('/api/dashboard/', headers=auth_headers).get_json()['stats']['total_tasks'] == 0
+    dashboard_cache.set(test_user.id, {'stale': True}, ttl=60)
+    
+    body = json.dumps({'title': 'Imported', 'assigned_to': test_user.id})
+    client.post('/api/tasks/import', data=body, headers=auth_headers, content_type='application/x-ndjson')
+    
+    assert client.get('/api/dashboard/', headers=auth_headers).get_json()['stats']['total_tasks'] == 1
+    assert dashboard_cache.get(test_user.id) is None
+
+def test_import_utc_timestamps(client, auth_headers):
+    """Test that timestamps with a Z or offset are imported as naive UTC."""
+    body = '\n'.join([
+        json.dumps({'title': 'Zulu', 'status': 'completed', 'created_at': '2024-01-01T00:00:00Z'}),
+        json.dumps({'title': 'Offset', 'created_at': '2024-01-01T02:00:00+02:00', 'due_date': '2024-02-01T00:00:00Z'}),
+    ])
+    
+    response = client.post('/api/tasks/import', data=body, headers=auth_headers,
+                           content_type='application/x-ndjson')
+    
+    assert response.status_code == 200
+    assert response.get_json()['imported'] == 2
+    tasks = client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']
+    assert {task['created_at'] for task in tasks} == {'2024-01-01T00:00:00'}
+    assert [task['due_date'] for task in tasks if task['title'] == 'Offset'] == ['2024-02-01T00:00:00']
+
+def test_import_reports_invalid_utf8_lines(client, auth_headers):
+    """Test that lines that aren't UTF-8 are reported as row errors in NDJSON and CSV."""
+    body = b'\n'.join([
+        json.dumps({'title': 'Good'}).encode(),
+        '{"title": "Caf\xe9"}'.encode('latin-1'),
+        json.dumps({'title': 'Also good'}).encode(),
+    ])
+    response = client.post('/api/tasks/import', data=body, headers=auth_headers,
+                           content_type='application/x-ndjson')
+    data = response.get_json()
+    
+    assert response.status_code == 200
+    assert data['imported'] == 2
+    assert data['errors'] == [{'line': 2, 'error': 'Invalid UTF-8'}]
+    
+    body = 'title,description\r\nGood,ok\r\n"Caf\xe9",\r\n"Two\r\nlines",fine\r\n'.encode('latin-1')
+    response = client.post('/api/tasks/import', data=body, headers=auth_headers, content_type='text/csv')
+    data = response.get_json()
+    
+    assert response.status_code == 200
+    assert data['imported'] == 2
+    assert data['errors'] == [{'line': 3, 'error': 'Invalid UTF-8'}]
@@ -0,0 +1,103 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from src.models.user import db, User
+from src.routes.user import _prefix_condition, user_search_cache
+
+@pytest.fixture
+def directory(client):
+    """Create a handful of users for listing and search."""
+    user_search_cache.clear()
+    people = [
+        ('alice', 'alice@example.com', 'Alice', 'Anderson'),
+        ('albert', 'bert@example.com', 'Albert', 'Brown'),
+        ('bob', 'bob@example.com', 'Robert', 'Alvarez'),
+        ('carol', 'carol@corp.example', 'Carol', 'Chen'),
+    ]
+    for username, email, first_name, last_name in people:
+        user = User(username=username, email=email, first_name=first_name, last_name=last_name)
+        user.set_password('password123')
+        db.session.add(user)
+    db.session.commit()
+    yield
+    user_search_cache.clear()
+
+def test_list_users_paginated(client, directory):
+    """Test keyset pagination of the user listing."""
+    response = client.get('/api/users/users?limit=3')
+    data = response.get_json()
+    
+    assert response.status_code == 200
+    assert data['count'] == 3
+    assert data['next_after'] == data['users'][-1]['id']
+    
+    data = client.get(f"/api/users/users?limit=3&after={data['next_after']}").get_json()
+    assert data['count'] == 1
+    assert data['next_after'] is None
+
+def test_search_users_by_prefix(client, auth_headers, directory):
+    """Test case-insensitive prefix search across username, name and email."""
+    response = client.get('/api/users/search?prefix=AL', headers=auth_headers)
+    data = response.get_json()
+    
+    assert response.status_code == 200
+    # alice/albert by username, bob by last name Alvarez
+    assert [user['username'] for user in data['users']] == ['albert', 'alice', 'bob']
+    assert 'password_hash' not in data['users'][0]
+    
+    data = client.get('/api/users/search?prefix=carol@corp', headers=auth_headers).get_json()
+    assert [user['username'] for user in data['users']] == ['carol']
+
+def test_search_users_caps_results(client, auth_headers, directory, app):
+    """Test that the number of search results is capped."""
+    app.config['USER_SEARCH_LIMIT'] = 2
+    
+    data = client.get('/api/users/search?prefix=a&limit=50', headers=auth_headers).get_json()
+    
+    assert data['count'] == 2
+
+def test_search_users_escapes_wildcards(client, auth_headers, directory):
+    """Test that LIKE wildcards in the prefix are matched literally."""
+    data = client.get('/api/users/search?prefix=%25', headers=auth_headers).get_json()
+    
+    assert data['users'] == []
+
+def test_search_users_requires_prefix(client, auth_headers):
+    """Test search without a prefix."""
+    response = client.get('/api/users/search', headers=auth_headers)
+    
+    assert response.status_code == 400
+
+def test_search_cache_cleared_on_register(client, auth_headers, directory):
+    """Test that newly registered users show up in cached searches."""
+    client.get('/api/users/search?prefix=dav', headers=auth_headers)
+    client.post('/api/auth/register', json={
+        'username': 'dave', 'email': 'dave@example.com', 'password': 'password123'
+    })
+    
+    data = client.get('/api/users/search?prefix=dav', headers=auth_headers).get_json()
+    
+    assert [user['username'] for user in data['users']] == ['dave']
+
+def test_search_users_prefix_ending_in_last_code_point(client, auth_headers, directory):
+    """Test that a prefix ending in U+10FFFF, which has no next character, is still searched."""
+    user = User(username='zed\U0010ffffx', email='zed@example.com')
+    user.set_password('password123')
+    db.session.add(user)
+    db.session.commit()
+    
+    response = client.get('/api/users/search', query_string={'prefix': 'zed\U0010ffff'}, headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert [user['username'] for user in response.get_json()['users']] == ['zed\U0010ffffx']
+
+def test_search_users_uses_pattern_indexes_on_postgresql():
+    """Test that on PostgreSQL the search is a LIKE on text_pattern_ops indexes, not a collated range."""
+    condition = _prefix_condition(User.username, 'al', 'postgresql')
+    sql = str(condition.compile(dialect=postgresql.dialect()))
+    
+    assert sql.startswith('lower(users.username) LIKE %(lower_1)s ESCAPE')
+    assert '>=' not in sql
+    index = next(index for index in User.__table__.indexes if index.name == 'ix_users_username_lower')
+    assert 'lower(username) text_pattern_ops' in str(CreateIndex(index).compile(dialect=postgresql.dialect()))
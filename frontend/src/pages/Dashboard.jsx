@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../contexts/AuthContext';
-import { tasksAPI } from '../services/api';
+import { dashboardAPI } from '../services/api';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
 import { Button } from '@/components/ui/button';
@@ -29,14 +29,11 @@ const Dashboard = () => {
     try {
       setLoading(true);
       
-      // Fetch stats and recent tasks
-      const [statsResponse, tasksResponse] = await Promise.all([
-        tasksAPI.getStats(),
-        tasksAPI.getTasks({ limit: 5 })
-      ]);
+      // Stats and recent tasks come back in a single request
+      const response = await dashboardAPI.get();
 
-      setStats(statsResponse.data);
-      setRecentTasks(tasksResponse.data.tasks || []);
+      setStats(response.data.stats);
+      setRecentTasks(response.data.recent_tasks || []);
     } catch (error) {
       console.error('Failed to fetch dashboard data:', error);
     } finally {
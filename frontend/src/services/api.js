@@ -52,13 +52,26 @@ export const tasksAPI = {
   getTask: (id) => api.get(`/tasks/${id}`),
   createTask: (taskData) => api.post('/tasks', taskData),
   updateTask: (id, taskData) => api.put(`/tasks/${id}`, taskData),
+  patchTask: (id, changes, version) => api.patch(`/tasks/${id}`, changes, {
+    headers: version ? { 'If-Match': `"${version}"` } : {},
+  }),
   deleteTask: (id) => api.delete(`/tasks/${id}`),
   getStats: () => api.get('/tasks/stats'),
+  getAnalytics: (params = {}) => api.get('/tasks/analytics', { params }),
+  // For EventSource, which can't send an Authorization header
+  streamUrl: () => `${API_BASE_URL}/tasks/stream?jwt=${encodeURIComponent(localStorage.getItem('token') || '')}`,
+};
+
+// Dashboard API
+export const dashboardAPI = {
+  get: () => api.get('/dashboard/'),
 };
 
 // Users API
 export const usersAPI = {
-  getUsers: () => api.get('/users'),
+  getUsers: (params = {}) => api.get('/users/users', { params }),
+  searchUsers: (prefix, limit) => api.get('/users/search', { params: { prefix, limit } }),
+  getPresence: (userIds) => api.get('/presence/', { params: { user_ids: userIds.join(',') } }),
   getUser: (id) => api.get(`/users/${id}`),
   updateUser: (id, userData) => api.put(`/users/${id}`, userData),
   deleteUser: (id) => api.delete(`/users/${id}`),
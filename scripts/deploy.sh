@@ -15,7 +15,6 @@ NC='\033[0m' # No Color
 # Configuration
 COMPOSE_FILE="docker-compose.yml"
 ENV_FILE=".env"
-BACKUP_DIR="backups"
 
 # Functions
 log_info() {
@@ -85,16 +84,14 @@ setup_environment() {
 backup_data() {
     log_info "Creating backup..."
     
-    # Create backup directory
-    mkdir -p "$BACKUP_DIR"
-    
-    # Backup database if it exists
-    if docker volume ls | grep -q "taskmanager_backend_data"; then
-        BACKUP_FILE="$BACKUP_DIR/backup_$(date +%Y%m%d_%H%M%S).tar.gz"
-        docker run --rm -v taskmanager_backend_data:/data -v "$(pwd)/$BACKUP_DIR":/backup alpine tar czf "/backup/$(basename $BACKUP_FILE)" -C /data .
-        log_success "Backup created: $BACKUP_FILE"
+    # Incremental online backup taken by the running backend; only changed
+    # chunks are stored, under backend/database/backups on the host
+    if docker ps --format '{{.Names}}' | grep -q "^taskmanager-backend$"; then
+        docker exec taskmanager-backend flask --app src.wsgi backup create
+        docker exec taskmanager-backend flask --app src.wsgi backup prune
+        log_success "Backup created."
     else
-        log_info "No existing data to backup."
+        log_info "Backend is not running, no data to backup."
     fi
 }
 # Fix for Git Bash path issues on Windows
@@ -138,7 +135,7 @@ wait_for_services() {
     local attempt=1
     
     while [ $attempt -le $max_attempts ]; do
-        if curl -f http://localhost:8000/api/health &> /dev/null; then
+        if curl -f http://localhost:8000/api/health/ready &> /dev/null; then
             log_success "Backend is ready."
             break
         fi